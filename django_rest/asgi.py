@@ -9,8 +9,11 @@ https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+django.setup(set_prefix=False)
 
-application = get_asgi_application()
+from django_rest.asgi_reads import ReadPathASGIHandler  # noqa: E402
+
+application = ReadPathASGIHandler()
@@ -0,0 +1,95 @@
+"""
+Concurrent detail GETs through an in-process ASGI client: the stock Django
+`ASGIHandler`, which serves every request on one thread, against
+`ReadPathASGIHandler`. Each query sleeps `--query-latency` ms to stand in for
+the network round trip of a database server; the response cache is off unless
+`--response-cache` is given.
+
+    cd django_rest && python -m benchmarks.asgi_concurrency --requests 1000 --query-latency 2
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from contextlib import ExitStack
+from unittest import mock
+
+from benchmarks.utils import setup_django, test_database, print_table
+
+
+def get_urls():
+    from django.urls import reverse
+    from tests.conftest import get_department, get_task
+
+    task, _ = get_task()
+    department, _ = get_department()
+    return [reverse('task', args=(task.id,)), reverse('project', args=(task.project_id,)),
+            reverse('employee', args=(department.head_of_department_id,)),
+            reverse('department', args=(department.id,))]
+
+
+async def run_concurrently(application, urls, headers, requests, concurrency):
+    from tests.conftest import asgi_request
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def get(url):
+        async with semaphore:
+            start = time.perf_counter()
+            status, _, _ = await asgi_request(application, 'GET', url, headers)
+            latencies.append(time.perf_counter() - start)
+            assert status == 200, status
+
+    start = time.perf_counter()
+    await asyncio.gather(*(get(urls[number % len(urls)]) for number in range(requests)))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def run(requests, concurrency, query_latency, use_response_cache):
+    from django.core.handlers.asgi import ASGIHandler
+    from django.db.backends.utils import CursorWrapper
+    from django_rest.asgi_reads import ReadPathASGIHandler
+    from django_rest.response_cache import response_cache
+    from tests.conftest import get_employee, get_token
+
+    employee, _ = get_employee(is_staff=True)
+    headers = [('Authorization', 'Bearer {}'.format(get_token(employee))), ('Accept', 'application/json')]
+    urls = get_urls()
+    execute = CursorWrapper.execute
+
+    def slow_execute(self, sql, params=None):
+        time.sleep(query_latency / 1000)
+        return execute(self, sql, params)
+
+    rows = []
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(CursorWrapper, 'execute', slow_execute))
+        if not use_response_cache:
+            stack.enter_context(mock.patch.object(response_cache, 'get', return_value=None))
+            stack.enter_context(mock.patch.object(response_cache, 'set'))
+        for application in (ASGIHandler(), ReadPathASGIHandler()):
+            elapsed, latencies = asyncio.run(run_concurrently(application, urls, headers, requests, concurrency))
+            rows.append({'handler': type(application).__name__, 'seconds': round(elapsed, 2),
+                         'requests/s': round(requests / elapsed, 1),
+                         'p50 ms': round(statistics.median(latencies) * 1000, 1),
+                         'p99 ms': round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 1)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=1000, help='Requests in flight at once.')
+    parser.add_argument('--query-latency', type=float, default=2, help='Milliseconds added to every query.')
+    parser.add_argument('--response-cache', action='store_true', help='Serve Project and Task from the cache.')
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        rows = run(args.requests, args.concurrency, args.query_latency, args.response_cache)
+    print_table(rows, ('handler', 'seconds', 'requests/s', 'p50 ms', 'p99 ms'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Queries and time per authenticated GET /task/<pk>/ with the stock simplejwt
+`JWTAuthentication` against `CachedJWTAuthentication`.
+
+    cd django_rest && python -m benchmarks.auth_queries --requests 500
+"""
+import argparse
+from unittest import mock
+
+from benchmarks.utils import setup_django, test_database, timer, print_table
+
+
+def run(requests):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+    from rest_framework.views import APIView
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from django_rest.authentication import CachedJWTAuthentication
+    from django_rest.user_cache import user_cache
+    from tests.conftest import get_employee, get_task, get_client
+
+    employee, _ = get_employee(is_staff=True)
+    task, _ = get_task()
+    client = get_client(employee)
+    url = reverse('task', args=(task.id,))
+
+    rows = []
+    for authentication_class in (JWTAuthentication, CachedJWTAuthentication):
+        user_cache.clear()
+        with mock.patch.object(APIView, 'authentication_classes', [authentication_class]):
+            result = {'authentication': authentication_class.__name__}
+            with CaptureQueriesContext(connection) as queries, timer(result):
+                for _ in range(requests):
+                    assert client.get(url).status_code == 200
+            result['queries/request'] = round(len(queries) / requests, 2)
+            result['ms/request'] = round(result.pop('seconds') * 1000 / requests, 3)
+        rows.append(result)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        rows = run(args.requests)
+    print_table(rows, ('authentication', 'queries/request', 'ms/request'))
+    saved = rows[0]['queries/request'] - rows[1]['queries/request']
+    print('Saved queries per request: {:.2f}'.format(saved))
+
+
+if __name__ == '__main__':
+    main()
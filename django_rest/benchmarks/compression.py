@@ -0,0 +1,57 @@
+"""
+Bytes saved against CPU time spent by each encoding and level the
+compression middleware can use, on a /task/ page, a /project/<pk>/ body, the
+OpenAPI schema and the /metrics/ text. br and zstd are measured when
+`brotli` and `zstandard` are installed.
+
+    cd django_rest && python -m benchmarks.compression --number 200
+"""
+import argparse
+import timeit
+
+from benchmarks.renderers import project_detail, task_page
+from benchmarks.utils import setup_django, print_table
+
+LEVELS = {'gzip': (1, 6, 9), 'br': (1, 4, 11), 'zstd': (1, 3, 19)}
+
+
+def get_payloads():
+    from django.test import Client
+    from prometheus_client import generate_latest
+    from django_rest.metrics import get_registry
+    from django_rest.renderers import ORJSONRenderer
+
+    renderer = ORJSONRenderer()
+    schema = Client().get('/?format=openapi', SERVER_NAME='localhost')
+    assert schema.status_code == 200, 'schema view answered {}'.format(schema.status_code)
+    return {'project detail': renderer.render(project_detail()), 'task page (100)': renderer.render(task_page(100)),
+            'openapi schema': schema.content, 'metrics': generate_latest(get_registry())}
+
+
+def run(number):
+    from django_rest.compression import compress, compressors
+
+    rows = []
+    for payload_name, payload in get_payloads().items():
+        for encoding in compressors:
+            for level in LEVELS[encoding]:
+                content = compress(encoding, level, payload)
+                seconds = timeit.timeit(lambda: compress(encoding, level, payload), number=number) / number
+                rows.append({'payload': payload_name, 'encoding': '{} {}'.format(encoding, level),
+                             'bytes': len(payload), 'compressed': len(content),
+                             'ratio': round(len(payload) / len(content), 2), 'compress us': round(seconds * 1e6, 1),
+                             'MB/s': round(len(payload) / seconds / 1e6, 1)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=200, help='Iterations per measurement.')
+    args = parser.parse_args()
+
+    setup_django()
+    print_table(run(args.number), ('payload', 'encoding', 'bytes', 'compressed', 'ratio', 'compress us', 'MB/s'))
+
+
+if __name__ == '__main__':
+    main()
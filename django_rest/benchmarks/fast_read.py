@@ -0,0 +1,92 @@
+"""
+CPU time of the values-based read path (`ValuesReadMixin`) against the model
+instance + serializer path, per GET /task/<pk>/ and /project/<pk>/ (response
+cache disabled) and per serialized row.
+
+    cd django_rest && python -m benchmarks.fast_read --requests 500 --rows 5000
+"""
+import argparse
+import time
+from contextlib import ExitStack
+from unittest import mock
+
+from benchmarks.utils import setup_django, test_database, print_table
+
+
+def cpu_time(func, number):
+    start = time.process_time()
+    for _ in range(number):
+        func()
+    return time.process_time() - start
+
+
+def slow_path(serializer_classes):
+    stack = ExitStack()
+    for serializer_class in serializer_classes:
+        stack.enter_context(mock.patch.object(serializer_class, 'get_values_reader', return_value=None))
+    return stack
+
+
+def run_requests(requests):
+    from django.urls import reverse
+    from django_rest.response_cache import response_cache
+    from django_rest.serializers import ProjectSerializer, TaskSerializer
+    from tests.conftest import get_employee, get_task, get_client
+
+    employee, _ = get_employee(is_staff=True)
+    task, _ = get_task()
+    task.executor = employee
+    task.save()
+    client = get_client(employee)
+    urls = {'task': reverse('task', args=(task.id,)), 'project': reverse('project', args=(task.project_id,))}
+
+    rows = []
+    with mock.patch.object(response_cache, 'get', return_value=None), mock.patch.object(response_cache, 'set'):
+        for name, url in urls.items():
+            fast_content = client.get(url).content
+            with slow_path((TaskSerializer, ProjectSerializer)):
+                assert client.get(url).content == fast_content, 'fast path output differs'
+                slow = cpu_time(lambda: client.get(url), requests)
+            fast = cpu_time(lambda: client.get(url), requests)
+            rows.append({'measure': 'GET /{}/<pk>/'.format(name), 'instance us': round(slow * 1e6 / requests, 1),
+                         'values us': round(fast * 1e6 / requests, 1), 'speedup': round(slow / fast, 2)})
+    return rows
+
+
+def run_rows(count):
+    from django_rest.models import Project, Task
+    from django_rest.serializers import TaskSerializer
+
+    project = Project.objects.create(name='Benchmark project')
+    Task.objects.all().delete()
+    Task.objects.bulk_create(
+        Task(name='Task {}'.format(number), project=project, status='new',
+             start_date='2020-01-01', end_date='2020-02-01') for number in range(count))
+    reader = TaskSerializer.get_values_reader()
+
+    def instances():
+        return [TaskSerializer(instance).data for instance in Task.objects.all()]
+
+    def values():
+        return [reader.to_representation(row) for row in Task.objects.values_list(*reader.columns)]
+
+    assert instances() == values(), 'fast path output differs'
+    slow, fast = cpu_time(instances, 1), cpu_time(values, 1)
+    return [{'measure': 'read + serialize {} tasks'.format(count), 'instance us': round(slow * 1e6 / count, 1),
+             'values us': round(fast * 1e6 / count, 1), 'speedup': round(slow / fast, 2)}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--rows', type=int, default=5000)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        rows = run_requests(args.requests) + run_rows(args.rows)
+    print_table(rows, ('measure', 'instance us', 'values us', 'speedup'))
+
+
+if __name__ == '__main__':
+    main()
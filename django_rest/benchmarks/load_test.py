@@ -0,0 +1,440 @@
+"""
+Load test of every route in urls.py through the WSGI and ASGI handlers.
+
+Seeds a dataset (see django_rest.seed) in a file backed test database, counts
+the SQL queries of each endpoint over a few sequential requests, then sends
+`--requests` requests per endpoint from `--concurrency` concurrent workers and
+records throughput and p50/p95/p99 latency. The results are written as JSON;
+`--baseline` compares them against a saved run and exits with status 1 on a
+regression.
+
+SQLite lets one writer in at a time and fails transactions that read before
+they write (such as the cascading DELETE /employee/<pk>/) with "database is
+locked" under concurrency; those show up as errors of the endpoint.
+
+    cd django_rest && python -m benchmarks.load_test --requests 200 --concurrency 16 --output baseline.json
+    cd django_rest && python -m benchmarks.load_test --requests 200 --concurrency 16 --baseline baseline.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from io import BytesIO
+from uuid import uuid4
+
+from benchmarks.utils import setup_django, test_database, print_table
+
+HANDLERS = ('wsgi', 'asgi')
+
+
+class Endpoint:
+    """
+    One route and method. `request(context, number)` returns `(path, body)`,
+    `prepare(context, count)` creates the objects the requests consume (for
+    DELETE) and `share` scales the number of requests for expensive endpoints.
+    `access(context, number)` returns the access token to send, by default
+    `context['access']`.
+    """
+
+    def __init__(self, name, url_name, method, request, prepare=None, share=1.0, expected=(200,),
+                 content_type='application/json', accept='application/json', access=None):
+        self.name = name
+        self.url_name = url_name
+        self.method = method
+        self.request = request
+        self.prepare = prepare
+        self.share = share
+        self.expected = expected
+        self.content_type = content_type
+        self.accept = accept
+        self.access = access
+
+
+def reverse(name, *args):
+    from django.urls import reverse
+
+    return reverse(name, args=args)
+
+
+def pick(context, model, number):
+    ids = context['dataset'][model]
+    return ids[number % len(ids)]
+
+
+def consume(context, number):
+    return context['prepared'][number]
+
+
+def dumps(data):
+    return json.dumps(data).encode()
+
+
+def unique(prefix):
+    return '{}-{}'.format(prefix, uuid4().hex[:12])
+
+
+def prepare_model(model_name):
+    def prepare(context, number):
+        from django.contrib.auth.models import User
+        from django_rest.models import Department, Employee, Project, Task
+
+        prefix = unique('load-test')
+        if model_name == 'employee':
+            User.objects.bulk_create(User(username='{}-{}'.format(prefix, i)) for i in range(number))
+            users = User.objects.filter(username__startswith=prefix).values_list('id', flat=True)
+            Employee.objects.bulk_create(Employee(user_id=user_id, birthdate='1990-01-01') for user_id in users)
+            return list(Employee.objects.filter(user_id__in=users).values_list('id', flat=True))
+        if model_name == 'task':
+            project_id = context['dataset']['project'][0]
+            Task.objects.bulk_create(Task(name=prefix, project_id=project_id, status='new') for _ in range(number))
+            return list(Task.objects.filter(name=prefix).values_list('id', flat=True))
+        model = {'department': Department, 'project': Project}[model_name]
+        model.objects.bulk_create(model(name='{}-{}'.format(prefix, i)) for i in range(number))
+        return list(model.objects.filter(name__startswith=prefix).values_list('id', flat=True))
+    return prepare
+
+
+def prepare_jobs(context, number):
+    from django_rest.jobs import enqueue
+
+    return [enqueue('rebuild_project_stats', {'project_ids': []}).pk for _ in range(number)]
+
+
+def prepare_tokens(context, number):
+    from django.contrib.auth.models import User
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    user = User.objects.get(username=context['username'])
+    return [(str(refresh.access_token), str(refresh)) for refresh in map(RefreshToken.for_user, [user] * number)]
+
+
+def employee_csv(context, number):
+    lines = ['username,password,first_name,last_name,birthdate']
+    lines += ['{},{},First,Last,1990-01-01'.format(unique('import'), context['password']) for _ in range(3)]
+    return reverse('employee_import'), '\n'.join(lines).encode()
+
+
+def task_batch(context, number):
+    project_id = pick(context, 'project', number)
+    body = [{'name': 'Bulk task', 'project': project_id, 'status': 'new'} for _ in range(10)]
+    return reverse('task_bulk_create'), dumps(body)
+
+
+def get_endpoints():
+    """Every route of urls.py (one per included app), with the methods worth loading."""
+    return [
+        Endpoint('POST /api/token/', 'token_obtain_pair', 'POST', share=0.1, request=lambda c, n: (
+            reverse('token_obtain_pair'), dumps({'username': c['username'], 'password': c['password']}))),
+        Endpoint('POST /api/token/refresh/', 'token_refresh', 'POST', request=lambda c, n: (
+            reverse('token_refresh'), dumps({'refresh': c['refresh']}))),
+        Endpoint('POST /api/token/verify/', 'token_verify', 'POST', request=lambda c, n: (
+            reverse('token_verify'), dumps({'token': c['access']}))),
+        Endpoint('POST /api/token/revoke/', 'token_revoke', 'POST', expected=(204,), prepare=prepare_tokens,
+                 access=lambda c, n: consume(c, n)[0], request=lambda c, n: (
+                     reverse('token_revoke'), dumps({'refresh': consume(c, n)[1]}))),
+        Endpoint('GET / (openapi)', 'schema-swagger-ui', 'GET', accept='*/*', request=lambda c, n: (
+            reverse('schema-swagger-ui') + '?format=openapi', b'')),
+        Endpoint('GET /redoc/', 'schema-redoc', 'GET', accept='text/html', request=lambda c, n: (
+            reverse('schema-redoc'), b'')),
+        Endpoint('GET /admin/login/', 'admin:login', 'GET', accept='text/html', request=lambda c, n: (
+            reverse('admin:login'), b'')),
+        Endpoint('GET /api-auth/login/', 'rest_framework:login', 'GET', accept='text/html',
+                 request=lambda c, n: (reverse('rest_framework:login'), b'')),
+
+        Endpoint('GET /employee/', 'employee_create', 'GET', request=lambda c, n: (
+            reverse('employee_create') + '?department={}'.format(pick(c, 'department', n)), b'')),
+        Endpoint('POST /employee/', 'employee_create', 'POST', share=0.2, expected=(201,), request=lambda c, n: (
+            reverse('employee_create'), dumps({'username': unique('employee'), 'password': c['password'],
+                                               'first_name': 'First', 'last_name': 'Last',
+                                               'birthdate': '1990-01-01'}))),
+        Endpoint('GET /employee/<pk>/', 'employee', 'GET', request=lambda c, n: (
+            reverse('employee', pick(c, 'employee', n)), b'')),
+        Endpoint('PATCH /employee/<pk>/', 'employee', 'PATCH', request=lambda c, n: (
+            reverse('employee', pick(c, 'employee', n)), dumps({'birthdate': '1990-02-02'}))),
+        Endpoint('DELETE /employee/<pk>/', 'employee', 'DELETE', expected=(204,),
+                 prepare=prepare_model('employee'), request=lambda c, n: (
+                     reverse('employee', consume(c, n)), b'')),
+        Endpoint('POST /employee/import/', 'employee_import', 'POST', share=0.05, expected=(201,),
+                 content_type='text/csv', request=employee_csv),
+
+        Endpoint('GET /department/', 'department_create', 'GET', request=lambda c, n: (
+            reverse('department_create'), b'')),
+        Endpoint('POST /department/', 'department_create', 'POST', expected=(201,), request=lambda c, n: (
+            reverse('department_create'), dumps({'name': unique('department')}))),
+        Endpoint('GET /department/<pk>/', 'department', 'GET', request=lambda c, n: (
+            reverse('department', pick(c, 'department', n)), b'')),
+        Endpoint('PATCH /department/<pk>/', 'department', 'PATCH', request=lambda c, n: (
+            reverse('department', pick(c, 'department', n)), dumps({'name': unique('department')}))),
+        Endpoint('DELETE /department/<pk>/', 'department', 'DELETE', expected=(204,),
+                 prepare=prepare_model('department'), request=lambda c, n: (
+                     reverse('department', consume(c, n)), b'')),
+
+        Endpoint('GET /project/', 'project_create', 'GET', request=lambda c, n: (
+            reverse('project_create') + '?ordering=name', b'')),
+        Endpoint('POST /project/', 'project_create', 'POST', expected=(201,), request=lambda c, n: (
+            reverse('project_create'), dumps({'name': unique('project')}))),
+        Endpoint('GET /project/<pk>/', 'project', 'GET', request=lambda c, n: (
+            reverse('project', pick(c, 'project', n)), b'')),
+        Endpoint('PATCH /project/<pk>/', 'project', 'PATCH', request=lambda c, n: (
+            reverse('project', pick(c, 'project', n)), dumps({'name': unique('project')}))),
+        Endpoint('DELETE /project/<pk>/', 'project', 'DELETE', expected=(204,),
+                 prepare=prepare_model('project'), request=lambda c, n: (reverse('project', consume(c, n)), b'')),
+        Endpoint('GET /project/<pk>/stats/', 'project_stats', 'GET', request=lambda c, n: (
+            reverse('project_stats', pick(c, 'project', n)), b'')),
+
+        Endpoint('GET /task/', 'task_create', 'GET', request=lambda c, n: (
+            reverse('task_create') + '?status=done&project={}'.format(pick(c, 'project', n)), b'')),
+        Endpoint('GET /task/?expand=', 'task_create', 'GET', request=lambda c, n: (
+            reverse('task_create') + '?expand=executor,project.project_manager&project={}'.format(
+                pick(c, 'project', n)), b'')),
+        Endpoint('POST /task/', 'task_create', 'POST', expected=(201,), request=lambda c, n: (
+            reverse('task_create'), dumps({'name': 'Load test task', 'project': pick(c, 'project', n),
+                                           'status': 'new', 'start_date': '2020-02-01',
+                                           'end_date': '2020-03-01'}))),
+        Endpoint('GET /task/<pk>/', 'task', 'GET', request=lambda c, n: (reverse('task', pick(c, 'task', n)), b'')),
+        Endpoint('GET /task/<pk>/?fields=', 'task', 'GET', request=lambda c, n: (
+            reverse('task', pick(c, 'task', n)) + '?fields=id,name,status', b'')),
+        Endpoint('PATCH /task/<pk>/', 'task', 'PATCH', request=lambda c, n: (
+            reverse('task', pick(c, 'task', n)), dumps({'status': ('new', 'started', 'done')[n % 3]}))),
+        Endpoint('DELETE /task/<pk>/', 'task', 'DELETE', expected=(204,),
+                 prepare=prepare_model('task'), request=lambda c, n: (reverse('task', consume(c, n)), b'')),
+        Endpoint('POST /task/bulk/', 'task_bulk_create', 'POST', expected=(201,), request=task_batch),
+
+        Endpoint('GET /job/<pk>/', 'job', 'GET', prepare=prepare_jobs, request=lambda c, n: (
+            reverse('job', consume(c, n)), b'')),
+
+        Endpoint('GET /cache/stats/', 'response_cache_stats', 'GET', request=lambda c, n: (
+            reverse('response_cache_stats'), b'')),
+        Endpoint('GET /metrics/', 'metrics', 'GET', accept='text/plain', request=lambda c, n: (
+            reverse('metrics'), b'')),
+    ]
+
+
+def uncovered_routes(endpoints):
+    """Names of the top level urls.py routes no endpoint loads."""
+    from django.urls import URLPattern, get_resolver
+
+    covered = {endpoint.url_name for endpoint in endpoints}
+    return sorted(pattern.name for pattern in get_resolver().url_patterns
+                  if isinstance(pattern, URLPattern) and pattern.name not in covered)
+
+
+def wsgi_request(handler, method, path, headers, body=b''):
+    """Send one request to a WSGI application in process, return the status code."""
+    path, _, query_string = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': query_string, 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1', 'REMOTE_ADDR': '127.0.0.1',
+        'CONTENT_LENGTH': str(len(body)), 'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(body), 'wsgi.errors': sys.stderr, 'wsgi.multithread': True,
+        'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    for name, value in headers:
+        key = name.upper().replace('-', '_')
+        environ[key if key == 'CONTENT_TYPE' else 'HTTP_' + key] = value
+    status = []
+    response = handler(environ, lambda status_line, response_headers, exc_info=None: status.append(status_line))
+    try:
+        b''.join(response)
+    finally:
+        response.close()
+    return int(status[0].split()[0])
+
+
+def asgi_request(handler, method, path, headers, body=b''):
+    from tests.conftest import asgi_request
+
+    return asgi_request(handler, method, path, headers, body)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest rank percentile."""
+    return sorted_values[max(0, int(round(fraction * len(sorted_values))) - 1)]
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    return {'requests': len(latencies), 'errors': errors, 'throughput': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2)}
+
+
+def request_args(context, endpoint, number):
+    path, body = endpoint.request(context, number)
+    access = endpoint.access(context, number) if endpoint.access else context['access']
+    headers = [('Authorization', 'Bearer {}'.format(access)), ('Accept', endpoint.accept),
+               ('Content-Type', endpoint.content_type)]
+    return endpoint.method, path, headers, body
+
+
+def count_queries(context, endpoint, handler, samples):
+    from django.core.cache import caches
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from django_rest.user_cache import user_cache
+
+    # Start from cold caches, so that query counts compare across runs.
+    for cache in caches.all():
+        cache.clear()
+    user_cache.clear()
+    errors = 0
+    with CaptureQueriesContext(connection) as queries:
+        for number in range(samples):
+            status = wsgi_request(handler, *request_args(context, endpoint, number))
+            errors += status not in endpoint.expected
+    return round(len(queries) / samples, 2), errors
+
+
+def load_wsgi(context, endpoint, handler, requests, concurrency, offset):
+    latencies, errors = [], []
+
+    def send(number):
+        start = time.perf_counter()
+        status = wsgi_request(handler, *request_args(context, endpoint, offset + number))
+        latencies.append(time.perf_counter() - start)
+        errors.append(status not in endpoint.expected)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, range(requests)))
+    return summarize(latencies, sum(errors), time.perf_counter() - start)
+
+
+def load_asgi(context, endpoint, handler, requests, concurrency, offset):
+    latencies, errors = [], []
+
+    async def send(semaphore, number):
+        async with semaphore:
+            start = time.perf_counter()
+            status, _, _ = await asgi_request(handler, *request_args(context, endpoint, offset + number))
+            latencies.append(time.perf_counter() - start)
+            errors.append(status not in endpoint.expected)
+
+    async def send_all():
+        semaphore = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*(send(semaphore, number) for number in range(requests)))
+
+    start = time.perf_counter()
+    asyncio.run(send_all())
+    return summarize(latencies, sum(errors), time.perf_counter() - start)
+
+
+def run(options):
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.core.handlers.wsgi import WSGIHandler
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from django_rest.asgi_reads import ReadPathASGIHandler
+    from django_rest.seed import PASSWORD, seed
+
+    settings.DEBUG = False
+    # Every request comes from one client: the throttles still run (their cost is
+    # part of the latency) but never refuse one.
+    settings.THROTTLE = dict(settings.THROTTLE, RATES={name: (10 ** 9, 10 ** 9) for name in settings.THROTTLE['RATES']})
+    # Failed requests are counted, not logged.
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    dataset = seed(options.departments, options.employees, options.projects, options.tasks, superuser=True)
+    admin = User.objects.get(pk=dataset['user'][0])
+    refresh = RefreshToken.for_user(admin)
+    context = {'dataset': dataset, 'username': admin.username, 'password': PASSWORD, 'refresh': str(refresh),
+               'access': str(refresh.access_token)}
+    handlers = {'wsgi': (WSGIHandler(), load_wsgi), 'asgi': (ReadPathASGIHandler(), load_asgi)}
+    endpoints = [endpoint for endpoint in get_endpoints()
+                 if not options.endpoint or any(name in endpoint.name for name in options.endpoint)]
+
+    results = {}
+    for endpoint in endpoints:
+        requests = max(1, int(options.requests * endpoint.share))
+        samples = min(options.query_samples, requests)
+        if endpoint.prepare:
+            context['prepared'] = endpoint.prepare(context, samples + requests * len(options.handler))
+        queries, errors = count_queries(context, endpoint, handlers['wsgi'][0], samples)
+        result = results[endpoint.name] = {'queries': queries}
+        for number, name in enumerate(options.handler):
+            handler, load = handlers[name]
+            result[name] = load(context, endpoint, handler, requests, options.concurrency,
+                                offset=samples + number * requests)
+        result[options.handler[0]]['errors'] += errors
+        print('{:<32} {}'.format(endpoint.name, '  '.join(
+            '{} {:>8} req/s p95 {:>8} ms'.format(name, result[name]['throughput'], result[name]['p95_ms'])
+            for name in options.handler)), file=sys.stderr)
+
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'dataset': {'departments': options.departments, 'employees': options.employees,
+                        'projects': options.projects, 'tasks': options.tasks},
+            'requests': options.requests, 'concurrency': options.concurrency, 'handlers': options.handler,
+            'uncovered_routes': uncovered_routes(endpoints),
+        },
+        'endpoints': results,
+    }
+
+
+def compare(run_result, baseline, tolerance):
+    """Rows of the endpoint/handler pairs of both runs, with regressions flagged."""
+    rows = []
+    for name, result in run_result['endpoints'].items():
+        base = baseline['endpoints'].get(name)
+        if base is None:
+            continue
+        for handler in HANDLERS:
+            if handler not in result or handler not in base:
+                continue
+            change = result[handler]['p95_ms'] / base[handler]['p95_ms'] - 1 if base[handler]['p95_ms'] else 0
+            regression = change > tolerance or result['queries'] > base['queries'] or \
+                result[handler]['errors'] > base[handler]['errors']
+            rows.append({'endpoint': name, 'handler': handler, 'p95 base': base[handler]['p95_ms'],
+                         'p95 now': result[handler]['p95_ms'], 'change': '{:+.0%}'.format(change),
+                         'queries': '{} -> {}'.format(base['queries'], result['queries']),
+                         'regression': 'REGRESSION' if regression else ''})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint and handler.')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--query-samples', type=int, default=3, help='Sequential requests to count queries over.')
+    parser.add_argument('--handler', choices=HANDLERS, action='append', help='Handlers to load, both by default.')
+    parser.add_argument('--endpoint', action='append', help='Only endpoints whose name contains this.')
+    parser.add_argument('--departments', type=int, default=10)
+    parser.add_argument('--employees', type=int, default=200)
+    parser.add_argument('--projects', type=int, default=50)
+    parser.add_argument('--tasks', type=int, default=5000)
+    parser.add_argument('--output', help='Write the JSON results to this file instead of stdout.')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against.')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95 latency increase.')
+    options = parser.parse_args()
+    options.handler = options.handler or list(HANDLERS)
+
+    setup_django()
+    with tempfile.TemporaryDirectory() as directory, test_database(name=os.path.join(directory, 'load.sqlite3')):
+        result = run(options)
+
+    if result['meta']['uncovered_routes']:
+        print('Routes not loaded: {}'.format(', '.join(result['meta']['uncovered_routes'])), file=sys.stderr)
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(result, output, indent=2)
+    else:
+        json.dump(result, sys.stdout, indent=2)
+    if options.baseline:
+        with open(options.baseline) as baseline_file:
+            rows = compare(result, json.load(baseline_file), options.tolerance)
+        print_table(rows, ('endpoint', 'handler', 'p95 base', 'p95 now', 'change', 'queries', 'regression'))
+        if any(row['regression'] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Render/parse time of the stock DRF JSON classes against the orjson and
+MessagePack ones on payloads shaped like the /task/ and /project/ responses.
+
+    cd django_rest && python -m benchmarks.renderers --number 2000
+"""
+import argparse
+import timeit
+from datetime import date, timedelta
+from io import BytesIO
+
+from benchmarks.utils import setup_django, print_table
+
+
+def task_page(size):
+    from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+    start = date(2020, 1, 1)
+    results = ReturnList([
+        ReturnDict([('id', pk), ('executor', pk % 50 or None), ('name', 'Task number {}'.format(pk)),
+                    ('project', pk % 20 + 1), ('start_date', str(start + timedelta(days=pk % 300))),
+                    ('end_date', str(start + timedelta(days=pk % 300 + 30))), ('status', 'started')],
+                   serializer=None)
+        for pk in range(1, size + 1)
+    ], serializer=None)
+    return {'next': 'http://testserver/task/?cursor=eyJwIjogWzEwXSwgInIiOiAwfQ==', 'previous': None,
+            'results': results}
+
+
+def project_detail():
+    from rest_framework.utils.serializer_helpers import ReturnDict
+
+    return ReturnDict([('id', 7), ('project_manager', 3), ('name', 'Roll cages'),
+                       ('start_date', '2020-04-30'), ('end_date', '2020-05-31')], serializer=None)
+
+
+def run(number):
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from django_rest.parsers import ORJSONParser, MessagePackParser
+    from django_rest.renderers import ORJSONRenderer, MessagePackRenderer
+
+    payloads = {'project detail': project_detail(), 'task page (10)': task_page(10),
+                'task page (100)': task_page(100)}
+    pairs = ((JSONRenderer, JSONParser), (ORJSONRenderer, ORJSONParser), (MessagePackRenderer, MessagePackParser))
+    rows = []
+    for payload_name, payload in payloads.items():
+        expected = JSONRenderer().render(payload)
+        for renderer_class, parser_class in pairs:
+            renderer, parser = renderer_class(), parser_class()
+            content = renderer.render(payload)
+            if renderer_class is ORJSONRenderer:
+                assert content == expected, 'orjson output differs from JSONRenderer'
+            render = timeit.timeit(lambda: renderer.render(payload), number=number)
+            parse = timeit.timeit(lambda: parser.parse(BytesIO(content)), number=number)
+            rows.append({'payload': payload_name, 'classes': renderer_class.__name__, 'bytes': len(content),
+                         'render us': round(render * 1e6 / number, 2), 'parse us': round(parse * 1e6 / number, 2)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=2000, help='Iterations per measurement.')
+    args = parser.parse_args()
+
+    setup_django()
+    print_table(run(args.number), ('payload', 'classes', 'bytes', 'render us', 'parse us'))
+
+
+if __name__ == '__main__':
+    main()
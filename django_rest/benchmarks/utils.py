@@ -0,0 +1,44 @@
+import os
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+    django.setup()
+
+
+@contextmanager
+def test_database(verbosity=0, name=None):
+    """
+    Run the block against a freshly created test database, in memory for SQLite
+    unless `name` gives a file (needed for concurrent writers).
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    if name is not None:
+        connection.settings_dict['TEST']['NAME'] = name
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=verbosity, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity)
+        teardown_test_environment()
+
+
+@contextmanager
+def timer(result, key='seconds'):
+    start = time.perf_counter()
+    yield
+    result[key] = time.perf_counter() - start
+
+
+def print_table(rows, columns):
+    widths = [max(len(str(column)), *(len(str(row[column])) for row in rows)) for column in columns]
+    print('  '.join(str(column).ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(str(row[column]).ljust(width) for column, width in zip(columns, widths)))
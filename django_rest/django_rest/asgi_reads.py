@@ -0,0 +1,51 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections
+from django.urls import Resolver404, resolve
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+class ReadPathASGIHandler(ASGIHandler):
+    """
+    `ASGIHandler` that serves GET/HEAD requests of the `ASGI_READS['URL_NAMES']`
+    views concurrently on its own thread pool.
+
+    The stock handler runs every request through `sync_to_async(get_response)`,
+    which asgiref pins to one shared thread, so concurrent requests are served
+    one at a time. Reads of these views keep no thread-bound state besides the
+    database connection, which each pool thread opens for itself. Writes and
+    all other views keep the stock, thread-sensitive path.
+    """
+
+    def __init__(self, url_names=None, max_threads=None):
+        super().__init__()
+        conf = getattr(settings, 'ASGI_READS', {})
+        self.url_names = frozenset(url_names if url_names is not None else conf.get('URL_NAMES', ()))
+        self.executor = ThreadPoolExecutor(max_workers=max_threads or conf.get('MAX_THREADS'),
+                                           thread_name_prefix='asgi-read')
+
+    def is_read_request(self, request):
+        if request.method not in READ_METHODS:
+            return False
+        try:
+            return resolve(request.path_info).url_name in self.url_names
+        except Resolver404:
+            return False
+
+    def get_read_response(self, request):
+        # request_started/finished close connections on the shared thread only.
+        close_old_connections()
+        try:
+            return super().get_response(request)
+        finally:
+            close_old_connections()
+
+    async def get_response(self, request):
+        if self.is_read_request(request):
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self.get_read_response, request)
+        return await sync_to_async(super().get_response)(request)
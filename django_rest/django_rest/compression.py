@@ -0,0 +1,155 @@
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django_rest.timing import timed_phase
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class GzipCompressor:
+    def __init__(self, level):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    def __init__(self, level):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+# Content-Encoding -> compressor, for the codecs installed here.
+compressors = {'gzip': GzipCompressor}
+if brotli is not None:
+    compressors['br'] = BrotliCompressor
+if zstandard is not None:
+    compressors['zstd'] = ZstdCompressor
+
+
+def compress(encoding, level, data):
+    compressor = compressors[encoding](level)
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_sequence(encoding, level, chunks):
+    """Compress `chunks` as they come, each one flushed so the client gets it without waiting for the rest."""
+    compressor = compressors[encoding](level)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def parse_accept_encoding(header):
+    """`{coding: q}` of an Accept-Encoding header."""
+    accepted = {}
+    for item in header.split(','):
+        coding, *params = (part.strip() for part in item.split(';'))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            accepted[coding.lower()] = quality
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with the best encoding the client accepts: the
+    highest q, ties going to the first of `COMPRESSION['ENCODINGS']` that is
+    installed (gzip always is, br needs `brotli`, zstd needs `zstandard`).
+
+    Only the content types of `COMPRESSION['LEVELS']` are compressed, at the
+    level given there per encoding. Bodies under `MIN_SIZE` bytes, and bodies
+    that would not get smaller, go out as they are. Streaming responses are
+    compressed chunk by chunk as they are sent. Like Django's GZipMiddleware,
+    a strong ETag becomes weak, the compressed body is not the same bytes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        conf = getattr(settings, 'COMPRESSION', {})
+        self.min_size = conf.get('MIN_SIZE', 1024)
+        self.encodings = [encoding for encoding in conf.get('ENCODINGS', ('gzip',)) if encoding in compressors]
+        self.levels = conf.get('LEVELS', {})
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        levels = self.levels.get(response.get('Content-Type', '').split(';')[0].strip().lower())
+        if levels is None or response.has_header('Content-Encoding'):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        encoding = self.negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), levels)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_sequence(encoding, levels[encoding], response.streaming_content)
+            del response['Content-Length']
+        else:
+            with timed_phase('compress'):
+                content = compress(encoding, levels[encoding], response.content)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def negotiate(self, header, levels):
+        accepted = parse_accept_encoding(header)
+        candidates = [(accepted.get(encoding, accepted.get('*', 0)), -index, encoding)
+                      for index, encoding in enumerate(self.encodings) if encoding in levels]
+        quality, _, encoding = max(candidates, default=(0, 0, None))
+        return encoding if quality > 0 else None
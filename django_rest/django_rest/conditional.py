@@ -0,0 +1,122 @@
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+from django_rest.db_router import reading_from_replica
+from django_rest.models import VERSION_FIELDS
+from django_rest.response_cache import response_cache
+from django_rest.sparse_fields import ExpandViewMixin
+from django_rest.timing import timed_phase
+
+
+def has_conditional_headers(request):
+    return 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+
+
+def version_etag(version, updated_at):
+    return '"{}-{}"'.format(version, int(updated_at.timestamp() * 1000000))
+
+
+def set_version_headers(response, version, updated_at):
+    response['ETag'] = version_etag(version, updated_at)
+    response['Last-Modified'] = http_date(updated_at.timestamp())
+    return response
+
+
+def not_modified_response(request, version, updated_at):
+    """The 304 (or 412) answer to the request's conditional headers, None if the full response is needed."""
+    response = get_conditional_response(request, etag=version_etag(version, updated_at),
+                                        last_modified=int(updated_at.timestamp()))
+    if response is not None:
+        set_version_headers(response, version, updated_at)
+    return response
+
+
+class ConditionalRetrieveMixin(ExpandViewMixin):
+    """
+    Strong ETag and Last-Modified on GET of a `VersionedModel`. Conditional
+    requests are answered from a primary key lookup of `version`/`updated_at`
+    first, so a 304 never loads or serializes the object.
+
+    When the serializer has a values reader (see `ValuesReadMixin`) and no
+    permission checks the object itself, the object is read with
+    `.values_list()` instead of being loaded as a model instance. Either way
+    only the columns of the `?fields=` selected are read.
+
+    An `?expand=`ed representation also depends on the related objects, whose
+    versions the ETag does not cover: it is served without validators.
+    """
+
+    def get_lookup_queryset(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+
+    def get_version(self):
+        return self.get_lookup_queryset().values_list(*VERSION_FIELDS).first()
+
+    def get_values_reader(self):
+        if any(type(permission).has_object_permission is not BasePermission.has_object_permission
+               for permission in self.get_permissions()):
+            return None
+        get_values_reader = getattr(self.get_serializer_class(), 'get_values_reader', None)
+        return get_values_reader(self.get_field_names()) if get_values_reader else None
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.get_expand() is not None:
+            return super().retrieve(request, *args, **kwargs)
+        if has_conditional_headers(request):
+            version = self.get_version()
+            if version is not None:
+                response = not_modified_response(request, *version)
+                if response is not None:
+                    return response
+        reader = self.get_values_reader()
+        if reader is not None:
+            row = self.get_lookup_queryset().values_list(*reader.columns, *VERSION_FIELDS).first()
+            if row is None:
+                raise Http404
+            with timed_phase('serialize'):
+                data = reader.to_representation(row)
+            self.retrieved_version = row[-len(VERSION_FIELDS):]
+        else:
+            instance = self.get_object()
+            with timed_phase('serialize'):
+                data = self.get_serializer(instance).data
+            self.retrieved_version = (instance.version, instance.updated_at)
+        return set_version_headers(Response(data), *self.retrieved_version)
+
+
+class CachedRetrieveMixin(ConditionalRetrieveMixin):
+    """
+    `ConditionalRetrieveMixin` served through `response_cache`: a hit answers
+    both plain and conditional GETs without touching the database. The cache
+    holds full representations, a sparse fieldset (`?fields=`, `?exclude=`)
+    is cut from them; requests with any other query parameter bypass the
+    cache. Responses read from a replica are not stored, a lagging replica
+    could bring back a version already replaced.
+    """
+    cache_query_params = ('fields', 'exclude')
+
+    def retrieve(self, request, *args, **kwargs):
+        if set(request.query_params).difference(self.cache_query_params):
+            return super().retrieve(request, *args, **kwargs)
+        field_names = self.get_field_names()
+        model = self.get_queryset().model
+        pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        entry = response_cache.get(model, pk)
+        if entry is not None:
+            version, updated_at, data = entry
+            if field_names is not None:
+                data = {name: data[name] for name in field_names}
+            response = not_modified_response(request, version, updated_at) or \
+                set_version_headers(Response(data), version, updated_at)
+            response['X-Cache'] = 'HIT'
+            return response
+        response = super().retrieve(request, *args, **kwargs)
+        # A sparse representation cannot serve the other fieldsets.
+        if response.status_code == 200 and field_names is None and not reading_from_replica():
+            response_cache.set(model, pk, *self.retrieved_version, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
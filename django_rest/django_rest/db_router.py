@@ -0,0 +1,127 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+# Per request: whether reads may go to a replica and whether anything was written.
+_request_state = ContextVar('replica_request_state', default=None)
+
+
+class RequestState:
+
+    def __init__(self):
+        self.replica_reads = False
+        self.wrote = False
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICATION', {}).get('REPLICAS', ())
+
+
+def get_sticky_seconds():
+    return getattr(settings, 'DATABASE_REPLICATION', {}).get('STICKY_SECONDS', 5)
+
+
+def get_cache():
+    return caches[getattr(settings, 'DATABASE_REPLICATION', {}).get('CACHE_ALIAS', 'default')]
+
+
+def pin_key(user_pk):
+    return 'replica:pin:{}'.format(user_pk)
+
+
+def pin_to_primary(user_pk):
+    """Send the user's reads to the primary for `STICKY_SECONDS`, long enough for replicas to catch up."""
+    get_cache().set(pin_key(user_pk), True, timeout=get_sticky_seconds())
+
+
+def is_pinned(user_pk):
+    return get_cache().get(pin_key(user_pk)) is not None
+
+
+def reading_from_replica():
+    state = _request_state.get()
+    return bool(state is not None and state.replica_reads and get_replicas())
+
+
+@contextmanager
+def request_state():
+    state = RequestState()
+    token = _request_state.set(state)
+    try:
+        yield state
+    finally:
+        _request_state.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Writes go to the primary. Reads go to a random `DATABASE_REPLICATION['REPLICAS']`
+    alias only while a `ReplicaReadMixin` view serves a safe request of a user
+    who has not written within the last `STICKY_SECONDS`, and to the primary
+    otherwise.
+    """
+
+    def db_for_read(self, model, **hints):
+        if reading_from_replica():
+            return random.choice(get_replicas())
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        return obj1._state.db in aliases and obj2._state.db in aliases or None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary and need the same tables.
+        return True
+
+
+class ReplicaStickinessMiddleware:
+    """Pins the user to the primary after a request that wrote to the database."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with request_state() as state:
+            response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        if state.wrote and user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
+        return response
+
+
+class ReplicaReadMixin:
+    """Serves the safe requests of a view from replicas, unless the user is pinned to the primary."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        state = _request_state.get()
+        if state is None or request.method not in SAFE_METHODS:
+            return
+        state.replica_reads = not (request.user.is_authenticated and is_pinned(request.user.pk))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        state = _request_state.get()
+        if state is not None:
+            state.replica_reads = False
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def copy_sqlite_database(source=DEFAULT_DB_ALIAS, target=None):
+    """Copy a SQLite database over another with the online backup API, to run local replicas."""
+    for alias in (source, target):
+        if connections[alias].vendor != 'sqlite':
+            raise ValueError('{} is not a SQLite database'.format(alias))
+        connections[alias].ensure_connection()
+    connections[source].connection.backup(connections[target].connection)
@@ -0,0 +1,111 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction, IntegrityError
+from django_rest.models import Employee, Department
+from django_rest.serializers import EmployeeSerializer
+
+
+def init_hashing_worker():
+    # Workers started with "spawn" do not inherit the configured app registry.
+    django.setup()
+
+
+class EmployeeImporter:
+    """
+    Creates Users and Employees from `(row_number, dict)` rows in chunks.
+
+    Rows are validated with `EmployeeSerializer`. Passwords of a chunk are hashed
+    in a process pool, then the chunk is inserted with `bulk_create` in its own
+    transaction. Usernames that already exist, or repeat earlier in the import,
+    are reported as conflicts; invalid rows are reported as skipped.
+    `progress(rows)` is called with the number of rows read after every chunk.
+    """
+
+    def __init__(self, chunk_size=1000, workers=None, progress=None):
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.progress = progress
+        self.rows_read = 0
+        self.seen_usernames = set()
+        self.summary = {'created': [], 'skipped': [], 'conflicts': []}
+
+    def run(self, rows):
+        rows = iter(rows)
+        if self.workers == 1:
+            self.import_rows(rows, map)
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=init_hashing_worker) as pool:
+                self.import_rows(rows, lambda func, items: pool.map(func, items, chunksize=64))
+        return self.summary
+
+    def import_rows(self, rows, hash_map):
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            items = self.validate(chunk)
+            passwords = list(hash_map(make_password, [item['password'] for item in items]))
+            self.create(items, passwords)
+            self.rows_read += len(chunk)
+            if self.progress is not None:
+                self.progress(self.rows_read)
+
+    def validate(self, chunk):
+        items = []
+        for row_number, row in chunk:
+            serializer = EmployeeSerializer(data=row)
+            if not serializer.is_valid():
+                # The serializer rejects rows that are not objects, such as a JSON list.
+                username = row.get('username') if isinstance(row, dict) else None
+                self.summary['skipped'].append({'row': row_number, 'username': username,
+                                                'errors': serializer.errors})
+                continue
+            item = dict(serializer.validated_data, row=row_number)
+            if item['username'] in self.seen_usernames:
+                self.summary['conflicts'].append(item['username'])
+                continue
+            self.seen_usernames.add(item['username'])
+            items.append(item)
+
+        department_ids = {item['department'] for item in items if item.get('department') is not None}
+        departments = Department.objects.in_bulk(department_ids)
+        valid_items = []
+        for item in items:
+            if item.get('department') is not None and item['department'] not in departments:
+                error = 'Invalid pk "{}" - object does not exist.'.format(item['department'])
+                self.summary['skipped'].append({'row': item['row'], 'username': item['username'],
+                                                'errors': {'department': [error]}})
+            else:
+                valid_items.append(item)
+        return valid_items
+
+    def create(self, items, passwords, retry=True):
+        existing = set(User.objects.filter(username__in=[item['username'] for item in items])
+                       .values_list('username', flat=True))
+        new = [(item, password) for item, password in zip(items, passwords) if item['username'] not in existing]
+        self.summary['conflicts'].extend(item['username'] for item in items if item['username'] in existing)
+        if not new:
+            return
+        users = [User(username=item['username'], password=password, first_name=item['first_name'],
+                      last_name=item['last_name']) for item, password in new]
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                user_ids = dict(User.objects.filter(username__in=[user.username for user in users])
+                                .values_list('username', 'id'))
+                Employee.objects.bulk_create([
+                    Employee(user_id=user_ids[item['username']], birthdate=item['birthdate'],
+                             department_id=item.get('department'))
+                    for item, _ in new
+                ])
+        except IntegrityError:
+            # Someone else took one of the usernames since the check; report it as a conflict.
+            if not retry:
+                raise
+            self.create([item for item, _ in new], [password for _, password in new], retry=False)
+            return
+        self.summary['created'].extend(item['username'] for item, _ in new)
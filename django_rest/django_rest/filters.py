@@ -0,0 +1,44 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+class FieldFilterBackend(BaseFilterBackend):
+    """
+    Exact-match filtering on the model fields a view lists in `filter_fields`,
+    e.g. `?project=1&status=new`. `null` matches unset nullable relations.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        filters = {}
+        errors = {}
+        for name in getattr(view, 'filter_fields', ()):
+            value = request.query_params.get(name)
+            if value is None:
+                continue
+            field = queryset.model._meta.get_field(name)
+            if field.is_relation and field.null and value == 'null':
+                filters[name + '__isnull'] = True
+                continue
+            try:
+                value = (field.target_field if field.is_relation else field).to_python(value)
+            except DjangoValidationError as exc:
+                errors[name] = exc.messages
+                continue
+            if field.choices and value not in dict(field.choices):
+                errors[name] = ['Select one of: {}.'.format(', '.join(key for key, _ in field.choices))]
+                continue
+            filters[field.attname] = value
+        if errors:
+            raise ValidationError(errors)
+        return queryset.filter(**filters)
+
+    def get_schema_fields(self, view):
+        try:
+            import coreapi
+            import coreschema
+        except ImportError:
+            return []
+        return [coreapi.Field(name=name, required=False, location='query',
+                              schema=coreschema.String(title=name.replace('_', ' ').capitalize()))
+                for name in getattr(view, 'filter_fields', ())]
@@ -0,0 +1,252 @@
+import json
+import logging
+import os
+import socket
+import tempfile
+import time
+import traceback
+from datetime import timedelta
+from uuid import uuid4
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction, DEFAULT_DB_ALIAS
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.response import Response
+from django_rest.employee_import import EmployeeImporter
+from django_rest.metrics import JOBS, JOB_DURATION
+from django_rest.models import Job, rebuild_project_stats
+from django_rest.serializers import JobSerializer
+
+logger = logging.getLogger('django_rest.jobs')
+
+# Job name -> function(run, **payload), see `job`.
+registry = {}
+
+
+def get_conf(name):
+    return getattr(settings, 'JOB_QUEUE', {})[name]
+
+
+def job(name, priority=0, cleanup=None):
+    """
+    Register `func(run, **payload)` as the job `name`; its return value, JSON
+    encoded, is the job result. `cleanup(**payload)` is called once the job
+    will not run again, to remove what was staged for it.
+    """
+    def decorator(func):
+        func.job_priority = priority
+        func.job_cleanup = cleanup
+        registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, priority=None, max_attempts=None, user=None, using=DEFAULT_DB_ALIAS):
+    """Queue the job `name`; it runs once the current transaction, if any, commits."""
+    if name not in registry:
+        raise KeyError('Unknown job {!r}'.format(name))
+    return Job.objects.using(using).create(
+        name=name, payload=json.dumps(payload or {}),
+        priority=registry[name].job_priority if priority is None else priority,
+        max_attempts=max_attempts or get_conf('MAX_ATTEMPTS'),
+        created_by=user if user is not None and user.is_authenticated else None)
+
+
+def stage_rows(rows):
+    """
+    Write `rows` to a new file of `JOB_QUEUE['STAGING_DIR']` as they are read,
+    one JSON document per line, and return its path and the number of rows.
+    Only the owner can read the file; see `remove_staged`.
+    """
+    directory = get_conf('STAGING_DIR')
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix='rows-', suffix='.ndjson', dir=directory)
+    count = 0
+    try:
+        with open(fd, 'w', encoding='utf-8') as staged:
+            for count, row in enumerate(rows, 1):
+                staged.write(json.dumps(row) + '\n')
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, count
+
+
+def remove_staged(path, **payload):
+    """Cleanup of the jobs whose payload names a file written by `stage_rows`."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def prefers_async(request):
+    """The client asked for a 202 and a job rather than waiting (RFC 7240 `Prefer: respond-async`)."""
+    return 'respond-async' in request.META.get('HTTP_PREFER', '')
+
+
+def job_accepted_response(job):
+    return Response(JobSerializer(job).data, status=202, headers={'Location': reverse('job', args=(job.pk,))})
+
+
+class AsyncDestroyMixin:
+    """DELETE with `Prefer: respond-async` runs the (cascading) delete in a job and answers 202."""
+
+    def destroy(self, request, *args, **kwargs):
+        if not prefers_async(request):
+            return super().destroy(request, *args, **kwargs)
+        instance = self.get_object()
+        return job_accepted_response(enqueue(
+            'delete', {'model': instance._meta.label, 'pk': instance.pk}, user=request.user))
+
+
+class LeaseLost(Exception):
+    """The job was requeued after the lease expired, another worker may be running it."""
+
+
+class JobRun:
+    """What a job function gets: the job and a way to report progress, which also renews the lease."""
+
+    def __init__(self, worker, job):
+        self.worker = worker
+        self.job = job
+
+    def progress(self, done, total=None):
+        updates = {'progress_done': done, 'leased_until': timezone.now() + self.worker.lease}
+        if total is not None:
+            updates['progress_total'] = total
+        if not self.worker.get_leased(self.job).update(**updates):
+            raise LeaseLost(self.job.pk)
+
+
+class Worker:
+    """
+    Leases queued jobs, highest priority first, and runs them one at a time.
+
+    A lease is taken with a conditional UPDATE, so any number of workers can
+    share the queue without a broker or row locks. A job whose worker died is
+    queued again once its lease expires (`LEASE_SECONDS`, renewed by every
+    progress report). Failed attempts are retried with an exponential backoff
+    until `max_attempts`.
+    """
+
+    def __init__(self, name=None, lease_seconds=None, poll_interval=None, using=DEFAULT_DB_ALIAS):
+        self.name = name or '{}:{}:{}'.format(socket.gethostname(), os.getpid(), uuid4().hex[:8])
+        self.lease = timedelta(seconds=lease_seconds or get_conf('LEASE_SECONDS'))
+        self.poll_interval = get_conf('POLL_INTERVAL') if poll_interval is None else poll_interval
+        self.using = using
+        self.stopping = False
+
+    def get_leased(self, job):
+        return Job.objects.using(self.using).filter(pk=job.pk, status='running', lease_owner=self.name)
+
+    def requeue_expired(self):
+        now = timezone.now()
+        expired = Job.objects.using(self.using).filter(status='running', leased_until__lt=now)
+        for job in expired.filter(attempts__gte=F('max_attempts')):
+            # Only the worker whose UPDATE matches cleans up.
+            if expired.filter(pk=job.pk).update(status='failed', error='Lease expired', payload='{}',
+                                                leased_until=None, finished_at=now):
+                self.cleanup(job)
+        expired.update(status='queued', error='Lease expired', lease_owner='', leased_until=None)
+
+    def lease_next(self):
+        self.requeue_expired()
+        now = timezone.now()
+        queued = Job.objects.using(self.using).filter(status='queued', run_after__lte=now)
+        for pk in queued.order_by('-priority', 'run_after', 'id').values_list('pk', flat=True)[:10]:
+            # Another worker may lease the same job in between, only one UPDATE matches.
+            if queued.filter(pk=pk).update(status='running', lease_owner=self.name, leased_until=now + self.lease,
+                                           attempts=F('attempts') + 1, started_at=now):
+                return Job.objects.using(self.using).get(pk=pk)
+        return None
+
+    def run_job(self, job):
+        start = time.perf_counter()
+        func = registry.get(job.name)
+        try:
+            if func is None:
+                raise KeyError('Unknown job {!r}'.format(job.name))
+            result = func(JobRun(self, job), **json.loads(job.payload))
+        except LeaseLost:
+            outcome = 'lease_lost'
+            logger.warning('Lost the lease of job %s', job)
+        except Exception:
+            logger.exception('Job %s failed', job)
+            outcome = self.fail(job, traceback.format_exc())
+        else:
+            outcome = 'succeeded'
+            self.finish(job, 'succeeded', result=json.dumps(result))
+        JOBS.labels(job.name, outcome).inc()
+        JOB_DURATION.labels(job.name).observe(time.perf_counter() - start)
+        return outcome
+
+    def fail(self, job, error):
+        now = timezone.now()
+        if job.attempts >= job.max_attempts:
+            self.finish(job, 'failed', error=error)
+            return 'failed'
+        delay = get_conf('RETRY_DELAY') * 2 ** (job.attempts - 1)
+        self.get_leased(job).update(status='queued', error=error, lease_owner='', leased_until=None,
+                                    run_after=now + timedelta(seconds=delay))
+        return 'retried'
+
+    def finish(self, job, status, **updates):
+        """Move the leased `job` to a final `status`, drop its payload and what was staged for it."""
+        if self.get_leased(job).update(status=status, payload='{}', leased_until=None, finished_at=timezone.now(),
+                                       **updates):
+            self.cleanup(job)
+
+    def cleanup(self, job):
+        cleanup = getattr(registry.get(job.name), 'job_cleanup', None)
+        if cleanup is None:
+            return
+        try:
+            cleanup(**json.loads(job.payload))
+        except Exception:
+            logger.exception('Cleanup of job %s failed', job)
+
+    def run(self, burst=False, max_jobs=None):
+        """Run jobs until stopped, or until the queue is empty with `burst`. Return the number of jobs run."""
+        count = 0
+        while not self.stopping and (max_jobs is None or count < max_jobs):
+            job = self.lease_next()
+            if job is None:
+                if burst:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            self.run_job(job)
+            count += 1
+        return count
+
+    def stop(self, *args):
+        # Signal handler: finish the current job, then return from run().
+        self.stopping = True
+
+
+@job('delete', priority=10)
+def delete_object(run, model, pk):
+    with transaction.atomic():
+        instance = apps.get_model(model).objects.filter(pk=pk).first()
+        deleted, per_model = instance.delete() if instance is not None else (0, {})
+    run.progress(1, 1)
+    return {'deleted': deleted, 'per_model': per_model}
+
+
+@job('employee_import', cleanup=remove_staged)
+def import_employees(run, path, rows):
+    """Import the `(row_number, row)` pairs staged at `path`, `rows` of them."""
+    importer = EmployeeImporter(progress=lambda done: run.progress(done, rows))
+    with open(path, encoding='utf-8') as staged:
+        return importer.run(tuple(json.loads(line)) for line in staged)
+
+
+@job('rebuild_project_stats', priority=-10)
+def rebuild_stats(run, project_ids=None):
+    counts = rebuild_project_stats(project_ids)
+    run.progress(1, 1)
+    return {'counters': len(counts)}
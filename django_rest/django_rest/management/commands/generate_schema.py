@@ -0,0 +1,13 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Generate the OpenAPI schema file served by the Swagger and ReDoc views.'
+
+    def handle(self, *args, **options):
+        schema_file = import_module(settings.ROOT_URLCONF).schema_view.schema_file
+        schema_file.generate()
+        self.stdout.write('Schema written to {}'.format(schema_file.path))
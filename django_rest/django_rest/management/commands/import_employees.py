@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django_rest.employee_import import EmployeeImporter
+from django_rest.parsers import iter_csv_rows, iter_ndjson_rows
+from rest_framework.exceptions import ParseError
+
+
+class Command(BaseCommand):
+    help = 'Import Employees from a CSV (with header) or NDJSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=('csv', 'ndjson'),
+                            help='File format, guessed from the extension by default.')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Password hashing processes, defaults to the number of CPUs.')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or ('ndjson' if options['path'].endswith(('.ndjson', '.jsonl')) else 'csv')
+        iter_rows = iter_ndjson_rows if file_format == 'ndjson' else iter_csv_rows
+        importer = EmployeeImporter(chunk_size=options['chunk_size'], workers=options['workers'])
+        with open(options['path'], 'rb') as lines:
+            try:
+                summary = importer.run(iter_rows(lines))
+            except ParseError as exc:
+                raise CommandError('{} (the rows before it are imported)'.format(exc.detail))
+        self.stdout.write(json.dumps(summary, indent=2, default=str))
+        self.stderr.write('Created: {created}, skipped: {skipped}, conflicts: {conflicts}'.format(
+            **{key: len(value) for key, value in summary.items()}))
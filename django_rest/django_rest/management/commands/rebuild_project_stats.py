@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django_rest.jobs import enqueue
+from django_rest.models import ProjectStats, count_project_stats, rebuild_project_stats
+
+
+class Command(BaseCommand):
+    help = 'Recount the per project task counters from the task table and report the rows that were off.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only compare, exit with an error when the counters are inconsistent.')
+        parser.add_argument('--enqueue', action='store_true', help='Rebuild in a job of `manage.py worker`.')
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            self.stderr.write('Queued job {}'.format(enqueue('rebuild_project_stats').pk))
+            return
+        with transaction.atomic():
+            current = {
+                (project_id, status, executor_id): count
+                for project_id, status, executor_id, count in ProjectStats.objects.exclude(count=0)
+                .values_list('project_id', 'status', 'executor_id', 'count')
+            }
+            expected = count_project_stats() if options['check'] else rebuild_project_stats()
+        mismatches = sorted(
+            ((key, current.get(key, 0), expected.get(key, 0))
+             for key in current.keys() | expected.keys() if current.get(key, 0) != expected.get(key, 0)),
+            key=lambda mismatch: (mismatch[0][0], mismatch[0][1], mismatch[0][2] or 0))
+        for (project_id, status, executor_id), found, count in mismatches:
+            self.stdout.write('project={} status={} executor={}: counted {}, expected {}'.format(
+                project_id, status, executor_id, found, count))
+        if mismatches and options['check']:
+            raise CommandError('{} inconsistent counters'.format(len(mismatches)))
+        self.stderr.write('{} counters, {} {}'.format(
+            len(expected), len(mismatches), 'inconsistent' if options['check'] else 'fixed'))
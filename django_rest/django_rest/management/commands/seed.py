@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django_rest.seed import PASSWORD, seed
+
+
+class Command(BaseCommand):
+    help = 'Generate departments, employees, projects and tasks with realistic distributions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departments', type=int, default=20)
+        parser.add_argument('--employees', type=int, default=2000)
+        parser.add_argument('--projects', type=int, default=500)
+        parser.add_argument('--tasks', type=int, default=100000)
+        parser.add_argument('--scale', type=float, default=1.0, help='Multiply every count by SCALE.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, the same seed generates the same data.')
+        parser.add_argument('--chunk-size', type=int, default=50000, help='Rows inserted per transaction.')
+        parser.add_argument('--superuser', action='store_true',
+                            help='Make the first user a superuser. Never on a shared database: the password is public.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        counts = {name: int(options[name] * options['scale'])
+                  for name in ('departments', 'employees', 'projects', 'tasks')}
+        if counts['tasks'] and not counts['projects']:
+            raise CommandError('Tasks need at least one project.')
+        start = time.perf_counter()
+        ids = seed(random_seed=options['seed'], chunk_size=options['chunk_size'], superuser=options['superuser'],
+                   using=options['database'], **counts)
+        elapsed = time.perf_counter() - start
+        rows = sum(len(value) for value in ids.values())
+        for name, value in ids.items():
+            self.stdout.write('{}: {}'.format(name, len(value)))
+        self.stderr.write('{} rows in {:.1f}s, {:.0f} rows/s. Every user\'s password is "{}".'.format(
+            rows, elapsed, rows / elapsed, PASSWORD))
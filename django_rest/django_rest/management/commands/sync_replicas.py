@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django_rest.db_router import copy_sqlite_database, get_replicas
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database over the local replicas (DJANGO_DB_REPLICAS).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Keep copying every INTERVAL seconds, which emulates a replication lag.')
+
+    def handle(self, *args, **options):
+        replicas = get_replicas()
+        if not replicas:
+            self.stderr.write('No replicas configured, set DJANGO_DB_REPLICAS.')
+            return
+        while True:
+            for alias in replicas:
+                copy_sqlite_database(target=alias)
+            self.stdout.write('Copied the primary to {}'.format(', '.join(replicas)))
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
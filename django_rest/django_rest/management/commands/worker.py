@@ -0,0 +1,24 @@
+import signal
+
+from django.core.management.base import BaseCommand
+from django_rest.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (see django_rest.jobs) until stopped with SIGTERM or SIGINT.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty.')
+        parser.add_argument('--max-jobs', type=int, default=None, help='Exit after running MAX_JOBS jobs.')
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help='Seconds between polls of an empty queue, JOB_QUEUE["POLL_INTERVAL"] by default.')
+        parser.add_argument('--lease-seconds', type=float, default=None,
+                            help='Lease of a running job, JOB_QUEUE["LEASE_SECONDS"] by default.')
+
+    def handle(self, *args, **options):
+        worker = Worker(lease_seconds=options['lease_seconds'], poll_interval=options['poll_interval'])
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, worker.stop)
+        self.stderr.write('Worker {} started'.format(worker.name))
+        count = worker.run(burst=options['burst'], max_jobs=options['max_jobs'])
+        self.stderr.write('Worker {} ran {} jobs'.format(worker.name, count))
@@ -0,0 +1,101 @@
+import os
+import time
+from contextlib import ExitStack
+from functools import wraps
+
+from django.db import connections
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, \
+    generate_latest, multiprocess
+
+# With PROMETHEUS_MULTIPROC_DIR set (before the first import of prometheus_client),
+# every worker process writes its samples to memory mapped files in that
+# directory and /metrics/ aggregates the files of all workers. The directory
+# must be emptied when the server starts, and preforking servers should call
+# `mark_process_dead(pid)` when a worker exits (gunicorn: `child_exit`).
+
+REQUESTS = Counter('http_requests_total', 'HTTP requests by URL name, method and status code.',
+                   ('url_name', 'method', 'status'))
+REQUEST_DURATION = Histogram('http_request_duration_seconds', 'HTTP request latency by URL name and method.',
+                             ('url_name', 'method'))
+REQUEST_QUERIES = Histogram('http_request_db_queries', 'Database queries per HTTP request by URL name.',
+                            ('url_name',), buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float('inf')))
+QUERY_DURATION = Histogram('db_query_duration_seconds', 'Database query latency by database alias.', ('alias',),
+                           buckets=(.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1,
+                                    float('inf')))
+RECEIVER_DURATION = Histogram('signal_receiver_duration_seconds', 'Signal receiver run time by receiver.',
+                              ('receiver',), buckets=(.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05,
+                                                      .1, .25, .5, 1, float('inf')))
+
+THROTTLED = Counter('throttled_requests_total', 'Requests refused by a throttle, by budget.', ('budget',))
+JOBS = Counter('jobs_total', 'Background jobs run by job name and outcome.', ('name', 'outcome'))
+JOB_DURATION = Histogram('job_duration_seconds', 'Background job run time by job name.', ('name',),
+                         buckets=(.01, .05, .1, .5, 1, 5, 10, 30, 60, 300, 900, float('inf')))
+
+
+def observe_receiver(receiver):
+    """Record the run time of a signal receiver in `signal_receiver_duration_seconds`."""
+    histogram = RECEIVER_DURATION.labels(receiver.__name__)
+
+    @wraps(receiver)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return receiver(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+    return wrapper
+
+
+def get_registry():
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if not path:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=path)
+    return registry
+
+
+def mark_process_dead(pid):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
+
+
+def metrics_view(request):
+    """Prometheus text exposition of the metrics of every worker process."""
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            QUERY_DURATION.labels(context['connection'].alias).observe(time.perf_counter() - start)
+            self.queries += 1
+
+
+class MetricsMiddleware:
+    """Counts requests and observes their latency and number of queries, labelled by URL name."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        resolver_match = getattr(request, 'resolver_match', None)
+        url_name = resolver_match.view_name if resolver_match is not None else '<unmatched>'
+        REQUEST_DURATION.labels(url_name, request.method).observe(time.perf_counter() - start)
+        REQUEST_QUERIES.labels(url_name).observe(counter.queries)
+        REQUESTS.labels(url_name, request.method, response.status_code).inc()
+        return response
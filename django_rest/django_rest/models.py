@@ -1,23 +1,90 @@
-from django.db import models
+from collections import Counter
+from itertools import chain
+
+from django.db import connections, models, transaction, DEFAULT_DB_ALIAS, IntegrityError
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models import F, Q, Min, Max, Count
+from django.utils import timezone
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django_rest.metrics import observe_receiver
+from django_rest.response_cache import response_cache, DELETED
+from django_rest.timing import timed
+from django_rest.user_cache import user_changed_receiver
 
 STATUS_CHOICES = (('new', 'New'),
                   ('started', 'Started'),
                   ('done', 'Done'))
 
+VERSION_FIELDS = ('version', 'updated_at')
+
+
+def touch(queryset, **values):
+    """`queryset.update()` that also bumps the version of the updated rows."""
+    return queryset.update(version=F('version') + 1, updated_at=timezone.now(), **values)
+
+
+def insert_rows(model, field_names, rows, using=DEFAULT_DB_ALIAS):
+    """
+    INSERT `rows`, tuples of database ready values of `field_names`, in
+    statements of as many rows as the backend accepts. The SQL is the one
+    `bulk_create()` runs, without its per value preparation.
+    """
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in field_names]
+    batch_size = max(connection.ops.bulk_batch_size(fields, rows), 1)
+
+    def get_sql(count):
+        return 'INSERT INTO {} ({}) {}'.format(
+            quote_name(model._meta.db_table), ', '.join(quote_name(field.column) for field in fields),
+            connection.ops.bulk_insert_sql(fields, [['%s'] * len(fields)] * count))
+
+    full = len(rows) - len(rows) % batch_size
+    with connection.cursor() as cursor:
+        if full:
+            cursor.executemany(get_sql(batch_size), [list(chain.from_iterable(rows[start:start + batch_size]))
+                                                     for start in range(0, full, batch_size)])
+        if full < len(rows):
+            cursor.execute(get_sql(len(rows) - full), list(chain.from_iterable(rows[full:])))
+
+
+def SET_NULL_AND_TOUCH(collector, field, sub_objs, using):
+    """`SET_NULL` that also bumps the version of the rows whose reference is cleared."""
+    models.SET_NULL(collector, field, sub_objs, using)
+    if sub_objs:
+        model = sub_objs[0]._meta
+        collector.add_field_update(model.get_field('version'), F('version') + 1, sub_objs)
+        collector.add_field_update(model.get_field('updated_at'), timezone.now(), sub_objs)
+        for obj in sub_objs:
+            response_cache.invalidate(model.model, obj.pk, obj.version + 1, using=using)
 
-class Employee(models.Model):
+
+class VersionedModel(models.Model):
+    """Bumps `version` and `updated_at` on every save; they back the ETag and Last-Modified headers."""
+    version = models.PositiveIntegerField(default=0, editable=False, verbose_name='Version')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Updated at')
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.version += 1
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | set(VERSION_FIELDS)
+        super().save(*args, **kwargs)
+
+
+class Employee(VersionedModel):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     birthdate = models.DateField(verbose_name='Birthdate')
-    department = models.ForeignKey('Department', on_delete=models.SET_NULL, null=True)
+    department = models.ForeignKey('Department', on_delete=SET_NULL_AND_TOUCH, null=True)
 
     def __str__(self):
         return self.user.username
 
 
-class Department(models.Model):
-    head_of_department = models.ForeignKey(Employee, on_delete=models.SET_NULL,
+class Department(VersionedModel):
+    head_of_department = models.ForeignKey(Employee, on_delete=SET_NULL_AND_TOUCH,
                                            related_name='head_of_department', null=True)
     name = models.CharField(max_length=256, verbose_name='Name of department', unique=True)
 
@@ -25,8 +92,8 @@ class Department(models.Model):
         return self.name
 
 
-class Project(models.Model):
-    project_manager = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True)
+class Project(VersionedModel):
+    project_manager = models.ForeignKey(Employee, on_delete=SET_NULL_AND_TOUCH, null=True)
     name = models.CharField(max_length=256, verbose_name='Project name', unique=True)
     start_date = models.DateField(verbose_name='Start date', null=True)
     end_date = models.DateField(verbose_name='End date', null=True)
@@ -35,25 +102,281 @@ class Project(models.Model):
         return self.name
 
 
-class Task(models.Model):
-    executor = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True)
+class Task(VersionedModel):
+    # The foreign keys are indexed by task_executor_status_idx and task_project_dates_idx.
+    executor = models.ForeignKey(Employee, on_delete=SET_NULL_AND_TOUCH, null=True, db_index=False)
     name = models.CharField(max_length=256, verbose_name='Task name')
     start_date = models.DateField(verbose_name='Start date', null=True)
     end_date = models.DateField(verbose_name='End date', null=True)
-    project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, db_index=False)
     status = models.CharField(max_length=32, choices=STATUS_CHOICES, verbose_name='Status')
 
+    class Meta:
+        indexes = [
+            # Keyset pagination by name
+            models.Index(fields=['name', 'id'], name='task_name_id_idx'),
+            # Project dates rollup, covers MIN(start_date)/MAX(end_date) per project
+            models.Index(fields=['project', 'start_date', 'end_date'], name='task_project_dates_idx'),
+            # Task list filtered by executor and status
+            models.Index(fields=['executor', 'status', 'id'], name='task_executor_status_idx'),
+            # Task list filtered by status
+            models.Index(fields=['status', 'id'], name='task_status_id_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the project the row was loaded with, so moving a task also
+        # refreshes the dates of the project it left.
+        instance._loaded_project_id = instance.__dict__.get('project_id')
+        instance._loaded_stats_key = get_stats_key(instance)
+        return instance
+
+
+class ProjectStats(models.Model):
+    """Number of a project's tasks per status and executor, kept up to date from task changes."""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='stats')
+    status = models.CharField(max_length=32, choices=STATUS_CHOICES, verbose_name='Status')
+    executor = models.ForeignKey(Employee, on_delete=models.CASCADE, null=True, related_name='+')
+    count = models.IntegerField(default=0, verbose_name='Number of tasks')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'status', 'executor'], name='project_stats_key'),
+            models.UniqueConstraint(fields=['project', 'status'], condition=Q(executor=None),
+                                    name='project_stats_key_no_executor'),
+        ]
+
+
+JOB_STATUS_CHOICES = (('queued', 'Queued'),
+                      ('running', 'Running'),
+                      ('succeeded', 'Succeeded'),
+                      ('failed', 'Failed'))
+
+
+class Job(models.Model):
+    """Background work leased and run by `manage.py worker`, see django_rest.jobs."""
+    name = models.CharField(max_length=64, verbose_name='Job name')
+    payload = models.TextField(default='{}', verbose_name='Arguments (JSON)')
+    status = models.CharField(max_length=16, choices=JOB_STATUS_CHOICES, default='queued', verbose_name='Status')
+    priority = models.IntegerField(default=0, verbose_name='Priority')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Attempts')
+    max_attempts = models.PositiveIntegerField(default=3, verbose_name='Max attempts')
+    run_after = models.DateTimeField(default=timezone.now, verbose_name='Not run before')
+    lease_owner = models.CharField(max_length=128, blank=True, verbose_name='Worker')
+    leased_until = models.DateTimeField(null=True, verbose_name='Leased until')
+    progress_done = models.PositiveIntegerField(default=0, verbose_name='Progress')
+    progress_total = models.PositiveIntegerField(null=True, verbose_name='Progress total')
+    result = models.TextField(null=True, verbose_name='Result (JSON)')
+    error = models.TextField(blank=True, verbose_name='Last error')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Created at')
+    started_at = models.DateTimeField(null=True, verbose_name='Started at')
+    finished_at = models.DateTimeField(null=True, verbose_name='Finished at')
+
+    class Meta:
+        indexes = [
+            # Next job to lease: highest priority, then the oldest
+            models.Index(fields=['status', '-priority', 'run_after', 'id'], name='job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return '{} #{}'.format(self.name, self.pk)
+
+
+class RevokedToken(models.Model):
+    """A revoked JWT, kept until the token expires, see django_rest.revocation."""
+    jti = models.CharField(max_length=255, unique=True, verbose_name='Token id')
+    expires_at = models.DateTimeField(db_index=True, verbose_name='Token expires at')
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Revoked at')
+
+    def __str__(self):
+        return self.jti
+
+
+STATS_KEY_FIELDS = ('project_id', 'status', 'executor_id')
+
 
-def task_post_save_receiver(sender, instance, *args, **kwargs):
-    project = instance.project
-    min_start_date_task = Task.objects.filter(project=project).order_by('start_date').first()
-    max_end_date_task = Task.objects.filter(project=project).order_by('-end_date').first()
-    project.start_date = min_start_date_task.start_date
-    project.end_date = max_end_date_task.end_date
-    project.save()
+def get_stats_key(task):
+    """The `ProjectStats` row a task is counted in, None if the task was loaded without those fields."""
+    if not all(name in task.__dict__ for name in STATS_KEY_FIELDS):
+        return None
+    return tuple(task.__dict__[name] for name in STATS_KEY_FIELDS)
+
+
+@timed('rollup')
+def update_project_stats(deltas, using=DEFAULT_DB_ALIAS):
+    """Add `{(project_id, status, executor_id): delta}` to the `ProjectStats` counters."""
+    for (project_id, status, executor_id), delta in deltas.items():
+        if not delta:
+            continue
+        rows = ProjectStats.objects.using(using).filter(project_id=project_id, status=status, executor_id=executor_id)
+        if rows.update(count=F('count') + delta) or delta < 0:
+            continue
+        try:
+            with transaction.atomic(using=using):
+                ProjectStats.objects.using(using).create(
+                    project_id=project_id, status=status, executor_id=executor_id, count=delta)
+        except IntegrityError:
+            # Inserted concurrently.
+            rows.update(count=F('count') + delta)
+
+
+def count_project_stats(project_ids=None, using=DEFAULT_DB_ALIAS):
+    """`{(project_id, status, executor_id): count}` counted from the task table."""
+    tasks = Task.objects.using(using).order_by()
+    if project_ids is not None:
+        tasks = tasks.filter(project_id__in=project_ids)
+    return {
+        (project_id, status, executor_id): count
+        for project_id, status, executor_id, count in tasks.values_list(*STATS_KEY_FIELDS).annotate(count=Count('id'))
+    }
+
+
+@timed('rollup')
+def rebuild_project_stats(project_ids=None, using=DEFAULT_DB_ALIAS):
+    """Recount `ProjectStats` of the given projects (all of them by default) from the task table."""
+    with transaction.atomic(using=using):
+        stats = ProjectStats.objects.using(using)
+        if project_ids is not None:
+            stats = stats.filter(project_id__in=project_ids)
+        stats.delete()
+        counts = count_project_stats(project_ids, using=using)
+        insert_rows(ProjectStats, ('project', 'status', 'executor', 'count'),
+                    [key + (count,) for key, count in counts.items()], using=using)
+    return counts
+
+
+class ProjectDatesRollup:
+    """Projects touched by task changes in one transaction, recomputed once on commit."""
+
+    def __init__(self, using):
+        self.using = using
+        self.project_ids = set()
+
+    def __call__(self):
+        recompute_project_dates(self.project_ids, using=self.using)
+
+
+@timed('rollup')
+def recompute_project_dates(project_ids, using=DEFAULT_DB_ALIAS):
+    project_ids = set(project_ids)
+    if not project_ids:
+        return
+    dates = {
+        row['project_id']: (row['min_start_date'], row['max_end_date'])
+        for row in Task.objects.using(using).filter(project_id__in=project_ids).order_by()
+        .values('project_id').annotate(min_start_date=Min('start_date'), max_end_date=Max('end_date'))
+    }
+    current = Project.objects.using(using).filter(pk__in=project_ids).values_list(
+        'id', 'start_date', 'end_date', 'version')
+    for project_id, start_date, end_date, version in current:
+        new_start_date, new_end_date = dates.get(project_id, (None, None))
+        if (start_date, end_date) != (new_start_date, new_end_date):
+            touch(Project.objects.using(using).filter(pk=project_id),
+                  start_date=new_start_date, end_date=new_end_date)
+            response_cache.invalidate(Project, project_id, version + 1, using=using)
+
+
+def schedule_project_dates_rollup(project_ids, using=DEFAULT_DB_ALIAS):
+    project_ids = {project_id for project_id in project_ids if project_id is not None}
+    if not project_ids:
+        return
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        recompute_project_dates(project_ids, using=using)
+        return
+    rollup = getattr(connection, 'project_dates_rollup', None)
+    # Callbacks are dropped when the transaction (or the savepoint they were
+    # registered in) rolls back, so only reuse a rollup that is still pending.
+    if rollup is None or not any(func is rollup for _, func in connection.run_on_commit):
+        rollup = connection.project_dates_rollup = ProjectDatesRollup(using)
+        transaction.on_commit(rollup, using=using)
+    rollup.project_ids.update(project_ids)
+
+
+@observe_receiver
+def task_post_save_receiver(sender, instance, update_fields=None, using=DEFAULT_DB_ALIAS, **kwargs):
+    if update_fields is not None and not {'start_date', 'end_date', 'project'} & set(update_fields):
+        return
+    schedule_project_dates_rollup(
+        (instance.project_id, getattr(instance, '_loaded_project_id', None)), using=using)
+    instance._loaded_project_id = instance.project_id
+
+
+@observe_receiver
+def task_post_delete_receiver(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    schedule_project_dates_rollup((instance.project_id,), using=using)
+
+
+@observe_receiver
+def task_stats_post_save_receiver(sender, instance, created=False, update_fields=None, using=DEFAULT_DB_ALIAS,
+                                  **kwargs):
+    if update_fields is not None and not {'project', 'status', 'executor'} & set(update_fields):
+        return
+    old_key, new_key = getattr(instance, '_loaded_stats_key', None), get_stats_key(instance)
+    if created:
+        update_project_stats({new_key: 1}, using=using)
+    elif old_key is None or new_key is None:
+        # Saved without knowing what the row held before, recount.
+        project_ids = {instance.project_id, getattr(instance, '_loaded_project_id', None)} - {None}
+        rebuild_project_stats(project_ids, using=using)
+    elif old_key != new_key:
+        update_project_stats({old_key: -1, new_key: 1}, using=using)
+    instance._loaded_stats_key = get_stats_key(instance)
+
+
+@observe_receiver
+def task_stats_post_delete_receiver(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    key = getattr(instance, '_loaded_stats_key', None) or get_stats_key(instance)
+    if key is not None:
+        update_project_stats({key: -1}, using=using)
+    else:
+        rebuild_project_stats({instance.project_id}, using=using)
+
+
+@observe_receiver
+def employee_stats_pre_delete_receiver(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    # The employee's tasks are left without an executor (without task signals), move their counts along.
+    stats = ProjectStats.objects.using(using).filter(executor_id=instance.pk)
+    deltas = Counter()
+    for project_id, status, count in stats.values_list('project_id', 'status', 'count'):
+        deltas[project_id, status, None] += count
+    stats.delete()
+    update_project_stats(deltas, using=using)
+
+
+@observe_receiver
+def response_cache_post_save_receiver(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    response_cache.invalidate(sender, instance.pk, instance.version, using=using)
+
+
+@observe_receiver
+def response_cache_post_delete_receiver(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    response_cache.invalidate(sender, instance.pk, DELETED, using=using)
 
 
 post_save.connect(task_post_save_receiver, sender=Task)
+post_delete.connect(task_post_delete_receiver, sender=Task)
+post_save.connect(task_stats_post_save_receiver, sender=Task)
+post_delete.connect(task_stats_post_delete_receiver, sender=Task)
+pre_delete.connect(employee_stats_pre_delete_receiver, sender=Employee)
+
+
+@observe_receiver
+def user_post_save_receiver(sender, instance, created=False, update_fields=None, **kwargs):
+    # The employee representation includes these user fields.
+    if created or update_fields is not None and not {'username', 'first_name', 'last_name'} & set(update_fields):
+        return
+    touch(Employee.objects.filter(user_id=instance.pk))
+
+
+for model in (Project, Task):
+    post_save.connect(response_cache_post_save_receiver, sender=model)
+    post_delete.connect(response_cache_post_delete_receiver, sender=model)
+post_save.connect(user_post_save_receiver, sender=User)
+post_save.connect(user_changed_receiver, sender=User)
+post_delete.connect(user_changed_receiver, sender=User)
@@ -0,0 +1,134 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over the full `(ordering..., id)` key.
+
+    Unlike `CursorPagination`, the cursor stores the values of every ordering
+    field plus the id, so each page is a single `WHERE key > position LIMIT n`
+    range scan: no COUNT and no OFFSET, however deep the page is.
+
+    Views declare the default `ordering` and the `ordering_fields` clients may
+    pick with `?ordering=`; these must be non-null and covered by an index
+    together with `id`.
+    """
+    ordering = 'id'
+    ordering_param = 'ordering'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor['r'])
+        fields = [(field.lstrip('-'), field.startswith('-') != reverse) for field in self.ordering]
+
+        if self.cursor is not None:
+            self.cursor['p'] = self.decode_position(queryset.model, fields, self.cursor['p'])
+            queryset = queryset.filter(self.position_filter(fields, self.cursor['p']))
+        queryset = queryset.order_by(*('-' + name if descending else name for name, descending in fields))
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        attnames = [queryset.model._meta.get_field(name).attname for name, _ in fields]
+        if self.page:
+            positions = [[getattr(instance, attname) for attname in attnames]
+                         for instance in (self.page[0], self.page[-1])]
+        else:
+            positions = [self.cursor and self.cursor['p']] * 2
+        self.has_next = has_more if not reverse else True
+        self.has_previous = has_more if reverse else self.cursor is not None
+        self.next_position = positions[-1]
+        self.previous_position = positions[0]
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        ordering = request.query_params.get(self.ordering_param) or getattr(view, 'ordering', self.ordering)
+        allowed = getattr(view, 'ordering_fields', ('id',))
+        if ordering.lstrip('-') not in allowed:
+            raise ValidationError({self.ordering_param: ['Ordering must be one of: {}.'.format(
+                ', '.join(field for name in allowed for field in (name, '-' + name)))]})
+        if ordering.lstrip('-') == 'id':
+            return (ordering,)
+        # The id breaks ties in the same direction, so one composite index serves both.
+        return (ordering, '-id' if ordering.startswith('-') else 'id')
+
+    @staticmethod
+    def position_filter(fields, position):
+        """`(f1, f2, ...) > (v1, v2, ...)` in the given directions, written out for any backend."""
+        conditions = []
+        for index, (name, descending) in enumerate(fields):
+            equal = {field_name: value for (field_name, _), value in zip(fields[:index], position)}
+            lookup = '{}__{}'.format(name, 'lt' if descending else 'gt')
+            conditions.append(Q(**equal, **{lookup: position[index]}))
+        return reduce(or_, conditions)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            if not isinstance(cursor['p'], list) or len(cursor['p']) != len(self.ordering):
+                raise ValueError
+            cursor['r'] = bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def decode_position(self, model, fields, values):
+        """The cursor's position as values of the ordering fields, which the client may have tampered with."""
+        try:
+            position = [model._meta.get_field(name).to_python(value) for (name, _), value in zip(fields, values)]
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if any(value is None for value in position):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, cursor):
+        encoded = urlsafe_b64encode(json.dumps(cursor, cls=DjangoJSONEncoder).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor({'p': self.next_position, 'r': 0})
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor({'p': self.previous_position, 'r': 1})
+
+    def get_schema_fields(self, view):
+        fields = super().get_schema_fields(view)
+        try:
+            import coreapi
+            import coreschema
+        except ImportError:
+            return fields
+        return fields + [coreapi.Field(
+            name=self.ordering_param, required=False, location='query',
+            schema=coreschema.String(
+                title='Ordering',
+                description='One of {}, prefix with "-" for descending order.'.format(
+                    ', '.join(getattr(view, 'ordering_fields', ('id',))))))]
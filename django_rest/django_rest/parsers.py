@@ -0,0 +1,82 @@
+import codecs
+import csv
+import json
+
+import msgpack
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from django_rest.renderers import ORJSONRenderer, MessagePackRenderer
+
+
+def iter_csv_rows(lines, encoding='utf-8'):
+    """Yield `(row_number, dict)` from an iterable of encoded CSV lines with a header row."""
+    reader = csv.DictReader(codecs.iterdecode(lines, encoding))
+    row_number = 0
+    while True:
+        row_number += 1
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise ParseError('Row {} is not valid CSV: {}'.format(row_number, exc))
+        yield row_number, {key: value for key, value in row.items() if key is not None and value != ''}
+
+
+def iter_ndjson_rows(lines, encoding='utf-8'):
+    """Yield `(row_number, dict)` from an iterable of encoded JSON lines, skipping blank ones."""
+    for row_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line.decode(encoding))
+        except ValueError as exc:
+            raise ParseError('Line {} is not valid JSON: {}'.format(row_number, exc))
+        yield row_number, row
+
+
+class CSVStreamParser(BaseParser):
+    """Parses a CSV body lazily; `request.data` is an iterator of rows."""
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        return iter_csv_rows(stream, encoding)
+
+
+class NDJSONStreamParser(BaseParser):
+    """Parses a newline delimited JSON body lazily; `request.data` is an iterator of rows."""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        return iter_ndjson_rows(stream, encoding)
+
+
+class ORJSONParser(JSONParser):
+    """`JSONParser` backed by orjson, which always rejects NaN and Infinity."""
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            data = stream.read()
+            if encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+                data = data.decode(encoding)
+            return orjson.loads(data)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError) as exc:
+            raise ParseError('MessagePack parse error - %s' % str(exc))
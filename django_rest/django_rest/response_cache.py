@@ -0,0 +1,92 @@
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction, DEFAULT_DB_ALIAS
+
+
+# Pointer of deleted objects, no version is ever stored under it.
+DELETED = -1
+
+
+class ResponseCache:
+    """
+    Serialized detail representations in the Django cache, keyed by model, pk and version.
+
+    `{model}:{pk}` points at the current version and `{model}:{pk}:{version}`
+    holds that version's data. Every change moves the pointer to the version
+    it wrote (`DELETED` for deletes), again on commit; the pointer is never
+    dropped. Readers only ever store data under the version they loaded and
+    only add the pointer when there is none, so a slow reader cannot bring
+    back a version replaced, or an object deleted, meanwhile.
+
+    The pointers only protect readers that share the cache with the writers:
+    on a per-process cache (`LocMemCache`) the changes made by the other
+    workers would never move them, and their stale responses would be hits
+    until `timeout`. The cache is then off unless `allow_local` says the
+    server runs a single process.
+    """
+
+    def __init__(self, cache_alias='default', timeout=300, key_prefix='response', allow_local=False):
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self.allow_local = allow_local
+        self.key_prefix = key_prefix
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        conf = getattr(settings, 'RESPONSE_CACHE', {})
+        return cls(cache_alias=conf.get('CACHE_ALIAS', 'default'), timeout=conf.get('TIMEOUT', 300),
+                   allow_local=conf.get('ALLOW_LOCAL', False))
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    @property
+    def enabled(self):
+        return self.allow_local or not isinstance(self.cache, LocMemCache)
+
+    def key(self, model, pk, version=None):
+        key = '{}:{}:{}'.format(self.key_prefix, model._meta.label_lower, pk)
+        return key if version is None else '{}:{}'.format(key, version)
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def get(self, model, pk):
+        """`(version, updated_at, data)` of the current version, or None."""
+        if not self.enabled:
+            return None
+        version = self.cache.get(self.key(model, pk))
+        entry = self.cache.get(self.key(model, pk, version)) if version is not None else None
+        self.count('hits' if entry is not None else 'misses')
+        return entry
+
+    def set(self, model, pk, version, updated_at, data):
+        if not self.enabled:
+            return
+        self.cache.add(self.key(model, pk), version, self.timeout)
+        self.cache.set(self.key(model, pk, version), (version, updated_at, data), self.timeout)
+
+    def invalidate(self, model, pk, version, using=DEFAULT_DB_ALIAS):
+        """Point at `version`, the one the current transaction wrote."""
+        def invalidate():
+            self.cache.set(self.key(model, pk), version, self.timeout)
+        invalidate()
+        # Readers may add the pointer of the old row until the change commits.
+        transaction.on_commit(invalidate, using=using)
+
+    def get_stats(self):
+        with self.lock:
+            hits, misses = self.stats['hits'], self.stats['misses']
+        return {'hits': hits, 'misses': misses,
+                'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else None}
+
+
+response_cache = ResponseCache.from_settings()
@@ -0,0 +1,125 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from hashlib import blake2b
+from math import ceil, log
+
+from django.conf import settings
+from django.db import transaction, DEFAULT_DB_ALIAS
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from django_rest.models import RevokedToken
+
+
+class BloomFilter:
+    """Set membership with false positives at `error_rate` (up to `capacity` keys) and no false negatives."""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(64, ceil(-capacity * log(error_rate) / log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, key):
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + number * second) % self.size for number in range(self.hash_count)]
+
+    def add(self, key):
+        if key in self:
+            return
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & 1 << (position & 7) for position in self.positions(key))
+
+
+class RevocationList:
+    """
+    Revoked token ids: `RevokedToken` rows, mirrored in a Bloom filter per process.
+
+    Checking a token queries the database only when the filter matches, that
+    is for revoked tokens and `ERROR_RATE` of the others. At most every
+    `SYNC_INTERVAL` seconds the rows revoked since `SYNC_OVERLAP` seconds
+    before the last sync are added to the filter, so other processes see a
+    revocation within that delay, the revoking process at once. The overlap
+    bounds how late a row may commit after its `revoked_at`, clock skew
+    between hosts included: a row committed later than that is only seen at
+    the next rebuild. Every `REBUILD_INTERVAL` seconds,
+    or when it holds more than `CAPACITY` ids, the filter is built again from
+    the rows of unexpired tokens: that is how ids leave it. Expired rows are
+    deleted whenever a token is revoked.
+    """
+
+    def __init__(self, sync_interval=1, sync_overlap=60, rebuild_interval=3600, capacity=100000, error_rate=0.001,
+                 using=DEFAULT_DB_ALIAS):
+        self.sync_interval = sync_interval
+        self.sync_overlap = timedelta(seconds=sync_overlap)
+        self.rebuild_interval = rebuild_interval
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.using = using
+        self.lock = threading.Lock()
+        self.clear()
+
+    @classmethod
+    def from_settings(cls):
+        conf = getattr(settings, 'TOKEN_REVOCATION', {})
+        return cls(sync_interval=conf.get('SYNC_INTERVAL', 1), sync_overlap=conf.get('SYNC_OVERLAP', 60),
+                   rebuild_interval=conf.get('REBUILD_INTERVAL', 3600), capacity=conf.get('CAPACITY', 100000),
+                   error_rate=conf.get('ERROR_RATE', 0.001))
+
+    def clear(self):
+        with self.lock:
+            self.filter = None
+            self.synced_at = None
+            self.next_sync = self.next_rebuild = 0
+
+    def sync(self):
+        if time.monotonic() < self.next_sync:
+            return
+        with self.lock:
+            now = time.monotonic()
+            if now < self.next_sync:
+                return
+            if self.filter is None or now >= self.next_rebuild or self.filter.count > self.capacity:
+                self.rebuild()
+                self.next_rebuild = now + self.rebuild_interval
+            else:
+                # Rows of transactions that committed after the last sync may be older than it.
+                synced_at, self.synced_at = self.synced_at, timezone.now()
+                for jti in RevokedToken.objects.using(self.using).filter(
+                        revoked_at__gte=synced_at - self.sync_overlap).values_list('jti', flat=True):
+                    self.filter.add(jti)
+            self.next_sync = now + self.sync_interval
+
+    def rebuild(self):
+        self.synced_at = timezone.now()
+        rows = list(RevokedToken.objects.using(self.using).filter(expires_at__gt=self.synced_at).values_list(
+            'jti', flat=True))
+        # Room for as many again before the next rebuild.
+        self.capacity = max(self.capacity, 2 * len(rows))
+        bloom_filter = BloomFilter(self.capacity, self.error_rate)
+        for jti in rows:
+            bloom_filter.add(jti)
+        self.filter = bloom_filter
+
+    def is_revoked(self, jti):
+        self.sync()
+        return jti in self.filter and RevokedToken.objects.using(self.using).filter(jti=jti).exists()
+
+    def revoke(self, token):
+        """Revoke the simplejwt `token` until it expires."""
+        jti = token[api_settings.JTI_CLAIM]
+        expires_at = datetime.fromtimestamp(token['exp'], timezone.utc)
+        with transaction.atomic(using=self.using):
+            RevokedToken.objects.using(self.using).filter(expires_at__lte=timezone.now()).delete()
+            RevokedToken.objects.using(self.using).get_or_create(jti=jti, defaults={'expires_at': expires_at})
+        with self.lock:
+            if self.filter is not None:
+                self.filter.add(jti)
+
+
+revocation_list = RevocationList.from_settings()
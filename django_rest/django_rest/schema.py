@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import drf_yasg
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from drf_yasg.codecs import yaml_sane_dump
+from drf_yasg.renderers import _SpecRenderer, SwaggerYAMLRenderer
+from drf_yasg.views import get_schema_view
+
+FINGERPRINT_KEY = 'x-schema-fingerprint'
+SKIPPED_DIRS = {'tests', 'benchmarks', 'management', 'migrations', '__pycache__'}
+
+
+def source_fingerprint(root=None):
+    """Hash of drf_yasg's version and the project's sources the schema is generated from."""
+    root = root or settings.BASE_DIR
+    digest = hashlib.sha256(drf_yasg.__version__.encode())
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = sorted(name for name in dirs if name not in SKIPPED_DIRS and not name.startswith('.'))
+        for name in sorted(files):
+            if name.endswith('.py'):
+                path = os.path.join(directory, name)
+                digest.update(os.path.relpath(path, root).encode())
+                with open(path, 'rb') as source:
+                    digest.update(source.read())
+    return digest.hexdigest()
+
+
+class SchemaFile:
+    """
+    The OpenAPI document generated once into `path` and kept in memory.
+
+    The file records the `source_fingerprint()` it was generated from; a
+    process regenerates it on first use if the sources changed since, and
+    rereads it whenever another process (or `manage.py generate_schema`)
+    replaced it.
+    """
+
+    def __init__(self, path, generator_class, info):
+        self.path = path
+        self.generator_class = generator_class
+        self.info = info
+        self.lock = threading.Lock()
+        self.checked = False
+        self.mtime = None
+        self.content = {}
+        self.etag = None
+
+    def generate(self, fingerprint=None):
+        schema = self.generator_class(self.info).get_schema(request=None, public=True)
+        spec = schema.as_odict()
+        spec[FINGERPRINT_KEY] = fingerprint or source_fingerprint()
+        temp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+        with open(temp_path, 'w') as schema_file:
+            json.dump(spec, schema_file)
+        os.replace(temp_path, self.path)
+
+    def stored_fingerprint(self):
+        try:
+            with open(self.path) as schema_file:
+                return json.load(schema_file).get(FINGERPRINT_KEY)
+        except (OSError, ValueError):
+            return None
+
+    def load(self):
+        """`(content by format, etag)`, reading or regenerating the file as needed."""
+        with self.lock:
+            if not self.checked:
+                fingerprint = source_fingerprint()
+                if self.stored_fingerprint() != fingerprint:
+                    self.generate(fingerprint)
+                self.checked = True
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime != self.mtime:
+                with open(self.path, 'rb') as schema_file:
+                    content = schema_file.read()
+                self.content = {'json': content}
+                self.etag = '"{}"'.format(hashlib.sha256(content).hexdigest()[:32])
+                self.mtime = mtime
+            return self.content, self.etag
+
+    def get_content(self, file_format):
+        content, etag = self.load()
+        if file_format not in content:
+            spec = json.loads(content['json'], object_pairs_hook=OrderedDict)
+            content[file_format] = yaml_sane_dump(spec, binary=True)
+        return content[file_format], etag
+
+
+def get_precomputed_schema_view(info, path, max_age=86400, **kwargs):
+    """
+    `drf_yasg.views.get_schema_view()` whose JSON/YAML documents are served from
+    a `SchemaFile` with an ETag and long-lived caching, instead of introspecting
+    every view on each request. Only public schemas can be precomputed.
+    """
+    schema_view = get_schema_view(info, public=True, **kwargs)
+
+    class PrecomputedSchemaView(schema_view):
+        schema_file = SchemaFile(path, schema_view.generator_class, info)
+
+        def get(self, request, version='', format=None):
+            renderer = request.accepted_renderer
+            if not isinstance(renderer, _SpecRenderer):
+                return super().get(request, version, format)
+            file_format = 'yaml' if isinstance(renderer, SwaggerYAMLRenderer) else 'json'
+            content, etag = self.schema_file.get_content(file_format)
+            response = get_conditional_response(request, etag=etag) or \
+                HttpResponse(content, content_type=request.accepted_media_type)
+            response['ETag'] = etag
+            patch_cache_control(response, public=True, max_age=max_age)
+            return response
+
+    return PrecomputedSchemaView
@@ -0,0 +1,247 @@
+"""
+Synthetic departments, employees, projects and tasks at production scale.
+
+The ORM's per value preparation caps `bulk_create` at about 12k rows/s on
+SQLite, so the large tables (users, employees, tasks) are written with
+`insert_rows`, which runs the same multi-row INSERTs on plain tuples. Values
+that are not strings or integers (dates, datetimes) are prepared once per
+distinct value with the field's `get_db_prep_save`, so the rows are valid on
+any backend. During the load the secondary task indexes are dropped and built
+again at the end, foreign keys are checked once after the load (as `loaddata`
+does), and SQLite skips fsync.
+"""
+import random
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, timedelta
+from itertools import accumulate, chain, islice, repeat
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from django.db.models import Count, Max, Min, OuterRef, Subquery
+from django.utils import timezone
+from django_rest.models import Department, Employee, Project, ProjectStats, Task, insert_rows
+
+PASSWORD = 'PASSWORD'
+
+# Tasks span three years, "today" is in the last one: tasks that ended are
+# mostly done, tasks that have not started yet are new.
+START_DATE = date(2019, 1, 1)
+DAYS = 3 * 365
+TODAY = 2 * 365
+OVERDUE_RATE = 0.05
+UNASSIGNED_RATE = 0.15
+# Task durations of one to ninety days, each repeated by its weight (most tasks take one or two weeks).
+DURATIONS = tuple(chain.from_iterable(repeat(days, round(100 / (1 + abs(days - 7) / 4))) for days in range(1, 91)))
+
+
+def get_new_ids(model, last_id, using=DEFAULT_DB_ALIAS):
+    """The pks after `last_id`, as a range when they are contiguous (no need to read millions of them)."""
+    rows = model.objects.using(using).filter(pk__gt=last_id).order_by('pk')
+    bounds = rows.aggregate(first=Min('pk'), last=Max('pk'), count=Count('pk'))
+    if not bounds['count']:
+        return range(0)
+    if bounds['last'] - bounds['first'] + 1 == bounds['count']:
+        return range(bounds['first'], bounds['last'] + 1)
+    return list(rows.values_list('pk', flat=True))
+
+
+def get_last_id(model, using=DEFAULT_DB_ALIAS):
+    return model.objects.using(using).aggregate(last_id=Max('pk'))['last_id'] or 0
+
+
+def get_next_number(model, field_name, prefix, using=DEFAULT_DB_ALIAS):
+    """The number after the one of the last `prefix<number>` row; a run numbers its rows in pk order."""
+    last = model.objects.using(using).filter(**{field_name + '__startswith': prefix}).order_by('-pk').values_list(
+        field_name, flat=True).first()
+    suffix = last[len(prefix):] if last is not None else ''
+    return int(suffix) + 1 if suffix.isdigit() else 0
+
+
+def prepare(model, field_name, value, using=DEFAULT_DB_ALIAS):
+    return model._meta.get_field(field_name).get_db_prep_save(value, connections[using])
+
+
+def stats_order(item):
+    # The order of the project_stats_key index, cheaper to insert than a random order.
+    (project_id, status, executor_id), _ = item
+    return project_id, status, executor_id or 0
+
+
+def pareto_weights(rng, count, alpha=1.2):
+    """Weights of a long tail: a few items get most of the picks."""
+    return [rng.paretovariate(alpha) for _ in range(count)]
+
+
+@contextmanager
+def deferred_indexes(model, using=DEFAULT_DB_ALIAS):
+    """Drop the `Meta.indexes` of `model` for the block and build them again afterwards."""
+    # Not entered: SQLite refuses to enter the editor inside an atomic block, and
+    # add_index()/remove_index() run their statement right away without it.
+    editor = connections[using].schema_editor()
+    for index in model._meta.indexes:
+        editor.remove_index(model, index)
+    try:
+        yield
+    finally:
+        for index in model._meta.indexes:
+            editor.add_index(model, index)
+
+
+@contextmanager
+def bulk_load(table_names, using=DEFAULT_DB_ALIAS):
+    """Skip the foreign key checks (and on SQLite fsync) for the block, check the keys of `table_names` after."""
+    connection = connections[using]
+    pragmas = {}
+    # SQLite refuses to change the safety level inside a transaction.
+    if connection.vendor == 'sqlite' and not connection.in_atomic_block:
+        with connection.cursor() as cursor:
+            for pragma, value in (('synchronous', 'OFF'), ('cache_size', -256 * 1024)):
+                pragmas[pragma] = cursor.execute('PRAGMA {}'.format(pragma)).fetchone()[0]
+                cursor.execute('PRAGMA {} = {}'.format(pragma, value))
+    disabled = connection.disable_constraint_checking()
+    try:
+        yield
+        connection.check_constraints(table_names=table_names)
+    finally:
+        if disabled:
+            connection.enable_constraint_checking()
+        if pragmas:
+            with connection.cursor() as cursor:
+                for pragma, value in pragmas.items():
+                    cursor.execute('PRAGMA {} = {}'.format(pragma, value))
+
+
+def seed(departments=10, employees=200, projects=50, tasks=5000, random_seed=0, chunk_size=50000,
+         superuser=False, using=DEFAULT_DB_ALIAS):
+    """
+    Create the objects, return `{model name: pks}` (see `get_new_ids`). Every
+    user's password is `PASSWORD`; with `superuser` the first user of the run
+    is a superuser, otherwise none is staff.
+
+    Department sizes, the projects each manager runs, the tasks per project and
+    the tasks per executor follow long tail distributions; task dates fall in the
+    dates of their project and their status follows the dates. The same
+    `random_seed` produces the same data. Each chunk of `chunk_size` users,
+    employees or tasks is inserted in its own transaction.
+    """
+    rng = random.Random(random_seed)
+    now = timezone.now()
+    dates = [prepare(Task, 'start_date', START_DATE + timedelta(days=day), using) for day in range(DAYS + 100)]
+    updated_at = prepare(Task, 'updated_at', now, using)
+    tables = [model._meta.db_table for model in (User, Employee, Department, Project, Task, ProjectStats)]
+
+    with bulk_load(tables, using=using):
+        # Numbered after the rows of the previous runs (deleted ones included), names and usernames are unique.
+        user_offset = get_next_number(User, 'username', 'seed-employee-', using)
+        department_offset = get_next_number(Department, 'name', 'Seed department ', using)
+        project_offset = get_next_number(Project, 'name', 'Seed project ', using)
+        last_user_id = get_last_id(User, using)
+        password = make_password(PASSWORD)
+        date_joined = prepare(User, 'date_joined', now, using)
+        for start in range(0, employees, chunk_size):
+            with transaction.atomic(using=using):
+                insert_rows(User, ('username', 'password', 'first_name', 'last_name', 'email', 'is_staff',
+                                   'is_superuser', 'is_active', 'date_joined'), [
+                    ('seed-employee-{}'.format(number), password, 'First {}'.format(number),
+                     'Last {}'.format(number), '', superuser and number == user_offset,
+                     superuser and number == user_offset, True, date_joined)
+                    for number in range(user_offset + start, user_offset + min(start + chunk_size, employees))
+                ], using)
+        user_ids = get_new_ids(User, last_user_id, using)
+
+        last_department_id = get_last_id(Department, using)
+        Department.objects.using(using).bulk_create(
+            (Department(name='Seed department {}'.format(department_offset + number), version=1)
+             for number in range(departments)), batch_size=500)
+        department_ids = get_new_ids(Department, last_department_id, using)
+
+        last_employee_id = get_last_id(Employee, using)
+        department_cum_weights = list(accumulate(pareto_weights(rng, len(department_ids))))
+        birthdays = [prepare(Employee, 'birthdate', START_DATE - timedelta(days=day), using)
+                     for day in range(20 * 365, 65 * 365)]
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            with transaction.atomic(using=using):
+                insert_rows(Employee, ('user', 'birthdate', 'department', 'version', 'updated_at'), list(zip(
+                    chunk,
+                    (birthdays[min(max(int(rng.gauss(18 * 365, 10 * 365)), 0), len(birthdays) - 1)]
+                     for _ in chunk),
+                    rng.choices(department_ids, cum_weights=department_cum_weights, k=len(chunk))
+                    if department_ids else [None] * len(chunk),
+                    [1] * len(chunk), [updated_at] * len(chunk))), using)
+        employee_ids = get_new_ids(Employee, last_employee_id, using)
+
+        with transaction.atomic(using=using):
+            # The head of a department is one of its employees.
+            heads = dict(Employee.objects.using(using).filter(pk__gt=last_employee_id, department_id__isnull=False)
+                         .order_by('pk').values_list('department_id', 'pk'))
+            for department_id, employee_id in heads.items():
+                Department.objects.using(using).filter(pk=department_id).update(head_of_department_id=employee_id)
+
+            last_project_id = get_last_id(Project, using)
+            managers = rng.choices(employee_ids, weights=pareto_weights(rng, len(employee_ids)), k=projects) \
+                if employee_ids else [None] * projects
+            Project.objects.using(using).bulk_create(
+                (Project(name='Seed project {}'.format(project_offset + number), project_manager_id=manager_id,
+                         version=1)
+                 for number, manager_id in enumerate(managers)), batch_size=500)
+            project_ids = get_new_ids(Project, last_project_id, using)
+
+        # Every project runs for one to eighteen months of the three years and
+        # has a team, the busiest employees are in many teams.
+        project_spans = {}
+        project_teams = {}
+        employee_cum_weights = list(accumulate(pareto_weights(rng, len(employee_ids))))
+        for project_id in project_ids:
+            length = rng.randrange(30, 540)
+            project_spans[project_id] = (rng.randrange(DAYS - length), length)
+            project_teams[project_id] = rng.choices(employee_ids, cum_weights=employee_cum_weights,
+                                                    k=2 + int(rng.paretovariate(1.5) * 4)) if employee_ids else [None]
+        # Tasks per project, the remainder of the rounding goes to random projects.
+        project_weights = pareto_weights(rng, len(project_ids))
+        total_weight = sum(project_weights)
+        tasks_per_project = [int(tasks * weight / total_weight) for weight in project_weights]
+        for index in rng.choices(range(len(project_ids)), project_weights, k=tasks - sum(tasks_per_project)):
+            tasks_per_project[index] += 1
+        # Inserted project by project, which also makes building the project index cheaper.
+        task_projects_iter = chain.from_iterable(map(repeat, project_ids, tasks_per_project))
+        next_random = rng.random
+        last_task_id = get_last_id(Task, using)
+        stats = Counter()
+        with deferred_indexes(Task, using):
+            for start in range(0, tasks, chunk_size):
+                size = min(chunk_size, tasks - start)
+                task_projects = list(islice(task_projects_iter, size))
+                starts = [project_spans[project_id][0] + int(next_random() * project_spans[project_id][1])
+                          for project_id in task_projects]
+                ends = [day + duration for day, duration in
+                        zip(starts, rng.choices(DURATIONS, k=size))]
+                statuses = ['new' if day > TODAY else
+                            'started' if end >= TODAY or next_random() < OVERDUE_RATE else 'done'
+                            for day, end in zip(starts, ends)]
+                task_executors = [None if next_random() < UNASSIGNED_RATE else team[int(next_random() * len(team))]
+                                  for team in map(project_teams.__getitem__, task_projects)]
+                stats.update(zip(task_projects, statuses, task_executors))
+                with transaction.atomic(using=using):
+                    rows = list(zip(['Seed task {}'.format(number) for number in range(start, start + size)],
+                                    task_projects, task_executors, statuses, [dates[day] for day in starts],
+                                    [dates[day] for day in ends], [1] * size, [updated_at] * size))
+                    insert_rows(Task, ('name', 'project', 'executor', 'status', 'start_date', 'end_date', 'version',
+                                       'updated_at'), rows, using)
+        task_ids = get_new_ids(Task, last_task_id, using)
+
+        # Nothing sent signals, fill in what the receivers maintain: the project
+        # dates in one UPDATE rather than recompute_project_dates()'s one per
+        # project, and the counters of the new projects, which had none.
+        with transaction.atomic(using=using):
+            project_tasks = Task.objects.using(using).filter(project=OuterRef('pk')).order_by().values('project')
+            Project.objects.using(using).filter(pk__gt=last_project_id).update(
+                start_date=Subquery(project_tasks.annotate(value=Min('start_date')).values('value')),
+                end_date=Subquery(project_tasks.annotate(value=Max('end_date')).values('value')))
+            insert_rows(ProjectStats, ('project', 'status', 'executor', 'count'),
+                        [key + (count,) for key, count in sorted(stats.items(), key=stats_order)], using)
+
+    return {'department': department_ids, 'employee': employee_ids, 'project': project_ids, 'task': task_ids,
+            'user': user_ids}
@@ -1,17 +1,306 @@
+import json
+from collections import Counter
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from django_rest.models import Employee, Department, Project, Task
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer, TokenVerifySerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, UntypedToken
+from django_rest.models import Employee, Department, Project, Task, Job, schedule_project_dates_rollup, \
+    get_stats_key, update_project_stats
+from django_rest.revocation import revocation_list
+
+
+def parse_pk(data):
+    """The integer pk `data` stands for: an int or a string of digits, else None."""
+    if isinstance(data, int) and not isinstance(data, bool):
+        return data
+    if isinstance(data, str) and data.isascii() and data.isdigit():
+        return int(data)
+    return None
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves pks from objects the root list serializer fetched up front, if any."""
+
+    def to_internal_value(self, data):
+        prefetched = getattr(self.root, 'prefetched_objects', {}).get(self.field_name)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        pk = parse_pk(data)
+        if pk is None:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return prefetched[pk]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class SparseFieldsMixin:
+    """
+    Sparse fieldsets: `?fields=id,name` keeps only the listed fields of the
+    representation and `?exclude=name` drops the listed ones. Views resolve
+    the parameters with `get_sparse_field_names()`, which rejects unknown fields
+    and an empty selection, and pass the result as the `field_names` argument.
+    """
+
+    def __init__(self, *args, field_names=None, **kwargs):
+        self.field_names = field_names
+        super().__init__(*args, **kwargs)
+
+    @property
+    def _readable_fields(self):
+        for field in super()._readable_fields:
+            if self.field_names is None or field.field_name in self.field_names:
+                yield field
+
+    @classmethod
+    def get_readable_field_names(cls):
+        if '_readable_field_names' not in cls.__dict__:
+            cls._readable_field_names = tuple(name for name, field in cls().fields.items() if not field.write_only)
+        return cls._readable_field_names
+
+    @classmethod
+    def get_sparse_field_names(cls, query_params):
+        """The fields `?fields=` and `?exclude=` select, in declaration order; None when neither is given."""
+        if 'fields' not in query_params and 'exclude' not in query_params:
+            return None
+        readable = cls.get_readable_field_names()
+        selected = {}
+        errors = {}
+        for param in ('fields', 'exclude'):
+            names = [name.strip() for value in query_params.getlist(param) for name in value.split(',')]
+            selected[param] = {name for name in names if name}
+            unknown = sorted(selected[param].difference(readable))
+            if unknown:
+                errors[param] = ['Unknown field(s): {}. Choose from: {}.'.format(
+                    ', '.join(unknown), ', '.join(readable))]
+        if errors:
+            raise serializers.ValidationError(errors)
+        field_names = tuple(name for name in readable
+                            if ('fields' not in query_params or name in selected['fields'])
+                            and name not in selected['exclude'])
+        if not field_names:
+            param = 'fields' if 'fields' in query_params and not selected['fields'] else 'exclude'
+            raise serializers.ValidationError({param: ['No field selected. Choose from: {}.'.format(
+                ', '.join(readable))]})
+        return field_names
+
+
+class ExpandableFieldsMixin:
+    """
+    Inline expansion: `?expand=executor,project.project_manager` renders the
+    listed relations (see `get_expandable_fields`) with their serializer
+    instead of as a pk, dots expanding the relations of the nested object.
+    Views resolve the parameter with `get_expand_tree()`, which rejects
+    unknown relations, pass the tree as the `expand` argument and load the
+    objects with `select_related(*get_expand_related(tree))`.
+    """
+
+    def __init__(self, *args, expand=None, **kwargs):
+        self.expand = expand or {}
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def get_expandable_fields(cls):
+        """Relation field name -> serializer class of the expanded object."""
+        return {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expandable_fields = self.get_expandable_fields()
+        for name, tree in self.expand.items():
+            # Only expandable serializers take nested expansions.
+            kwargs = {'expand': tree} if tree else {}
+            fields[name] = expandable_fields[name](source=fields[name].source, read_only=True, **kwargs)
+        return fields
+
+    @classmethod
+    def get_expand_tree(cls, query_params):
+        """`{relation: {nested relation: ...}}` of `?expand=`, None when it is not given."""
+        tree = {}
+        unknown = []
+        for path in (path.strip() for value in query_params.getlist('expand') for path in value.split(',')):
+            serializer_class, node = cls, tree
+            for name in path.split('.') if path else ():
+                expandable_fields = serializer_class.get_expandable_fields() \
+                    if issubclass(serializer_class, ExpandableFieldsMixin) else {}
+                if name not in expandable_fields:
+                    unknown.append(path)
+                    break
+                serializer_class, node = expandable_fields[name], node.setdefault(name, {})
+        if unknown:
+            raise serializers.ValidationError({'expand': ['Unknown expansion(s): {}. Choose from: {}.'.format(
+                ', '.join(unknown), ', '.join(cls.get_expandable_fields()))]})
+        return tree or None
+
+    @classmethod
+    def get_expand_related(cls, tree):
+        """The `select_related()` paths of every object the expansion `tree` renders, computed once per tree."""
+        key = json.dumps(tree, sort_keys=True)
+        if '_expand_related' not in cls.__dict__:
+            cls._expand_related = {}
+        if key not in cls._expand_related:
+            cls._expand_related[key] = tuple(cls.find_expand_related(tree))
+        return cls._expand_related[key]
+
+    @classmethod
+    def find_expand_related(cls, tree, prefix=''):
+        fields = cls().fields
+        related = []
+        for name, subtree in tree.items():
+            serializer_class = cls.get_expandable_fields()[name]
+            path = prefix + fields[name].source.replace('.', '__')
+            related.append(path)
+            # Relations the nested serializer follows itself, e.g. `user.username`.
+            for field in serializer_class().fields.values():
+                source = field.source.split('.')
+                related.extend('__'.join((path, *source[:depth])) for depth in range(1, len(source)))
+            if subtree:
+                related.extend(serializer_class.find_expand_related(subtree, path + '__'))
+        return related
+
+
+class ReadQuerysetMixin:
+    """
+    Derives the read queryset from the serializer's fields: relations followed by
+    dotted sources (`user.username`) are joined with `select_related` and only
+    the columns the fields read are loaded. `field_names` narrows it to those
+    fields.
+    """
+
+    @classmethod
+    def get_read_queryset(cls, queryset, extra_columns=(), field_names=None):
+        related = set()
+        columns = set()
+        for field in cls().fields.values():
+            if field_names is not None and field.field_name not in field_names:
+                continue
+            if field.source == '*':
+                return queryset
+            path = field.source.split('.')
+            for depth in range(1, len(path)):
+                related.add('__'.join(path[:depth]))
+            columns.add('__'.join(path))
+        if related:
+            queryset = queryset.select_related(*sorted(related))
+        return queryset.only(*sorted(columns | related | set(extra_columns)))
+
+
+class ValuesReader:
+    """Turns `.values_list(*columns)` rows into the representation, one precompiled converter per field."""
+
+    def __init__(self, columns, fields):
+        self.columns = tuple(columns)
+        self.fields = tuple(fields)
+
+    def to_representation(self, row):
+        return {name: value if convert is None or value is None else convert(value)
+                for (name, convert), value in zip(self.fields, row)}
+
+
+class ValuesReadMixin:
+    """
+    Read-only fast path for flat model serializers: `get_values_reader()`
+    compiles the readable fields once into a `ValuesReader`, whose output is
+    identical to `.data` without building model instances or going through
+    the field machinery. It is None when a field cannot be read from a column.
+    Readers are compiled once per set of `field_names` (see `SparseFieldsMixin`),
+    of which there are at most two to the number of fields.
+    """
+    # Fields whose to_representation() is the identity on values loaded from their model field.
+    identity_fields = (serializers.IntegerField, serializers.CharField, serializers.PrimaryKeyRelatedField)
 
+    @classmethod
+    def get_values_reader(cls, field_names=None):
+        if '_values_readers' not in cls.__dict__:
+            cls._values_readers = {}
+        if field_names not in cls._values_readers:
+            cls._values_readers[field_names] = cls.compile_values_reader(field_names)
+        return cls._values_readers[field_names]
 
-class DepartmentSerializer(serializers.ModelSerializer):
+    @classmethod
+    def compile_values_reader(cls, field_names=None):
+        if cls.to_representation is not serializers.Serializer.to_representation:
+            return None
+        model = cls.Meta.model
+        columns = []
+        fields = []
+        for field in cls().fields.values():
+            if field.write_only or field_names is not None and field.field_name not in field_names:
+                continue
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+            if model_field.many_to_many or model_field.one_to_many:
+                return None
+            if isinstance(field, serializers.RelatedField) and \
+                    not (isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None):
+                return None
+            identity = type(field).to_representation in (
+                field_class.to_representation for field_class in cls.identity_fields)
+            columns.append(model_field.attname)
+            fields.append((field.field_name, None if identity else field.to_representation))
+        return ValuesReader(columns, fields)
+
+
+class BulkCreateListSerializer(serializers.ListSerializer):
+    """
+    Validates a batch item by item, keeping the valid items and collecting the
+    errors of the others in `item_errors`. Related objects are fetched with one
+    IN query per relation instead of one query per item.
+    """
+    batch_size = 500
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list) or not data:
+            return super().to_internal_value(data)
+        self.prefetched_objects = self.prefetch_related_objects(data)
+        self.item_errors = []
+        validated = []
+        for index, item in enumerate(data):
+            try:
+                validated.append(self.child.run_validation(item))
+            except serializers.ValidationError as exc:
+                self.item_errors.append({'index': index, 'errors': exc.detail})
+        return validated
+
+    def prefetch_related_objects(self, data):
+        prefetched = {}
+        for field in self.child.fields.values():
+            if not isinstance(field, PrefetchedPrimaryKeyRelatedField) or field.read_only:
+                continue
+            pks = {parse_pk(item.get(field.field_name)) for item in data if isinstance(item, dict)}
+            prefetched[field.field_name] = field.get_queryset().in_bulk(pks - {None})
+        return prefetched
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        objects = [model(**attrs) for attrs in validated_data]
+        with transaction.atomic():
+            model.objects.bulk_create(objects, batch_size=self.batch_size)
+            self.child.bulk_created(objects)
+        return objects
+
+
+class DepartmentSerializer(ExpandableFieldsMixin, SparseFieldsMixin, ReadQuerysetMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Department
         fields = ('id', 'head_of_department', 'name')
         read_only_fields = ('id',)
 
+    @classmethod
+    def get_expandable_fields(cls):
+        return {'head_of_department': EmployeeModelSerializer}
+
 
-class EmployeeModelSerializer(serializers.ModelSerializer):
+class EmployeeModelSerializer(SparseFieldsMixin, ReadQuerysetMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Employee
@@ -33,17 +322,87 @@ class EmployeeSerializer(serializers.Serializer):
     department = serializers.IntegerField(allow_null=True, required=False)
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(ExpandableFieldsMixin, SparseFieldsMixin, ReadQuerysetMixin, ValuesReadMixin,
+                        serializers.ModelSerializer):
 
     class Meta:
         model = Project
         fields = ('id', 'project_manager', 'name', 'start_date', 'end_date')
         read_only_fields = ('id', 'start_date', 'end_date')
 
+    @classmethod
+    def get_expandable_fields(cls):
+        return {'project_manager': EmployeeModelSerializer}
 
-class TaskSerializer(serializers.ModelSerializer):
+
+class TaskSerializer(ExpandableFieldsMixin, SparseFieldsMixin, ReadQuerysetMixin, ValuesReadMixin,
+                     serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
 
     class Meta:
         model = Task
         fields = ('id', 'executor', 'name', 'project', 'start_date', 'end_date', 'status')
         read_only_fields = ('id',)
+        list_serializer_class = BulkCreateListSerializer
+
+    @classmethod
+    def get_expandable_fields(cls):
+        return {'executor': EmployeeModelSerializer, 'project': ProjectSerializer}
+
+    @staticmethod
+    def bulk_created(tasks):
+        # bulk_create() sends no post_save, so roll the project dates and stats up here
+        schedule_project_dates_rollup({task.project_id for task in tasks})
+        update_project_stats(Counter(get_stats_key(task) for task in tasks))
+
+
+class JobSerializer(SparseFieldsMixin, ReadQuerysetMixin, serializers.ModelSerializer):
+
+    class Meta:
+        model = Job
+        fields = ('id', 'name', 'status', 'priority', 'attempts', 'max_attempts', 'progress', 'result', 'error',
+                  'created_at', 'started_at', 'finished_at')
+        read_only_fields = fields
+
+    progress = serializers.SerializerMethodField()
+    result = serializers.SerializerMethodField()
+
+    def get_progress(self, job) -> dict:
+        return {'done': job.progress_done, 'total': job.progress_total}
+
+    def get_result(self, job) -> dict:
+        return json.loads(job.result) if job.result is not None else None
+
+
+def check_not_revoked(token):
+    if revocation_list.is_revoked(token.get(api_settings.JTI_CLAIM, '')):
+        raise TokenError(_('Token is revoked'))
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refuses revoked refresh tokens; with `BLACKLIST_AFTER_ROTATION` a rotated token is revoked."""
+
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        check_not_revoked(refresh)
+        data = super().validate(attrs)
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            revocation_list.revoke(refresh)
+        return data
+
+
+class RevocableTokenVerifySerializer(TokenVerifySerializer):
+
+    def validate(self, attrs):
+        check_not_revoked(UntypedToken(attrs['token']))
+        return {}
+
+
+class TokenRevokeSerializer(serializers.Serializer):
+    refresh = serializers.CharField(required=False)
+
+    def validate_refresh(self, value):
+        try:
+            return RefreshToken(value)
+        except TokenError as error:
+            raise serializers.ValidationError(error.args[0])
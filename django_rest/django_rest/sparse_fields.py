@@ -0,0 +1,70 @@
+from django_rest.models import VERSION_FIELDS
+from django_rest.serializers import ExpandableFieldsMixin, SparseFieldsMixin
+
+
+class SparseFieldsViewMixin:
+    """
+    `?fields=` and `?exclude=` on a generic view: the serializer only renders
+    the selected fields and, for reads, the queryset only loads their columns
+    (plus the version and the ordering fields the view itself needs).
+    """
+
+    def get_field_names(self):
+        # The schema generator inspects views without a request, they describe every field.
+        if getattr(self, 'swagger_fake_view', False):
+            return None
+        if not hasattr(self, '_field_names'):
+            serializer_class = self.get_serializer_class()
+            self._field_names = serializer_class.get_sparse_field_names(self.request.query_params) \
+                if issubclass(serializer_class, SparseFieldsMixin) else None
+        return self._field_names
+
+    def get_serializer(self, *args, **kwargs):
+        field_names = self.get_field_names()
+        if field_names is not None:
+            kwargs['field_names'] = field_names
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        field_names = self.get_field_names()
+        if field_names is None or self.request.method not in ('GET', 'HEAD'):
+            return queryset
+        extra_columns = [name for name in (*VERSION_FIELDS, *getattr(self, 'ordering_fields', ()))
+                         if hasattr(queryset.model, name)]
+        return self.get_serializer_class().get_read_queryset(queryset, extra_columns, field_names)
+
+
+class ExpandViewMixin(SparseFieldsViewMixin):
+    """
+    `?expand=` on a generic view, for reads: the serializer renders the listed
+    relations inline and the queryset joins every object they need, so the
+    number of queries does not depend on the number of objects. Relations
+    left out by `?fields=` are not expanded.
+    """
+
+    def get_expand(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return None
+        if not hasattr(self, '_expand'):
+            serializer_class = self.get_serializer_class()
+            self._expand = None
+            if issubclass(serializer_class, ExpandableFieldsMixin) and self.request.method in ('GET', 'HEAD'):
+                tree = serializer_class.get_expand_tree(self.request.query_params) or {}
+                field_names = self.get_field_names()
+                self._expand = {name: subtree for name, subtree in tree.items()
+                                if field_names is None or name in field_names} or None
+        return self._expand
+
+    def get_serializer(self, *args, **kwargs):
+        expand = self.get_expand()
+        if expand is not None:
+            kwargs['expand'] = expand
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        expand = self.get_expand()
+        if expand is None:
+            return queryset
+        return queryset.select_related(*self.get_serializer_class().get_expand_related(expand))
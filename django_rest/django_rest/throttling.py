@@ -0,0 +1,192 @@
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from hashlib import blake2b
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+from django_rest.metrics import THROTTLED
+
+try:
+    import fcntl
+except ImportError:  # Windows: the buckets are only shared by the threads of one process.
+    fcntl = None
+
+# A slot is the hash of the bucket's key and the time the bucket is full again.
+SLOT = struct.Struct('<Qd')
+
+
+class BucketStore:
+    """
+    Token buckets in a memory mapped file shared by every worker process on the host.
+
+    A bucket is stored as the time at which it is full again, `full_at`: it
+    holds `burst - (full_at - now) * rate` tokens, and taking one moves
+    `full_at` a `1 / rate` later. A bucket whose `full_at` has passed is the
+    same as no bucket, so its slot is free for any key; that is all the
+    cleanup there is. A key lives in one of `PROBES` consecutive slots; when
+    all of them hold live buckets, the fullest is evicted (its client gets a
+    full bucket again, the store never blocks a client it lost track of).
+
+    Updates lock only the slots of their keys, with byte range locks on the
+    file and a lock for the threads of this process.
+    """
+
+    PROBES = 4
+
+    def __init__(self, path, slots=2 ** 16):
+        self.path = path
+        self.slots = max(slots, self.PROBES)
+        self.pid = None
+
+    @classmethod
+    def from_settings(cls):
+        conf = getattr(settings, 'THROTTLE', {})
+        return cls(conf['PATH'], slots=conf.get('SLOTS', 2 ** 16))
+
+    def open(self):
+        # Mapped lazily, once per process: byte range locks are not inherited by forked workers.
+        if self.pid != os.getpid():
+            size = self.slots * SLOT.size
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self.fd = fd
+            self.map = mmap.mmap(fd, size)
+            self.lock = threading.Lock()
+            self.pid = os.getpid()
+
+    @staticmethod
+    def hash(key):
+        # 0 marks an empty slot.
+        return int.from_bytes(blake2b(key.encode(), digest_size=8).digest(), 'little') or 1
+
+    def close(self):
+        if self.pid == os.getpid():
+            self.map.close()
+            os.close(self.fd)
+        self.pid = None
+
+    @contextmanager
+    def locked(self, ranges):
+        """Lock the `(offset, length)` byte ranges of the file, against this process's threads and the others."""
+        merged = []
+        for offset, length in sorted(ranges):
+            if merged and offset <= sum(merged[-1]):
+                merged[-1] = (merged[-1][0], max(sum(merged[-1]), offset + length) - merged[-1][0])
+            else:
+                merged.append((offset, length))
+        with self.lock:
+            if fcntl is None:
+                yield
+                return
+            held = []
+            try:
+                # Always in ascending order, so two processes cannot wait on each other.
+                for offset, length in merged:
+                    fcntl.lockf(self.fd, fcntl.LOCK_EX, length, offset)
+                    held.append((offset, length))
+                yield
+            finally:
+                for offset, length in held:
+                    fcntl.lockf(self.fd, fcntl.LOCK_UN, length, offset)
+
+    def take(self, key, burst, rate, now=None):
+        """Take a token from the bucket `key`, return 0 or, when it is empty, the seconds until it has one."""
+        return self.take_all([(key, burst, rate)], now=now)[0]
+
+    def take_all(self, buckets, now=None):
+        """
+        Take a token from each of the `(key, burst, rate)` buckets, or from none
+        of them when one is empty. Return the seconds each bucket needs until it
+        has a token: all 0 when they were taken.
+        """
+        self.open()
+        now = time.time() if now is None else now
+        probes = []
+        for key, burst, rate in buckets:
+            key_hash = self.hash(key)
+            probes.append((key_hash, key_hash % (self.slots - self.PROBES + 1) * SLOT.size, burst, rate))
+        with self.locked([(first, self.PROBES * SLOT.size) for _, first, _, _ in probes]):
+            # Slots written so far, in case two buckets share one.
+            pending = {}
+            waits = []
+            for key_hash, first, burst, rate in probes:
+                slots = [(offset, *pending.get(offset, SLOT.unpack_from(self.map, offset)))
+                         for offset in range(first, first + self.PROBES * SLOT.size, SLOT.size)]
+                offset, full_at = next(((offset, full_at) for offset, slot_hash, full_at in slots
+                                        if slot_hash == key_hash), (None, now))
+                if offset is None:
+                    offset = min(slots, key=lambda slot: slot[2])[0]
+                # Behind by more than burst - 1 tokens: the bucket is empty.
+                waits.append(max(max(full_at, now) - now - (burst - 1) / rate, 0.0))
+                pending[offset] = (key_hash, max(full_at, now) + 1 / rate)
+            if not any(waits):
+                for offset, slot in pending.items():
+                    SLOT.pack_into(self.map, offset, *slot)
+            return waits
+
+    def clear(self):
+        self.open()
+        with self.locked([(0, self.slots * SLOT.size)]):
+            self.map[:] = bytes(len(self.map))
+
+
+bucket_store = BucketStore.from_settings()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Takes a token from each of the request's buckets (see `get_buckets`), or
+    refuses the request, without taking any, when one of them is empty.
+
+    `THROTTLE['RATES']` gives the `(burst, tokens per second)` of each budget,
+    named `{scope}_{kind}`.
+    """
+
+    scope = None
+
+    def get_buckets(self, request, view):
+        """`(kind, ident)` pairs, e.g. `('ip', '10.0.0.1')`."""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        rates = settings.THROTTLE['RATES']
+        buckets = [('{}_{}'.format(self.scope, kind), ident) for kind, ident in self.get_buckets(request, view)]
+        waits = bucket_store.take_all([('{}:{}'.format(budget, ident), *rates[budget]) for budget, ident in buckets])
+        self.retry_after = max(waits, default=0) or None
+        for (budget, _), wait in zip(buckets, waits):
+            if wait:
+                THROTTLED.labels(budget).inc()
+        return self.retry_after is None
+
+    def wait(self):
+        return self.retry_after
+
+
+class AuthRateThrottle(TokenBucketThrottle):
+    """Token endpoints: a budget per client IP and, for logins, one per username tried."""
+
+    scope = 'auth'
+
+    def get_buckets(self, request, view):
+        buckets = [('ip', self.get_ident(request))]
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if username:
+            buckets.append(('username', username))
+        return buckets
+
+
+class DataRateThrottle(TokenBucketThrottle):
+    """Every other endpoint: a budget per client IP and one per user."""
+
+    scope = 'data'
+
+    def get_buckets(self, request, view):
+        buckets = [('ip', self.get_ident(request))]
+        if request.user and request.user.is_authenticated:
+            buckets.append(('user', request.user.pk))
+        return buckets
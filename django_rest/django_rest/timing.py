@@ -0,0 +1,124 @@
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+# Timings of the sampled request being served, None otherwise.
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Milliseconds spent per phase of one request, and the number and duration of its queries."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = {}
+        self.queries = 0
+        self.db = 0.0
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds * 1000
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += (time.perf_counter() - start) * 1000
+            self.queries += 1
+
+    def as_dict(self):
+        data = {'{}_ms'.format(phase): round(duration, 3) for phase, duration in self.phases.items()}
+        data.update({'db_ms': round(self.db, 3), 'db_queries': self.queries,
+                     'total_ms': round((time.perf_counter() - self.start) * 1000, 3)})
+        return data
+
+    def header(self):
+        metrics = ['{};dur={:.3f}'.format(phase, duration) for phase, duration in self.phases.items()]
+        metrics.append('db;dur={:.3f};desc="{} queries"'.format(self.db, self.queries))
+        metrics.append('total;dur={:.3f}'.format((time.perf_counter() - self.start) * 1000))
+        return ', '.join(metrics)
+
+
+@contextmanager
+def timed_phase(phase):
+    """Add the time spent in the block to `phase` of the current request, if it is sampled."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - start)
+
+
+def timed(phase):
+    """Decorator version of `timed_phase`."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return func(*args, **kwargs)
+            with timed_phase(phase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ServerTimingMiddleware:
+    """
+    Times a `SERVER_TIMING['SAMPLE_RATE']` fraction of requests: queries and
+    their duration on every database connection, the view, the rendering and
+    the phases marked with `timed_phase` (auth, rollup). The timings are sent
+    in a `Server-Timing` header and logged with one field per metric. Requests
+    that are not sampled cost a random() call.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        conf = getattr(settings, 'SERVER_TIMING', {})
+        self.sample_rate = conf.get('SAMPLE_RATE', 0.0)
+        self.logger = logging.getLogger(conf.get('LOGGER', 'django_rest.timing'))
+
+    def __call__(self, request):
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings.execute_wrapper))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        if 'view' not in timings.phases and hasattr(request, '_view_started'):
+            # Not a template response, nothing was left to render.
+            timings.add('view', time.perf_counter() - request._view_started)
+        response['Server-Timing'] = timings.header()
+        self.logger.info('%s %s %s', request.method, request.path, response.status_code, extra=dict(
+            timings.as_dict(), method=request.method, path=request.path, status=response.status_code))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = _current.get()
+        if timings is not None:
+            request._view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Called between the view returning and the response (DRF's too) being rendered.
+        timings = _current.get()
+        if timings is not None and hasattr(request, '_view_started'):
+            view_ended = time.perf_counter()
+            timings.add('view', view_ended - request._view_started)
+            response.add_post_render_callback(
+                lambda rendered: timings.add('render', time.perf_counter() - view_ended))
+        return response
@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import transaction, DEFAULT_DB_ALIAS
+from django_rest.metrics import observe_receiver
+
+# Model.from_db() expects the values in the order the fields are declared on the model.
+CACHED_USER_FIELDS = tuple(field.attname for field in User._meta.concrete_fields if field.attname in (
+    'id', 'username', 'first_name', 'last_name', 'email', 'is_active', 'is_staff', 'is_superuser'))
+
+
+class UserCache:
+    """
+    Two-level cache of user id -> the `CACHED_USER_FIELDS` of that user.
+
+    The first level is a per-process LRU with a short TTL, the second one is the
+    Django cache shared by all worker processes. Saving or deleting a User drops
+    both levels in the current process and the shared level for everyone, so
+    other processes see a change after at most `LOCAL_TTL` seconds.
+
+    Users are returned as `User` instances with every other field deferred;
+    touching one of those (e.g. `password`) loads it from the database.
+    """
+
+    def __init__(self, local_ttl=5, local_max_size=10000, shared_ttl=300, cache_alias='default'):
+        self.local_ttl = local_ttl
+        self.local_max_size = local_max_size
+        self.shared_ttl = shared_ttl
+        self.cache_alias = cache_alias
+        self.local = OrderedDict()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        conf = getattr(settings, 'JWT_USER_CACHE', {})
+        return cls(local_ttl=conf.get('LOCAL_TTL', 5), local_max_size=conf.get('LOCAL_MAX_SIZE', 10000),
+                   shared_ttl=conf.get('SHARED_TTL', 300), cache_alias=conf.get('CACHE_ALIAS', 'default'))
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    @staticmethod
+    def key(user_id):
+        return 'jwt_user:{}'.format(user_id)
+
+    def get(self, user_id):
+        values = self.get_local(user_id)
+        if values is None:
+            values = self.shared.get(self.key(user_id))
+            if values is None:
+                values = User.objects.filter(pk=user_id).values_list(*CACHED_USER_FIELDS).first()
+                if values is None:
+                    return None
+                self.shared.set(self.key(user_id), values, self.shared_ttl)
+            self.set_local(user_id, values)
+        return User.from_db(DEFAULT_DB_ALIAS, CACHED_USER_FIELDS, values)
+
+    def get_local(self, user_id):
+        with self.lock:
+            entry = self.local.get(user_id)
+            if entry is None:
+                return None
+            expires, values = entry
+            if expires < time.monotonic():
+                del self.local[user_id]
+                return None
+            self.local.move_to_end(user_id)
+            return values
+
+    def set_local(self, user_id, values):
+        with self.lock:
+            self.local[user_id] = (time.monotonic() + self.local_ttl, values)
+            self.local.move_to_end(user_id)
+            while len(self.local) > self.local_max_size:
+                self.local.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.local.pop(user_id, None)
+        self.shared.delete(self.key(user_id))
+
+    def clear(self):
+        with self.lock:
+            self.local.clear()
+
+
+user_cache = UserCache.from_settings()
+
+
+@observe_receiver
+def user_changed_receiver(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    user_cache.invalidate(instance.pk)
+    # A concurrent request may refill the cache from the old row before commit.
+    transaction.on_commit(lambda: user_cache.invalidate(instance.pk), using=using)
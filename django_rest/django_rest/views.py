@@ -1,16 +1,34 @@
 from django.contrib.auth.hashers import make_password
+from django.db.models import F
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from rest_framework.generics import CreateAPIView, RetrieveUpdateDestroyAPIView
+from rest_framework.generics import CreateAPIView, ListAPIView, ListCreateAPIView, RetrieveAPIView, \
+    RetrieveUpdateDestroyAPIView
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.exceptions import APIException, status, PermissionDenied
-from django_rest.models import Employee, Department, Project, Task
+from django_rest.conditional import ConditionalRetrieveMixin, CachedRetrieveMixin, has_conditional_headers, \
+    not_modified_response, set_version_headers
+from django_rest.db_router import ReplicaReadMixin
+from django_rest.employee_import import EmployeeImporter
+from django_rest.jobs import AsyncDestroyMixin, enqueue, job_accepted_response, prefers_async, remove_staged, \
+    stage_rows
+from django_rest.models import Employee, Department, Project, Task, ProjectStats, Job, VERSION_FIELDS, STATUS_CHOICES
+from django_rest.parsers import CSVStreamParser, NDJSONStreamParser
+from django_rest.response_cache import response_cache
 from django.contrib.auth.models import User
 from django_rest.serializers import EmployeeSerializer, EmployeeModelSerializer,\
-    DepartmentSerializer, ProjectSerializer, TaskSerializer
+    DepartmentSerializer, ProjectSerializer, TaskSerializer, JobSerializer, RevocableTokenRefreshSerializer, \
+    RevocableTokenVerifySerializer, TokenRevokeSerializer
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
+from django_rest.revocation import revocation_list
+from django_rest.sparse_fields import ExpandViewMixin, SparseFieldsViewMixin
+from django_rest.throttling import AuthRateThrottle
 from drf_yasg.utils import swagger_auto_schema
-from swagger import employee_swager
+from swagger import employee_swager, project_swager, task_swager
 
 
 class ObjectExistsException(APIException):
@@ -19,15 +37,26 @@ class ObjectExistsException(APIException):
     default_code = 'object_exists'
 
 
-class EmployeeAPIView(APIView):
+class EmployeeAPIView(ReplicaReadMixin, APIView):
 
     @swagger_auto_schema(operation_description='Get Employee.',
                          responses={200: EmployeeModelSerializer()})
     def get(self, request, pk):
-        employee = get_object_or_404(Employee, pk=pk)
+        if has_conditional_headers(request):
+            state = Employee.objects.filter(pk=pk).values_list('user_id', *VERSION_FIELDS).first()
+            if state is not None:
+                user_id, version, updated_at = state
+                self.permission_check(request, Employee(pk=pk, user_id=user_id))
+                response = not_modified_response(request, version, updated_at)
+                if response is not None:
+                    return response
+        field_names = EmployeeModelSerializer.get_sparse_field_names(request.query_params)
+        queryset = EmployeeModelSerializer.get_read_queryset(Employee.objects.all(), (*VERSION_FIELDS, 'user'),
+                                                             field_names)
+        employee = get_object_or_404(queryset, pk=pk)
         self.permission_check(request, employee)
-        serializer = EmployeeModelSerializer(employee)
-        return Response(serializer.data)
+        serializer = EmployeeModelSerializer(employee, field_names=field_names)
+        return set_version_headers(Response(serializer.data), employee.version, employee.updated_at)
 
     @swagger_auto_schema(
         operation_description="Update Employee.",
@@ -35,7 +64,7 @@ class EmployeeAPIView(APIView):
         responses={200: EmployeeModelSerializer()}
     )
     def put(self, request, pk):
-        employee = get_object_or_404(Employee, pk=pk)
+        employee = get_object_or_404(Employee.objects.select_related('user'), pk=pk)
         self.permission_check(request, employee)
         serializer = EmployeeSerializer(data=request.data)
         if serializer.is_valid(raise_exception=True):
@@ -49,7 +78,7 @@ class EmployeeAPIView(APIView):
         responses={200: EmployeeModelSerializer()}
     )
     def patch(self, request, pk):
-        employee = get_object_or_404(Employee, pk=pk)
+        employee = get_object_or_404(Employee.objects.select_related('user'), pk=pk)
         self.permission_check(request, employee)
         serializer = EmployeeModelSerializer(employee, data=request.data, partial=True)
         if serializer.is_valid(raise_exception=True):
@@ -57,11 +86,15 @@ class EmployeeAPIView(APIView):
             employee_data = EmployeeModelSerializer(employee)
             return Response(employee_data.data)
 
-    @swagger_auto_schema(operation_description='Delete Employee.',
-                         responses={204: EmployeeModelSerializer()})
+    @swagger_auto_schema(operation_description='Delete Employee. With `Prefer: respond-async` the delete runs '
+                                               'in a background job.',
+                         responses={204: EmployeeModelSerializer(), 202: JobSerializer()})
     def delete(self, request, pk):
-        employee = get_object_or_404(Employee, pk=pk)
+        employee = get_object_or_404(Employee.objects.select_related('user'), pk=pk)
         self.delete_permission_check(request, employee)
+        if prefers_async(request):
+            return job_accepted_response(enqueue('delete', {'model': Employee._meta.label, 'pk': employee.pk},
+                                                 user=request.user))
         serializer = EmployeeModelSerializer(employee)
         employee.delete()
         return Response(serializer.data, status=204)
@@ -82,18 +115,26 @@ class EmployeeAPIView(APIView):
     @staticmethod
     def permission_check(request, employee):
         # TODO move to permission class
-        if not request.user.is_staff and request.user != employee.user:
+        if not request.user.is_staff and request.user.pk != employee.user_id:
             raise PermissionDenied
 
     @staticmethod
     def delete_permission_check(request, employee):
         # TODO move to permission class
-        if not request.user.is_staff or request.user == employee.user:
+        if not request.user.is_staff or request.user.pk == employee.user_id:
             raise PermissionDenied
 
 
-class EmployeesCreateAPIView(APIView):
+class EmployeesListCreateAPIView(SparseFieldsViewMixin, ListAPIView):
     permission_classes = (IsAuthenticated, IsAdminUser)
+    serializer_class = EmployeeModelSerializer
+    queryset = Employee.objects.all()
+    ordering_fields = ('id',)
+    filter_fields = ('department',)
+
+    def get_queryset(self):
+        # Always narrowed to the serializer's columns, not only for sparse fieldsets.
+        return self.get_serializer_class().get_read_queryset(self.queryset.all(), field_names=self.get_field_names())
 
     @swagger_auto_schema(
         operation_description='Create Employee.',
@@ -119,37 +160,164 @@ class EmployeesCreateAPIView(APIView):
                 raise ObjectExistsException(message)
 
 
-class DepartmentCreateAPIView(CreateAPIView):
+class EmployeesImportAPIView(APIView):
+    permission_classes = (IsAuthenticated, IsAdminUser)
+    parser_classes = (CSVStreamParser, NDJSONStreamParser)
+
+    @swagger_auto_schema(
+        operation_description='Import Employees from a CSV (with header) or NDJSON body '
+                              'with the fields of the create Employee request. With `Prefer: respond-async` '
+                              'the import runs in a background job.',
+        request_body=employee_swager.post_schema,
+        responses={201: employee_swager.import_response_schema, 202: JobSerializer()}
+    )
+    def post(self, request):
+        rows = request.data if not isinstance(request.data, dict) else ()
+        if prefers_async(request):
+            # Staged in a file rather than the job's payload: the rows hold plaintext passwords.
+            path, count = stage_rows(rows)
+            try:
+                job = enqueue('employee_import', {'path': path, 'rows': count}, user=request.user)
+            except BaseException:
+                remove_staged(path)
+                raise
+            return job_accepted_response(job)
+        summary = EmployeeImporter().run(rows)
+        return Response(data=summary, status=201)
+
+
+class DepartmentListCreateAPIView(ExpandViewMixin, ListCreateAPIView):
     permission_classes = (IsAuthenticated, IsAdminUser)
     serializer_class = DepartmentSerializer
     queryset = Department.objects.all()
+    ordering_fields = ('id', 'name')
+    filter_fields = ('head_of_department',)
 
 
-class DepartmentAPIView(RetrieveUpdateDestroyAPIView):
+class DepartmentAPIView(AsyncDestroyMixin, ConditionalRetrieveMixin, RetrieveUpdateDestroyAPIView):
     permission_classes = (IsAuthenticated, IsAdminUser)
     serializer_class = DepartmentSerializer
     queryset = Department.objects.all()
 
 
-class ProjectCreateAPIView(CreateAPIView):
+class ProjectListCreateAPIView(ExpandViewMixin, ListCreateAPIView):
     permission_classes = (IsAuthenticated,)
     serializer_class = ProjectSerializer
     queryset = Project.objects.all()
+    ordering_fields = ('id', 'name')
+    filter_fields = ('project_manager',)
 
 
-class ProjectAPIView(RetrieveUpdateDestroyAPIView):
+class ProjectAPIView(AsyncDestroyMixin, ReplicaReadMixin, CachedRetrieveMixin, RetrieveUpdateDestroyAPIView):
     permission_classes = (IsAuthenticated,)
     serializer_class = ProjectSerializer
     queryset = Project.objects.all()
 
 
-class TaskCreateAPIView(CreateAPIView):
+class ProjectStatsAPIView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @swagger_auto_schema(operation_description='Number of Tasks of a Project per status, in total and per executor.',
+                         responses={200: project_swager.stats_response_schema})
+    def get(self, request, pk):
+        rows = ProjectStats.objects.filter(project_id=pk, count__gt=0)\
+            .order_by(F('executor_id').asc(nulls_last=True), 'status').values_list('executor_id', 'status', 'count')
+        if not rows and not Project.objects.filter(pk=pk).exists():
+            raise Http404
+        data = {'project': pk, 'total': 0, 'statuses': dict.fromkeys(dict(STATUS_CHOICES), 0), 'executors': []}
+        executors = {}
+        for executor_id, status_name, count in rows:
+            if executor_id not in executors:
+                executors[executor_id] = {'executor': executor_id, 'total': 0,
+                                          'statuses': dict.fromkeys(dict(STATUS_CHOICES), 0)}
+                data['executors'].append(executors[executor_id])
+            for counts in (data, executors[executor_id]):
+                counts['total'] += count
+                counts['statuses'][status_name] += count
+        return Response(data)
+
+
+class TaskListCreateAPIView(ExpandViewMixin, ListCreateAPIView):
     permission_classes = (IsAuthenticated,)
     serializer_class = TaskSerializer
     queryset = Task.objects.all()
+    ordering_fields = ('id', 'name')
+    filter_fields = ('project', 'executor', 'status')
 
 
-class TaskAPIView(RetrieveUpdateDestroyAPIView):
+class TaskAPIView(ReplicaReadMixin, CachedRetrieveMixin, RetrieveUpdateDestroyAPIView):
     permission_classes = (IsAuthenticated, )
     serializer_class = TaskSerializer
     queryset = Task.objects.all()
+
+
+class TaskBulkCreateAPIView(CreateAPIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = TaskSerializer
+    queryset = Task.objects.all()
+
+    @swagger_auto_schema(
+        operation_description='Create Tasks in bulk. Valid items are created, invalid ones are reported by index.',
+        request_body=TaskSerializer(many=True),
+        responses={201: task_swager.bulk_create_response_schema,
+                   400: task_swager.bulk_create_response_schema}
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        tasks = serializer.save()
+        data = {'created': len(tasks), 'errors': getattr(serializer, 'item_errors', [])}
+        return Response(data=data, status=201 if tasks or not data['errors'] else 400)
+
+
+class ResponseCacheStatsAPIView(APIView):
+    permission_classes = (IsAuthenticated, IsAdminUser)
+
+    @swagger_auto_schema(operation_description='Project and Task detail cache hits and misses of this worker process.')
+    def get(self, request):
+        return Response(response_cache.get_stats())
+
+
+class JobAPIView(SparseFieldsViewMixin, RetrieveAPIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = JobSerializer
+
+    def get_queryset(self):
+        # Staff see every job, other users the jobs they started.
+        jobs = Job.objects.all()
+        if getattr(self, 'swagger_fake_view', False):
+            return jobs.none()
+        return jobs if self.request.user.is_staff else jobs.filter(created_by=self.request.user)
+
+
+class TokenObtainPairAPIView(TokenObtainPairView):
+    throttle_classes = (AuthRateThrottle,)
+
+
+class TokenRefreshAPIView(TokenRefreshView):
+    serializer_class = RevocableTokenRefreshSerializer
+    throttle_classes = (AuthRateThrottle,)
+
+
+class TokenVerifyAPIView(TokenVerifyView):
+    serializer_class = RevocableTokenVerifySerializer
+    throttle_classes = (AuthRateThrottle,)
+
+
+class TokenRevokeAPIView(APIView):
+    permission_classes = (IsAuthenticated,)
+    throttle_classes = (AuthRateThrottle,)
+
+    @swagger_auto_schema(operation_description='Log out: revoke the access token of the request and, if given, '
+                                               'the refresh token.',
+                         request_body=TokenRevokeSerializer, responses={204: 'Revoked'})
+    def post(self, request):
+        serializer = TokenRevokeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        refresh = serializer.validated_data.get('refresh')
+        if refresh is not None and refresh.get(api_settings.USER_ID_CLAIM) != request.user.pk:
+            raise PermissionDenied('The refresh token belongs to another user.')
+        for token in (request.auth, refresh):
+            if isinstance(token, Token):
+                revocation_list.revoke(token)
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.0/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 from datetime import timedelta
@@ -46,11 +47,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'django_rest.metrics.MetricsMiddleware',
+    'django_rest.timing.ServerTimingMiddleware',
+    'django_rest.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django_rest.db_router.ReplicaStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -86,20 +91,97 @@ DATABASES = {
     }
 }
 
+# Read replicas, see django_rest.db_router. DJANGO_DB_REPLICAS=<n> adds n local
+# SQLite copies of the primary, refreshed by `manage.py sync_replicas`.
+DATABASE_ROUTERS = ['django_rest.db_router.PrimaryReplicaRouter']
+
+for replica_number in range(1, int(os.environ.get('DJANGO_DB_REPLICAS', 0)) + 1):
+    DATABASES['replica{}'.format(replica_number)] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'django_rest/db.replica{}.sqlite3'.format(replica_number)),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# The response cache, the JWT user cache and the replica pins below must be
+# shared by every worker process: set DJANGO_CACHE_BACKEND to a shared backend
+# (e.g. django.core.cache.backends.memcached.PyLibMCCache with
+# DJANGO_CACHE_LOCATION) whenever the server runs more than one.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', ''),
+    },
+}
+
+# Users who wrote are pinned to the primary for STICKY_SECONDS, which should
+# exceed the replication lag.
+DATABASE_REPLICATION = {
+    'REPLICAS': [alias for alias in DATABASES if alias != 'default'],
+    'STICKY_SECONDS': int(os.environ.get('DJANGO_DB_STICKY_SECONDS', 5)),
+    'CACHE_ALIAS': 'default',
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     "DEFAULT_PARSER_CLASSES": [
-        "rest_framework.parsers.JSONParser",
+        "django_rest.parsers.ORJSONParser",
+        "django_rest.parsers.MessagePackParser",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "django_rest.renderers.ORJSONRenderer",
+        "django_rest.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "django_rest.authentication.CachedJWTAuthentication",
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'django_rest.pagination.KeysetPagination',
     'PAGE_SIZE': 10,
+    'DEFAULT_FILTER_BACKENDS': [
+        'django_rest.filters.FieldFilterBackend',
+    ],
     "DEFAULT_SCHEMA_CLASS": "rest_framework.schemas.coreapi.AutoSchema",
+    'DEFAULT_THROTTLE_CLASSES': [
+        'django_rest.throttling.DataRateThrottle',
+    ],
+    # Reverse proxies in front of the app. The throttles key clients by IP: with
+    # 0 that is REMOTE_ADDR, otherwise the address this many proxies back in
+    # X-Forwarded-For. Left unset, DRF would trust whatever the client sends.
+    'NUM_PROXIES': int(os.environ.get('DJANGO_NUM_PROXIES', 0)),
+}
+
+# Response compression, see django_rest.compression. ENCODINGS is the order of
+# preference, br and zstd are used when `brotli` and `zstandard` are installed.
+# Only the content types in LEVELS are compressed, at the level given per encoding
+# (gzip 1-9, br 0-11, zstd 1-22); bodies under MIN_SIZE bytes are sent as they are.
+COMPRESSION = {
+    'MIN_SIZE': 1024,
+    'ENCODINGS': ('zstd', 'br', 'gzip'),
+    'LEVELS': {
+        'application/json': {'zstd': 3, 'br': 4, 'gzip': 6},
+        'application/msgpack': {'zstd': 3, 'br': 4, 'gzip': 6},
+        'application/openapi+json': {'zstd': 3, 'br': 4, 'gzip': 6},
+        'text/html': {'zstd': 3, 'br': 4, 'gzip': 6},
+        'text/plain': {'zstd': 3, 'br': 4, 'gzip': 6},
+    },
+}
+
+# Token bucket budgets of django_rest.throttling, `{scope}_{kind}: (burst, tokens
+# per second)`. The buckets live in the file at PATH, shared by the worker
+# processes of the host; SLOTS bounds the clients tracked at once.
+THROTTLE = {
+    'PATH': os.environ.get('DJANGO_THROTTLE_PATH', os.path.join(
+        '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'django_rest_throttle')),
+    'SLOTS': 2 ** 16,
+    'RATES': {
+        'auth_ip': (20, 0.5),
+        'auth_username': (5, 0.1),
+        'data_ip': (600, 100),
+        'data_user': (200, 50),
+    },
 }
 
 # Password validation
@@ -147,6 +229,72 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Revoked JWT ids are mirrored in a per-process Bloom filter, synced with the
+# database every SYNC_INTERVAL seconds and rebuilt every REBUILD_INTERVAL
+# seconds, see django_rest.revocation. A sync re-reads the rows revoked up to
+# SYNC_OVERLAP seconds before the previous one: a revocation committed later
+# than that after its revoked_at (clock skew included) waits for the rebuild.
+TOKEN_REVOCATION = {
+    'SYNC_INTERVAL': 1,
+    'SYNC_OVERLAP': 60,
+    'REBUILD_INTERVAL': 3600,
+    'CAPACITY': 100000,
+    'ERROR_RATE': 0.001,
+}
+
+# Users resolved from JWTs are cached per process for LOCAL_TTL seconds and in the
+# Django cache for SHARED_TTL seconds, see django_rest.user_cache.
+JWT_USER_CACHE = {
+    'LOCAL_TTL': 5,
+    'LOCAL_MAX_SIZE': 10000,
+    'SHARED_TTL': 300,
+    'CACHE_ALIAS': 'default',
+}
+
+# Project and Task detail GET responses, see django_rest.response_cache. On a
+# per-process cache they are only cached with ALLOW_LOCAL, when the server runs
+# a single process (as runserver does): other workers' invalidations would
+# never reach it.
+RESPONSE_CACHE = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 300,
+    'ALLOW_LOCAL': os.environ.get('DJANGO_SINGLE_PROCESS', '1' if DEBUG else '0') == '1',
+}
+
+# Fraction of requests timed into a Server-Timing header and a log record,
+# see django_rest.timing.
+SERVER_TIMING = {
+    'SAMPLE_RATE': float(os.environ.get('DJANGO_SERVER_TIMING_SAMPLE_RATE', 0)),
+    'LOGGER': 'django_rest.timing',
+}
+
+# Prometheus metrics are served at /metrics/, see django_rest.metrics. Preforked
+# workers share them through the files in the directory named by the
+# PROMETHEUS_MULTIPROC_DIR environment variable.
+
+# Detail GETs served concurrently under ASGI, see django_rest.asgi_reads.
+ASGI_READS = {
+    'URL_NAMES': ('employee', 'department', 'project', 'task'),
+    'MAX_THREADS': 32,
+}
+
+# Background jobs run by `manage.py worker`, see django_rest.jobs. A worker
+# holds a job for LEASE_SECONDS (extended by every progress report); failed
+# attempts are retried after RETRY_DELAY seconds, doubled on every attempt.
+# Uploads handed to a job (employee imports) wait in STAGING_DIR until the job
+# finishes; workers on other hosts need it on shared storage.
+JOB_QUEUE = {
+    'LEASE_SECONDS': 300,
+    'POLL_INTERVAL': 1.0,
+    'RETRY_DELAY': 10,
+    'MAX_ATTEMPTS': 3,
+    'STAGING_DIR': os.environ.get('DJANGO_JOB_STAGING_DIR', os.path.join(tempfile.gettempdir(), 'django_rest_jobs')),
+}
+
+# Generated OpenAPI document, see django_rest.schema and `manage.py generate_schema`.
+OPENAPI_SCHEMA_FILE = os.path.join(BASE_DIR, 'django_rest/openapi.json')
+OPENAPI_SCHEMA_MAX_AGE = 86400
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.0/topics/i18n/
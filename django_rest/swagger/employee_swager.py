@@ -24,4 +24,24 @@ patch_schema = openapi.Schema(
                 'last_name': openapi.Schema(type=openapi.TYPE_STRING),
                 'birthdate': openapi.Schema(type=openapi.TYPE_STRING)
             },
-        )
\ No newline at end of file
+        )
+import_response_schema = openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'created': openapi.Schema(type=openapi.TYPE_ARRAY,
+                                          items=openapi.Schema(type=openapi.TYPE_STRING)),
+                'skipped': openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            'row': openapi.Schema(type=openapi.TYPE_INTEGER),
+                            'username': openapi.Schema(type=openapi.TYPE_STRING),
+                            'errors': openapi.Schema(type=openapi.TYPE_OBJECT),
+                        },
+                    ),
+                ),
+                'conflicts': openapi.Schema(type=openapi.TYPE_ARRAY,
+                                            items=openapi.Schema(type=openapi.TYPE_STRING)),
+            },
+        )
@@ -0,0 +1,27 @@
+from drf_yasg import openapi
+
+
+status_counts_schema = openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            additional_properties=openapi.Schema(type=openapi.TYPE_INTEGER),
+        )
+
+stats_response_schema = openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'project': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'total': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'statuses': status_counts_schema,
+                'executors': openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            'executor': openapi.Schema(type=openapi.TYPE_INTEGER, x_nullable=True),
+                            'total': openapi.Schema(type=openapi.TYPE_INTEGER),
+                            'statuses': status_counts_schema,
+                        },
+                    ),
+                ),
+            },
+        )
@@ -0,0 +1,19 @@
+from drf_yasg import openapi
+
+
+bulk_create_response_schema = openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'created': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'errors': openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            'index': openapi.Schema(type=openapi.TYPE_INTEGER),
+                            'errors': openapi.Schema(type=openapi.TYPE_OBJECT),
+                        },
+                    ),
+                ),
+            },
+        )
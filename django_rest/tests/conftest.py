@@ -1,9 +1,13 @@
 import pytest
 from uuid import uuid4
 
+from django.core.cache import cache
 from django.urls import reverse
 from django_rest.models import Employee, Project, Task, Department
 from django.contrib.auth.models import User
+from django_rest.revocation import revocation_list
+from django_rest.throttling import bucket_store
+from django_rest.user_cache import user_cache
 from rest_framework.test import APIClient
 
 
@@ -40,12 +44,36 @@ def get_task():
     return task, data
 
 
+async def asgi_request(application, method, path, headers=(), body=b''):
+    """Send one HTTP request to an ASGI application in process, return `(status, headers, body)`."""
+    path, _, query_string = path.partition('?')
+    headers = [*headers, ('Content-Length', str(len(body)))] if body else headers
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query_string.encode(),
+             'headers': [(name.lower().encode(), value.encode()) for name, value in headers],
+             'server': ('testserver', 80), 'client': ('127.0.0.1', 0), 'scheme': 'http', 'root_path': ''}
+    messages = [{'type': 'http.request', 'body': body}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await application(scope, receive, send)
+    start = sent[0]
+    return start['status'], dict(start['headers']), b''.join(message.get('body', b'') for message in sent[1:])
+
+
+def get_token(employee):
+    resp = APIClient().post(path=reverse('token_obtain_pair'), format='json',
+                            data={'username': employee.user.username, 'password': 'PASSWORD'})
+    return resp.data['access']
+
+
 def get_client(employee):
     api_client = APIClient()
-    body = {'username': employee.user.username, 'password': 'PASSWORD'}
-    resp = api_client.post(path=reverse('token_obtain_pair'), data=body, format='json')
-    token = f"Bearer {resp.data['access']}"
-    api_client.credentials(HTTP_AUTHORIZATION=token)
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_token(employee)}')
     return api_client
 
 
@@ -61,3 +89,19 @@ def admin_client():
     employee, _ = get_employee(is_staff=True)
     api_client = get_client(employee)
     return api_client
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # Primary keys are reused once a test's transaction is rolled back.
+    cache.clear()
+    user_cache.clear()
+    revocation_list.clear()
+
+
+@pytest.fixture(autouse=True)
+def throttle_buckets(tmp_path, monkeypatch):
+    # A file of the test's own, not THROTTLE['PATH'] that a running server shares.
+    monkeypatch.setattr(bucket_store, 'path', str(tmp_path / 'throttle'))
+    yield
+    bucket_store.close()
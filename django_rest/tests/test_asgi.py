@@ -0,0 +1,77 @@
+import asyncio
+import json
+import threading
+import pytest
+
+from django.urls import reverse
+from django_rest.asgi_reads import ReadPathASGIHandler
+from tests.conftest import asgi_request, get_employee, get_task, get_token
+
+
+@pytest.fixture
+def application():
+    application = ReadPathASGIHandler()
+    yield application
+    application.executor.shutdown()
+
+
+@pytest.fixture
+def auth_headers(transactional_db):
+    employee, _ = get_employee(is_staff=True)
+    return [('Authorization', 'Bearer {}'.format(get_token(employee))), ('Accept', 'application/json')]
+
+
+def record_threads(application, threads):
+    get_read_response = application.get_read_response
+
+    def recording_get_read_response(request):
+        threads.append(threading.current_thread().name)
+        return get_read_response(request)
+
+    application.get_read_response = recording_get_read_response
+
+
+# READ_PATH_TESTS #######################################
+
+
+def test_asgi_get_task_on_read_pool(application, auth_headers):
+    task, _ = get_task()
+    threads = []
+    record_threads(application, threads)
+    status, headers, body = asyncio.run(
+        asgi_request(application, 'GET', reverse('task', args=(task.id,)), auth_headers))
+
+    assert status == 200
+    assert json.loads(body)['name'] == task.name
+    assert threads and threads[0].startswith('asgi-read')
+
+
+def test_asgi_concurrent_gets(application, auth_headers):
+    task, _ = get_task()
+    urls = [reverse('task', args=(task.id,)), reverse('project', args=(task.project_id,)),
+            reverse('employee', args=(get_employee()[0].id,))]
+
+    async def get_all():
+        return await asyncio.gather(*(asgi_request(application, 'GET', url, auth_headers) for url in urls * 10))
+
+    assert {status for status, _, _ in asyncio.run(get_all())} == {200}
+
+
+def test_asgi_write_keeps_default_path(application, auth_headers):
+    task, _ = get_task()
+    threads = []
+    record_threads(application, threads)
+    status, _, body = asyncio.run(asgi_request(
+        application, 'PATCH', reverse('task', args=(task.id,)),
+        auth_headers + [('Content-Type', 'application/json')], json.dumps({'name': 'Renamed'}).encode()))
+
+    assert status == 200
+    assert json.loads(body)['name'] == 'Renamed'
+    assert threads == []
+
+
+def test_asgi_get_unauthorized(application, transactional_db):
+    task, _ = get_task()
+    status, _, _ = asyncio.run(asgi_request(application, 'GET', reverse('task', args=(task.id,))))
+
+    assert status == 403
@@ -0,0 +1,180 @@
+import pytest
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django_rest.models import RevokedToken
+from django_rest.revocation import BloomFilter, revocation_list
+from django_rest.user_cache import user_cache
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from tests.conftest import get_employee, get_client, get_task
+
+
+@pytest.mark.django_db
+def test_authenticated_user_is_cached():
+    employee, _ = get_employee()
+    client = get_client(employee)
+    task, _ = get_task()
+    url = reverse('task', args=(task.id,))
+    client.get(path=url)
+    with CaptureQueriesContext(connection) as queries:
+        resp = client.get(path=url)
+
+    assert resp.status_code == 200
+    assert not [query for query in queries if 'auth_user' in query['sql']]
+
+
+@pytest.mark.django_db
+def test_cached_user_equals_employee_user():
+    employee, _ = get_employee()
+    user = user_cache.get(employee.user.id)
+
+    assert user == employee.user
+    assert user.username == employee.user.username
+    assert user.check_password('PASSWORD')
+
+
+@pytest.mark.django_db
+def test_cached_user_invalidated_on_save():
+    employee, _ = get_employee()
+    client = get_client(employee)
+    url = reverse('employee', args=(employee.id,))
+    assert client.get(path=url).status_code == 200
+
+    employee.user.is_active = False
+    employee.user.save()
+    resp = client.get(path=url)
+
+    assert resp.status_code == 403
+    assert resp.data['detail'] == 'User is inactive'
+
+
+@pytest.mark.django_db
+def test_cached_user_invalidated_on_delete():
+    employee, _ = get_employee()
+    client = get_client(employee)
+    url = reverse('employee', args=(employee.id,))
+    assert client.get(path=url).status_code == 200
+
+    employee.user.delete()
+    resp = client.get(path=url)
+
+    assert resp.status_code == 403
+    assert resp.data['detail'] == 'User not found'
+
+
+def test_local_cache_is_bounded():
+    for user_id in range(user_cache.local_max_size + 10):
+        user_cache.set_local(user_id, (user_id,))
+
+    assert len(user_cache.local) == user_cache.local_max_size
+    assert user_cache.get_local(0) is None
+
+
+# REVOCATION_TESTS #######################################
+
+
+def get_tokens(employee):
+    resp = APIClient().post(reverse('token_obtain_pair'), format='json',
+                            data={'username': employee.user.username, 'password': 'PASSWORD'})
+    return resp.data['access'], resp.data['refresh']
+
+
+@pytest.mark.django_db
+def test_revoked_tokens_refused():
+    employee, _ = get_employee()
+    access, refresh = get_tokens(employee)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(access))
+    url = reverse('employee', args=(employee.id,))
+    assert client.get(url).status_code == 200
+
+    assert client.post(reverse('token_revoke'), data={'refresh': refresh}, format='json').status_code == 204
+    assert client.get(url).data['detail'] == 'Token is revoked'
+    assert APIClient().post(reverse('token_refresh'), data={'refresh': refresh}, format='json').status_code == 401
+    assert APIClient().post(reverse('token_verify'), data={'token': access}, format='json').status_code == 401
+    assert get_client(employee).get(url).status_code == 200
+
+
+@pytest.mark.django_db
+def test_revoke_refresh_token_of_another_user():
+    employee, _ = get_employee()
+    other, _ = get_employee()
+    _, refresh = get_tokens(other)
+
+    resp = get_client(employee).post(reverse('token_revoke'), data={'refresh': refresh}, format='json')
+
+    assert resp.status_code == 403
+    assert not RevokedToken.objects.exists()
+
+
+@pytest.mark.django_db
+def test_revocation_check_needs_no_query():
+    employee, _ = get_employee()
+    client = get_client(employee)
+    url = reverse('employee', args=(employee.id,))
+    client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url)
+
+    assert not [query for query in queries if 'revokedtoken' in query['sql']]
+
+
+@pytest.mark.django_db
+def test_revocation_synced_from_other_processes():
+    employee, _ = get_employee()
+    access, _ = get_tokens(employee)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(access))
+    url = reverse('employee', args=(employee.id,))
+    assert client.get(url).status_code == 200
+
+    # Revoked by another process: seen at the next sync.
+    token = AccessToken(access)
+    RevokedToken.objects.create(jti=token['jti'], expires_at=timezone.now() + timedelta(days=1))
+    assert client.get(url).status_code == 200
+    revocation_list.next_sync = 0
+
+    assert client.get(url).status_code == 403
+
+
+@pytest.mark.django_db
+def test_revocation_committed_late_synced():
+    expires_at = timezone.now() + timedelta(days=1)
+    RevokedToken.objects.create(pk=10, jti='first', expires_at=expires_at)
+    revocation_list.sync()
+
+    # Revoked before the last sync with a lower pk, committed after it.
+    RevokedToken.objects.create(pk=5, jti='late', expires_at=expires_at)
+    RevokedToken.objects.create(pk=6, jti='too late', expires_at=expires_at)
+    RevokedToken.objects.filter(jti='late').update(revoked_at=timezone.now() - timedelta(seconds=30))
+    RevokedToken.objects.filter(jti='too late').update(revoked_at=timezone.now() - timedelta(seconds=90))
+    revocation_list.next_sync = 0
+
+    assert revocation_list.is_revoked('late')
+    assert not revocation_list.is_revoked('too late')
+    revocation_list.next_sync = revocation_list.next_rebuild = 0
+    assert revocation_list.is_revoked('too late')
+
+
+@pytest.mark.django_db
+def test_expired_revocations_dropped():
+    employee, _ = get_employee()
+    RevokedToken.objects.create(jti='expired', expires_at=timezone.now() - timedelta(seconds=1))
+    revocation_list.sync()
+
+    assert 'expired' not in revocation_list.filter
+    revocation_list.revoke(RefreshToken.for_user(employee.user))
+    assert not RevokedToken.objects.filter(jti='expired').exists()
+
+
+def test_bloom_filter_error_rate():
+    bloom_filter = BloomFilter(1000, 0.01)
+    for number in range(1000):
+        bloom_filter.add('revoked {}'.format(number))
+
+    assert all('revoked {}'.format(number) in bloom_filter for number in range(1000))
+    assert sum('valid {}'.format(number) in bloom_filter for number in range(10000)) < 200
@@ -0,0 +1,157 @@
+import gzip
+import os
+import zlib
+
+import pytest
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from django_rest.compression import CompressionMiddleware, parse_accept_encoding
+from tests.conftest import get_task
+
+BODY = b'{"id": 1, "name": "Roll cages", "status": "started"}' * 100
+
+
+def get_response(response=None, content=BODY, content_type='application/json', accept_encoding=None,
+                 **compression):
+    response = response or HttpResponse(content, content_type=content_type)
+    headers = {} if accept_encoding is None else {'HTTP_ACCEPT_ENCODING': accept_encoding}
+    with override_settings(COMPRESSION=dict(settings.COMPRESSION, **compression)):
+        middleware = CompressionMiddleware(lambda request: response)
+    return middleware(RequestFactory().get('/', **headers))
+
+
+# NEGOTIATION_TESTS #######################################
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding('') == {}
+    assert parse_accept_encoding('gzip, deflate') == {'gzip': 1.0, 'deflate': 1.0}
+    assert parse_accept_encoding('br;q=0.8, GZIP ; q=0.5, *;q=0, zstd;q=x') == \
+        {'br': 0.8, 'gzip': 0.5, '*': 0.0, 'zstd': 0.0}
+
+
+def test_gzip_negotiated():
+    resp = get_response(accept_encoding='deflate, gzip;q=0.5')
+
+    assert resp['Content-Encoding'] == 'gzip'
+    assert resp['Vary'] == 'Accept-Encoding'
+    assert int(resp['Content-Length']) == len(resp.content) < len(BODY)
+    assert gzip.decompress(resp.content) == BODY
+
+
+@pytest.mark.parametrize('accept_encoding', [None, 'identity', 'gzip;q=0', '*;q=0', 'deflate'])
+def test_not_accepted(accept_encoding):
+    resp = get_response(accept_encoding=accept_encoding)
+
+    assert not resp.has_header('Content-Encoding')
+    assert resp['Vary'] == 'Accept-Encoding'
+    assert resp.content == BODY
+
+
+def test_wildcard_accepted():
+    assert get_response(accept_encoding='*', ENCODINGS=('gzip',))['Content-Encoding'] == 'gzip'
+
+
+def test_preferred_encoding_unavailable():
+    # Without the codec installed, the encoding is left out of the negotiation.
+    resp = get_response(accept_encoding='brotli-but-not-installed, gzip;q=0.1',
+                        ENCODINGS=('brotli-but-not-installed', 'gzip'))
+
+    assert resp['Content-Encoding'] == 'gzip'
+
+
+def test_small_and_uncompressible_skipped():
+    small = get_response(content=BODY[:1023], accept_encoding='gzip')
+    noise = get_response(content=os.urandom(2048), accept_encoding='gzip', MIN_SIZE=0)
+
+    assert not small.has_header('Content-Encoding') and small['Vary'] == 'Accept-Encoding'
+    assert not noise.has_header('Content-Encoding')
+
+
+def test_content_type_levels():
+    image = get_response(content_type='image/png', accept_encoding='gzip')
+    fast = get_response(accept_encoding='gzip', LEVELS={'application/json': {'gzip': 1}})
+    best = get_response(accept_encoding='gzip', LEVELS={'application/json': {'gzip': 9}})
+    not_listed = get_response(accept_encoding='gzip', LEVELS={'application/json': {'br': 5}})
+
+    assert not image.has_header('Content-Encoding') and not image.has_header('Vary')
+    assert gzip.decompress(fast.content) == gzip.decompress(best.content) == BODY
+    assert len(best.content) <= len(fast.content)
+    assert not not_listed.has_header('Content-Encoding')
+
+
+def test_already_encoded_skipped():
+    response = HttpResponse(BODY, content_type='application/json')
+    response['Content-Encoding'] = 'identity'
+    resp = get_response(response, accept_encoding='gzip')
+
+    assert resp['Content-Encoding'] == 'identity'
+    assert resp.content == BODY
+
+
+# STREAMING_TESTS #######################################
+
+
+def test_streaming_compressed_incrementally():
+    consumed = []
+
+    def chunks():
+        for number in range(3):
+            consumed.append(number)
+            yield BODY
+
+    response = StreamingHttpResponse(chunks(), content_type='application/json')
+    response['Content-Length'] = str(3 * len(BODY))
+    resp = get_response(response, accept_encoding='gzip')
+
+    assert resp['Content-Encoding'] == 'gzip'
+    assert not resp.has_header('Content-Length')
+    assert consumed == []
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Each chunk is flushed: it decompresses whole before the next one is read.
+    for number, data in enumerate(resp.streaming_content):
+        if number < 3:
+            assert consumed == list(range(number + 1))
+            assert decompressor.decompress(data) == BODY
+        else:
+            decompressor.decompress(data)
+    assert decompressor.eof
+
+
+# VIEW_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_metrics_compressed(admin_client):
+    resp = admin_client.get(reverse('metrics'), HTTP_ACCEPT_ENCODING='gzip')
+
+    assert resp['Content-Encoding'] == 'gzip'
+    assert b'http_requests_total' in gzip.decompress(resp.content)
+
+
+@pytest.mark.django_db
+@override_settings(COMPRESSION=dict(settings.COMPRESSION, MIN_SIZE=0))
+def test_etag_weakened(admin_client):
+    task, _ = get_task()
+    plain = admin_client.get(reverse('task', args=(task.id,)))
+    resp = admin_client.get(reverse('task', args=(task.id,)), HTTP_ACCEPT_ENCODING='gzip')
+
+    assert resp['Content-Encoding'] == 'gzip'
+    assert resp['ETag'] == 'W/' + plain['ETag']
+    assert admin_client.get(reverse('task', args=(task.id,)), HTTP_ACCEPT_ENCODING='gzip',
+                            HTTP_IF_NONE_MATCH=resp['ETag']).status_code == 304
+
+
+@pytest.mark.parametrize('encoding, module', [('br', 'brotli'), ('zstd', 'zstandard')])
+def test_optional_encodings(encoding, module):
+    codec = pytest.importorskip(module)
+    resp = get_response(accept_encoding='gzip;q=0.9, {}'.format(encoding))
+
+    assert resp['Content-Encoding'] == encoding
+    if encoding == 'br':
+        assert codec.decompress(resp.content) == BODY
+    else:
+        assert codec.ZstdDecompressor().decompressobj().decompress(resp.content) == BODY
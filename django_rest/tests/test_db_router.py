@@ -0,0 +1,99 @@
+import pytest
+
+from django.db import connections
+from django.test import override_settings
+from django.urls import reverse
+from django_rest.db_router import PrimaryReplicaRouter, copy_sqlite_database, request_state, is_pinned
+from django_rest.models import Project, Task
+from tests.conftest import get_client, get_employee, get_task
+
+
+@pytest.fixture
+def replica(transactional_db, tmp_path):
+    """A 'replica' alias backed by a SQLite file, refreshed from the primary by calling the fixture."""
+    connections.databases['replica'] = dict(connections.databases['default'],
+                                            NAME=str(tmp_path / 'replica.sqlite3'), TEST={})
+    conf = {'REPLICAS': ['replica'], 'STICKY_SECONDS': 60, 'CACHE_ALIAS': 'default'}
+    with override_settings(DATABASE_REPLICATION=conf):
+        yield lambda: copy_sqlite_database(target='replica')
+    connections['replica'].close()
+    del connections.databases['replica']
+    del connections._connections.replica
+
+
+@pytest.fixture
+def client_employee(replica):
+    employee, _ = get_employee(is_staff=True)
+    return get_client(employee), employee
+
+
+# ROUTER_TESTS #######################################
+
+
+def test_router_reads_from_primary_outside_replica_views(replica):
+    router = PrimaryReplicaRouter()
+    with request_state() as state:
+        assert router.db_for_read(Task) == 'default'
+        state.replica_reads = True
+        assert router.db_for_read(Task) == 'replica'
+        assert router.db_for_write(Task) == 'default'
+    assert state.wrote
+    assert router.db_for_read(Task) == 'default'
+
+
+# REPLICA_READ_TESTS #######################################
+
+
+def test_get_task_from_replica(replica, client_employee):
+    client, _ = client_employee
+    task, _ = get_task()
+    replica()
+    Task.objects.filter(pk=task.pk).update(name='Not replicated yet')
+    resp = client.get(reverse('task', args=(task.id,)))
+
+    assert resp.status_code == 200
+    assert resp.data['name'] == task.name
+    assert resp['X-Cache'] == 'MISS'
+    assert client.get(reverse('task', args=(task.id,)))['X-Cache'] == 'MISS'
+
+
+def test_get_project_not_replicated_404(replica, client_employee):
+    client, _ = client_employee
+    replica()
+    project = Project.objects.create(name='Not replicated yet')
+
+    assert client.get(reverse('project', args=(project.id,))).status_code == 404
+
+
+def test_reads_stick_to_primary_after_write(replica, client_employee):
+    client, employee = client_employee
+    task, _ = get_task()
+    replica()
+    resp = client.patch(reverse('task', args=(task.id,)), data={'name': 'Renamed'}, format='json')
+
+    assert resp.status_code == 200
+    assert is_pinned(employee.user.pk)
+    assert client.get(reverse('task', args=(task.id,))).data['name'] == 'Renamed'
+
+    other_client = get_client(get_employee()[0])
+    resp = other_client.get(reverse('task', args=(task.id,)), {'no_cache': 1})
+    assert resp.data['name'] == task.name
+
+
+def test_failed_write_does_not_pin(replica, client_employee):
+    client, employee = client_employee
+    task, _ = get_task()
+    replica()
+    resp = client.patch(reverse('task', args=(task.id,)), data={'status': 'NOT_VALID'}, format='json')
+
+    assert resp.status_code == 400
+    assert not is_pinned(employee.user.pk)
+
+
+def test_list_reads_from_primary(replica, client_employee):
+    client, _ = client_employee
+    replica()
+    task, _ = get_task()
+    resp = client.get(reverse('task_create'))
+
+    assert [item['id'] for item in resp.data['results']] == [task.id]
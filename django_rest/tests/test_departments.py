@@ -1,5 +1,7 @@
 import pytest
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django_rest.models import Department
 from rest_framework.test import APIClient
@@ -241,3 +243,82 @@ def test_delete_department_unauthorized():
     resp = client.delete(path=url)
 
     assert resp.status_code == 403
+
+
+# LIST_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_list_departments_success(admin_client):
+    department, _ = get_department()
+    resp = admin_client.get(reverse('department_create'))
+
+    assert resp.status_code == 200
+    assert [item['id'] for item in resp.data['results']] == [department.id]
+
+
+@pytest.mark.django_db
+def test_list_departments_no_permissions(client):
+    resp = client.get(reverse('department_create'))
+
+    assert resp.status_code == 403
+
+
+# CONDITIONAL_GET_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_get_department_modified_after_head_deleted(admin_client):
+    department, _ = get_department()
+    url = reverse('department', args=(department.id,))
+    etag = admin_client.get(path=url)['ETag']
+    assert admin_client.get(path=url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    department.head_of_department.delete()
+    resp = admin_client.get(path=url, HTTP_IF_NONE_MATCH=etag)
+
+    assert resp.status_code == 200
+    assert resp.data['head_of_department'] is None
+
+
+@pytest.mark.django_db
+def test_get_department_not_modified_version_lookup(admin_client):
+    department, _ = get_department()
+    url = reverse('department', args=(department.id,))
+    etag = admin_client.get(path=url)['ETag']
+    with CaptureQueriesContext(connection) as queries:
+        resp = admin_client.get(path=url, HTTP_IF_NONE_MATCH=etag)
+
+    assert resp.status_code == 304
+    assert len(queries) == 1
+    assert '"name"' not in queries[0]['sql']
+
+
+@pytest.mark.django_db
+def test_get_department_sparse_fields(admin_client):
+    department, _ = get_department()
+    url = reverse('department', args=(department.id,))
+    admin_client.get(path=url)
+    with CaptureQueriesContext(connection) as queries:
+        resp = admin_client.get(path=url, data={'fields': 'name'})
+
+    assert resp.status_code == 200
+    assert resp.data == {'name': department.name}
+    assert resp.has_header('ETag')
+    assert len(queries) == 1
+    assert '"head_of_department_id"' not in queries[0]['sql']
+
+
+@pytest.mark.django_db
+def test_list_departments_expanded(admin_client):
+    department, _ = get_department()
+    url = reverse('department_create')
+    admin_client.get(path=url)
+    with CaptureQueriesContext(connection) as queries:
+        resp = admin_client.get(path=url, data={'expand': 'head_of_department'})
+    head = resp.data['results'][0]['head_of_department']
+
+    assert resp.status_code == 200
+    assert (head['id'], head['username']) == (department.head_of_department_id,
+                                              department.head_of_department.user.username)
+    assert len(queries) == 1
@@ -1,7 +1,11 @@
 import pytest
+from io import StringIO
 
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from django_rest.models import Employee
+from django_rest.models import Employee, Department
 from rest_framework.test import APIClient
 from tests.conftest import get_employee, get_client
 
@@ -293,3 +297,213 @@ def test_delete_employee_unauthorized():
     resp = client.delete(path=url)
 
     assert resp.status_code == 403
+
+
+# IMPORT_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_import_employees_csv_success(admin_client):
+    url = reverse('employee_import')
+    existing, _ = get_employee()
+    department = Department.objects.create(name='Import department')
+    body = ('username,password,first_name,last_name,birthdate,department\n'
+            f'importer_1,PASSWORD,Ann,Lee,1990-01-01,{department.id}\n'
+            'importer_2,PASSWORD,Bob,Ray,1991-02-02,\n'
+            'importer_1,PASSWORD,Ann,Lee,1990-01-01,\n'
+            f'{existing.user.username},PASSWORD,Cid,Moe,1992-03-03,\n'
+            'importer_3,PASSWORD,Dan,Fox,NOT_VALID_DATE,\n'
+            'importer_4,PASSWORD,Eve,Kim,1993-04-04,999\n')
+    resp = admin_client.post(url, data=body, content_type='text/csv')
+
+    assert resp.status_code == 201
+    assert resp.data['created'] == ['importer_1', 'importer_2']
+    assert resp.data['conflicts'] == ['importer_1', existing.user.username]
+    assert [item['row'] for item in resp.data['skipped']] == [5, 6]
+    employee = Employee.objects.get(user__username='importer_1')
+    assert employee.department == department
+    assert employee.user.check_password('PASSWORD')
+
+
+@pytest.mark.django_db
+def test_import_employees_ndjson_success(admin_client):
+    url = reverse('employee_import')
+    body = ('{"username": "importer_1", "password": "PASSWORD", "first_name": "Ann", '
+            '"last_name": "Lee", "birthdate": "1990-01-01"}\n'
+            '\n'
+            '{"username": "importer_2"}\n')
+    resp = admin_client.post(url, data=body, content_type='application/x-ndjson')
+
+    assert resp.status_code == 201
+    assert resp.data['created'] == ['importer_1']
+    assert resp.data['skipped'][0]['row'] == 3
+
+
+@pytest.mark.django_db
+def test_import_employees_ndjson_not_objects(admin_client):
+    url = reverse('employee_import')
+    body = '[1, 2]\n"importer_1"\n5\nnull\n'
+    resp = admin_client.post(url, data=body, content_type='application/x-ndjson')
+
+    assert resp.status_code == 201
+    assert [(item['row'], item['username']) for item in resp.data['skipped']] == \
+        [(1, None), (2, None), (3, None), (4, None)]
+    assert resp.data['created'] == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('body, error', [(b'username,password\nimporter_1,\xff\xfe\n', 'Row 1 is not valid CSV'),
+                                         (b'username,password\nimporter_1,PASSWORD\nimporter_\r2,PASSWORD\n',
+                                          'Row 2 is not valid CSV')])
+def test_import_employees_csv_not_valid(admin_client, body, error):
+    resp = admin_client.post(reverse('employee_import'), data=body, content_type='text/csv')
+
+    assert resp.status_code == 400
+    assert resp.data['detail'].startswith(error)
+
+
+@pytest.mark.django_db
+def test_import_employees_command_not_valid(tmp_path):
+    path = tmp_path / 'employees.csv'
+    path.write_bytes(b'username,password\n\xff\xfe\n')
+
+    with pytest.raises(CommandError, match='Row 1 is not valid CSV'):
+        call_command('import_employees', str(path), stdout=StringIO(), stderr=StringIO())
+
+
+@pytest.mark.django_db
+def test_import_employees_unsupported_media_type(admin_client):
+    url = reverse('employee_import')
+    resp = admin_client.post(url, data=[], format='json')
+
+    assert resp.status_code == 415
+
+
+@pytest.mark.django_db
+def test_import_employees_no_permissions(client):
+    url = reverse('employee_import')
+    resp = client.post(url, data='username\n', content_type='text/csv')
+
+    assert resp.status_code == 403
+
+
+@pytest.mark.django_db
+def test_import_employees_command(tmp_path):
+    path = tmp_path / 'employees.ndjson'
+    path.write_text(''.join(
+        f'{{"username": "importer_{number}", "password": "PASSWORD", "first_name": "Ann", '
+        f'"last_name": "Lee", "birthdate": "1990-01-01"}}\n' for number in range(5)))
+    call_command('import_employees', str(path), '--chunk-size', '2', '--workers', '2',
+                 stdout=StringIO(), stderr=StringIO())
+
+    assert Employee.objects.filter(user__username__startswith='importer_').count() == 5
+    assert Employee.objects.get(user__username='importer_4').user.check_password('PASSWORD')
+
+
+# LIST_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_list_employees_filter_by_department(admin_client):
+    employee, _ = get_employee()
+    department = Department.objects.create(name='Financial department')
+    employee.department = department
+    employee.save()
+    resp = admin_client.get(reverse('employee_create'), {'department': department.id})
+
+    assert resp.status_code == 200
+    assert [item['username'] for item in resp.data['results']] == [employee.user.username]
+
+
+@pytest.mark.django_db
+def test_list_employees_no_permissions(client):
+    resp = client.get(reverse('employee_create'))
+
+    assert resp.status_code == 403
+
+
+@pytest.mark.django_db
+def test_list_employees_query_count_is_fixed(admin_client):
+    url = reverse('employee_create')
+    get_employee()
+    admin_client.get(url)
+    with CaptureQueriesContext(connection) as few:
+        few_resp = admin_client.get(url)
+    for _ in range(8):
+        get_employee()
+    with CaptureQueriesContext(connection) as many:
+        many_resp = admin_client.get(url)
+
+    assert len(few_resp.data['results']) == 2
+    assert len(many_resp.data['results']) == 10
+    assert len(few) == len(many) == 1
+    assert 'password' not in many[0]['sql']
+
+
+@pytest.mark.django_db
+def test_get_employee_single_query():
+    employee, _ = get_employee()
+    client = get_client(employee)
+    url = reverse('employee', args=(employee.id,))
+    client.get(path=url)
+    with CaptureQueriesContext(connection) as queries:
+        resp = client.get(path=url)
+
+    assert resp.status_code == 200
+    assert resp.data['username'] == employee.user.username
+    assert len(queries) == 1
+
+
+# CONDITIONAL_GET_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_get_employee_not_modified():
+    employee, _ = get_employee()
+    client = get_client(employee)
+    url = reverse('employee', args=(employee.id,))
+    etag = client.get(path=url)['ETag']
+
+    assert client.get(path=url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    employee.user.first_name = 'Renamed'
+    employee.user.save()
+    resp = client.get(path=url, HTTP_IF_NONE_MATCH=etag)
+
+    assert resp.status_code == 200
+    assert resp.data['first_name'] == 'Renamed'
+
+
+@pytest.mark.django_db
+def test_get_employee_not_modified_no_permissions(client):
+    employee, _ = get_employee()
+    url = reverse('employee', args=(employee.id,))
+    resp = client.get(path=url, HTTP_IF_NONE_MATCH='*')
+
+    assert resp.status_code == 403
+
+
+# SPARSE_FIELDS_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_get_employee_sparse_fields():
+    employee, _ = get_employee()
+    client = get_client(employee)
+    url = reverse('employee', args=(employee.id,))
+    client.get(path=url)
+    with CaptureQueriesContext(connection) as queries:
+        resp = client.get(path=url, data={'fields': 'birthdate'})
+
+    assert resp.status_code == 200
+    assert resp.data == {'birthdate': '1988-12-12'}
+    assert len(queries) == 1
+    assert 'auth_user' not in queries[0]['sql']
+
+
+@pytest.mark.django_db
+def test_list_employees_exclude(admin_client):
+    resp = admin_client.get(reverse('employee_create'), data={'exclude': 'first_name,last_name,birthdate'})
+
+    assert resp.status_code == 200
+    assert all(set(item) == {'id', 'username', 'department'} for item in resp.data['results'])
@@ -0,0 +1,215 @@
+import os
+import stat
+import pytest
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django_rest import jobs
+from django_rest.jobs import JobRun, LeaseLost, Worker, enqueue, stage_rows
+from django_rest.models import Employee, Job, Project, Task
+from tests.conftest import get_client, get_employee, get_task
+
+JOB_QUEUE = {'LEASE_SECONDS': 60, 'POLL_INTERVAL': 0, 'RETRY_DELAY': 0, 'MAX_ATTEMPTS': 2}
+
+
+@pytest.fixture
+def test_jobs(monkeypatch):
+    calls = []
+
+    def record(run, label):
+        calls.append(label)
+        return {'label': label}
+
+    def fail(run):
+        raise ValueError('failed on purpose')
+
+    monkeypatch.setitem(jobs.registry, 'record', jobs.job('record')(record))
+    monkeypatch.setitem(jobs.registry, 'fail', jobs.job('fail')(fail))
+    return calls
+
+
+# ASYNC_VIEW_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_delete_employee_async(admin_client):
+    employee, _ = get_employee()
+    resp = admin_client.delete(reverse('employee', args=(employee.id,)), HTTP_PREFER='respond-async')
+    job_url = resp['Location']
+
+    assert resp.status_code == 202
+    assert resp.data['status'] == 'queued'
+    assert Employee.objects.filter(pk=employee.pk).exists()
+    assert admin_client.get(job_url).data['status'] == 'queued'
+
+    assert Worker().run(burst=True) == 1
+    resp = admin_client.get(job_url)
+
+    assert resp.data['status'] == 'succeeded'
+    assert resp.data['progress'] == {'done': 1, 'total': 1}
+    assert resp.data['result']['per_model']['django_rest.Employee'] == 1
+    assert not Employee.objects.filter(pk=employee.pk).exists()
+
+
+@pytest.mark.django_db
+def test_delete_project_async(admin_client):
+    task, _ = get_task()
+    resp = admin_client.delete(reverse('project', args=(task.project_id,)), HTTP_PREFER='respond-async')
+    Worker().run(burst=True)
+
+    assert resp.status_code == 202
+    assert not Project.objects.filter(pk=task.project_id).exists()
+    assert not Task.objects.filter(pk=task.pk).exists()
+
+
+@pytest.mark.django_db
+def test_delete_without_prefer_is_synchronous(admin_client):
+    task, _ = get_task()
+    resp = admin_client.delete(reverse('project', args=(task.project_id,)))
+
+    assert resp.status_code == 204
+    assert not Job.objects.exists()
+
+
+@pytest.mark.django_db
+def test_import_employees_async(admin_client, tmp_path):
+    staging = tmp_path / 'staging'
+    body = 'username,password,first_name,last_name,birthdate\n' + ''.join(
+        'importer_{},SECRET_{},Ann,Lee,1990-01-01\n'.format(number, number) for number in range(3))
+    with override_settings(JOB_QUEUE=dict(settings.JOB_QUEUE, STAGING_DIR=str(staging))):
+        resp = admin_client.post(reverse('employee_import'), data=body, content_type='text/csv',
+                                 HTTP_PREFER='respond-async')
+    staged, = staging.iterdir()
+
+    assert resp.status_code == 202
+    assert 'SECRET' not in Job.objects.get(pk=resp.data['id']).payload
+    assert stat.S_IMODE(staged.stat().st_mode) == 0o600
+
+    Worker().run(burst=True)
+    job = admin_client.get(resp['Location']).data
+
+    assert job['status'] == 'succeeded'
+    assert job['progress'] == {'done': 3, 'total': 3}
+    assert job['result']['created'] == ['importer_0', 'importer_1', 'importer_2']
+    assert Employee.objects.filter(user__username__startswith='importer_').count() == 3
+    assert Job.objects.get(pk=resp.data['id']).payload == '{}'
+    assert list(staging.iterdir()) == []
+
+
+@pytest.mark.django_db
+def test_import_employees_async_staged_until_failed(tmp_path, monkeypatch):
+    with override_settings(JOB_QUEUE=dict(JOB_QUEUE, STAGING_DIR=str(tmp_path / 'staging'))):
+        path, rows = stage_rows(iter([(1, {'username': 'a'})]))
+        monkeypatch.setattr(jobs, 'EmployeeImporter', None)
+        job = enqueue('employee_import', {'path': path, 'rows': rows}, max_attempts=2)
+        worker = Worker()
+
+        assert rows == 1
+        assert worker.run_job(worker.lease_next()) == 'retried'
+        assert os.path.exists(path)
+        assert worker.run_job(worker.lease_next()) == 'failed'
+        assert not os.path.exists(path)
+    job.refresh_from_db()
+    assert job.payload == '{}'
+
+
+@pytest.mark.django_db
+def test_job_visible_to_its_owner_and_staff(admin_client, test_jobs):
+    owner, _ = get_employee()
+    other, _ = get_employee()
+    job = enqueue('record', {'label': 'a'}, user=owner.user)
+    url = reverse('job', args=(job.pk,))
+
+    assert get_client(owner).get(url).status_code == 200
+    assert get_client(other).get(url).status_code == 404
+    assert admin_client.get(url).status_code == 200
+
+
+# WORKER_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_jobs_run_by_priority(test_jobs):
+    for label, priority in (('low', -1), ('first normal', 0), ('high', 5), ('second normal', 0)):
+        enqueue('record', {'label': label}, priority=priority)
+
+    assert Worker().run(burst=True) == 4
+    assert test_jobs == ['high', 'first normal', 'second normal', 'low']
+    assert set(Job.objects.values_list('status', flat=True)) == {'succeeded'}
+
+
+@pytest.mark.django_db
+@override_settings(JOB_QUEUE=JOB_QUEUE)
+def test_failed_job_retried_then_failed(test_jobs):
+    job = enqueue('fail')
+    worker = Worker()
+
+    assert worker.run_job(worker.lease_next()) == 'retried'
+    job.refresh_from_db()
+    assert (job.status, job.attempts) == ('queued', 1)
+    assert 'failed on purpose' in job.error
+
+    assert worker.run_job(worker.lease_next()) == 'failed'
+    job.refresh_from_db()
+    assert (job.status, job.attempts) == ('failed', 2)
+    assert worker.lease_next() is None
+
+
+@pytest.mark.django_db
+@override_settings(JOB_QUEUE=dict(JOB_QUEUE, RETRY_DELAY=60))
+def test_retry_waits_for_backoff(test_jobs):
+    enqueue('fail')
+    worker = Worker()
+    worker.run_job(worker.lease_next())
+
+    assert worker.lease_next() is None
+
+
+@pytest.mark.django_db
+@override_settings(JOB_QUEUE=JOB_QUEUE)
+def test_expired_lease_requeued(test_jobs):
+    enqueue('record', {'label': 'a'})
+    crashed, other = Worker(), Worker()
+    job = crashed.lease_next()
+    Job.objects.filter(pk=job.pk).update(leased_until=timezone.now() - timedelta(seconds=1))
+
+    leased = other.lease_next()
+
+    assert (leased.pk, leased.attempts, leased.lease_owner) == (job.pk, 2, other.name)
+    with pytest.raises(LeaseLost):
+        JobRun(crashed, job).progress(1)
+    JobRun(other, leased).progress(1, 2)
+    leased.refresh_from_db()
+    assert (leased.progress_done, leased.progress_total) == (1, 2)
+
+
+@pytest.mark.django_db
+@override_settings(JOB_QUEUE=JOB_QUEUE)
+def test_expired_lease_of_last_attempt_fails(test_jobs):
+    job = enqueue('record', {'label': 'a'}, max_attempts=1)
+    Worker().lease_next()
+    Job.objects.filter(pk=job.pk).update(leased_until=timezone.now() - timedelta(seconds=1))
+
+    assert Worker().lease_next() is None
+    job.refresh_from_db()
+    assert (job.status, job.error, job.payload) == ('failed', 'Lease expired', '{}')
+
+
+@pytest.mark.django_db
+def test_worker_command(test_jobs):
+    enqueue('record', {'label': 'a'})
+    enqueue('record', {'label': 'b'})
+    call_command('worker', '--burst', stderr=StringIO())
+
+    assert test_jobs == ['a', 'b']
+
+
+@pytest.mark.django_db
+def test_enqueue_unknown_job():
+    with pytest.raises(KeyError):
+        enqueue('no such job')
@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from django.urls import reverse
+from prometheus_client import CollectorRegistry, generate_latest
+from prometheus_client.multiprocess import MultiProcessCollector
+from prometheus_client.parser import text_string_to_metric_families
+from tests.conftest import get_task
+
+
+def get_samples(text):
+    return {(sample.name, tuple(sorted(sample.labels.items()))): sample.value
+            for family in text_string_to_metric_families(text) for sample in family.samples}
+
+
+def get_sample(samples, name, **labels):
+    return samples.get((name, tuple(sorted(labels.items()))), 0)
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(admin_client):
+    task, _ = get_task()
+    before = get_samples(admin_client.get(reverse('metrics')).content.decode())
+    admin_client.patch(reverse('task', args=(task.id,)), data={'status': 'done'}, format='json')
+    admin_client.get(reverse('task', args=(task.id + 1000,)))
+    resp = admin_client.get(reverse('metrics'))
+    after = get_samples(resp.content.decode())
+
+    def delta(name, **labels):
+        return get_sample(after, name, **labels) - get_sample(before, name, **labels)
+
+    assert resp.status_code == 200
+    assert resp['Content-Type'].startswith('text/plain')
+    assert delta('http_requests_total', url_name='task', method='PATCH', status='200') == 1
+    assert delta('http_requests_total', url_name='task', method='GET', status='404') == 1
+    assert delta('http_request_duration_seconds_count', url_name='task', method='PATCH') == 1
+    assert delta('http_request_db_queries_count', url_name='task') == 2
+    assert delta('http_request_db_queries_sum', url_name='task') > 0
+    assert delta('db_query_duration_seconds_count', alias='default') > 0
+    assert delta('signal_receiver_duration_seconds_count', receiver='task_post_save_receiver') == 1
+
+
+@pytest.mark.django_db
+def test_metrics_unmatched_url(client):
+    before = get_samples(client.get(reverse('metrics')).content.decode())
+    client.get('/no/such/url/')
+    after = get_samples(client.get(reverse('metrics')).content.decode())
+    labels = {'url_name': '<unmatched>', 'method': 'GET', 'status': '404'}
+
+    assert get_sample(after, 'http_requests_total', **labels) - get_sample(before, 'http_requests_total', **labels) == 1
+
+
+WORKER = '''
+from django_rest import metrics
+metrics.REQUESTS.labels('task', 'GET', 200).inc({count})
+metrics.REQUEST_DURATION.labels('task', 'GET').observe(0.01)
+'''
+
+
+def test_metrics_aggregated_across_processes(tmp_path):
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path), DJANGO_SETTINGS_MODULE='settings')
+    for count in (1, 2, 3):
+        subprocess.run([sys.executable, '-c', 'import django; django.setup()\n' + WORKER.format(count=count)],
+                       env=env, check=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry, path=str(tmp_path))
+    samples = get_samples(generate_latest(registry).decode())
+
+    assert get_sample(samples, 'http_requests_total', url_name='task', method='GET', status='200') == 6
+    assert get_sample(samples, 'http_request_duration_seconds_count', url_name='task', method='GET') == 3
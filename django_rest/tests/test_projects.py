@@ -1,9 +1,14 @@
 import pytest
+from io import StringIO
 
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.urls import reverse
-from django_rest.models import Project
+from django_rest.models import Project, ProjectStats, Task
+from django_rest.serializers import ProjectSerializer
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
-from tests.conftest import get_project
+from tests.conftest import get_employee, get_project
 
 
 @pytest.mark.django_db
@@ -204,3 +209,159 @@ def test_delete_project_unauthorized():
     resp = client.delete(path=url)
 
     assert resp.status_code == 403
+
+
+# LIST_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_list_projects_success(admin_client):
+    project, _ = get_project()
+    Project.objects.create(name='Another project')
+    resp = admin_client.get(reverse('project_create'), {'ordering': 'name'})
+
+    assert resp.status_code == 200
+    assert [item['name'] for item in resp.data['results']] == ['Another project', project.name]
+
+
+@pytest.mark.django_db
+def test_list_projects_filter_by_manager(admin_client):
+    project, _ = get_project()
+    Project.objects.create(name='Another project')
+    resp = admin_client.get(reverse('project_create'), {'project_manager': project.project_manager_id})
+
+    assert [item['id'] for item in resp.data['results']] == [project.id]
+
+
+# CONDITIONAL_GET_TESTS #######################################
+
+
+@pytest.mark.django_db(transaction=True)
+def test_get_project_modified_after_task_rollup(admin_client):
+    project, _ = get_project()
+    url = reverse('project', args=(project.id,))
+    etag = admin_client.get(path=url)['ETag']
+    Task.objects.create(name='Task', project=project, status='new',
+                        start_date='2020-01-01', end_date='2020-02-01')
+    resp = admin_client.get(path=url, HTTP_IF_NONE_MATCH=etag)
+
+    assert resp.status_code == 200
+    assert resp.data['start_date'] == '2020-01-01'
+    assert admin_client.get(path=url, HTTP_IF_NONE_MATCH=resp['ETag']).status_code == 304
+
+
+# FAST_READ_TESTS #######################################
+
+
+@pytest.mark.django_db(transaction=True)
+def test_get_project_fast_read_matches_serializer(admin_client):
+    project, _ = get_project()
+    empty = Project.objects.create(name='Empty project')
+    Task.objects.create(name='Task', project=project, status='new',
+                        start_date='2020-01-01', end_date='2020-02-01')
+    renderer = JSONRenderer()
+
+    for instance in (project, empty):
+        instance.refresh_from_db()
+        resp = admin_client.get(path=reverse('project', args=(instance.id,)), HTTP_ACCEPT='application/json')
+
+        assert resp.content == renderer.render(ProjectSerializer(instance).data)
+
+
+# STATS_TESTS #######################################
+
+
+def get_stats(project):
+    rows = ProjectStats.objects.filter(project=project).exclude(count=0).values_list('status', 'executor_id', 'count')
+    return {(status, executor_id): count for status, executor_id, count in rows}
+
+
+@pytest.mark.django_db
+def test_project_stats_follow_task_changes(admin_client):
+    project, _ = get_project()
+    other = Project.objects.create(name='Other project')
+    executor, _ = get_employee()
+    task = Task.objects.create(name='Task', project=project, status='new')
+    Task.objects.create(name='Task', project=project, status='new', executor=executor)
+    assert get_stats(project) == {('new', None): 1, ('new', executor.id): 1}
+
+    admin_client.patch(reverse('task', args=(task.id,)), data={'status': 'done', 'executor': executor.id},
+                       format='json')
+    assert get_stats(project) == {('done', executor.id): 1, ('new', executor.id): 1}
+
+    admin_client.patch(reverse('task', args=(task.id,)), data={'project': other.id}, format='json')
+    assert get_stats(project) == {('new', executor.id): 1}
+    assert get_stats(other) == {('done', executor.id): 1}
+
+    admin_client.delete(reverse('task', args=(task.id,)))
+    assert get_stats(other) == {}
+
+    executor.user.delete()
+    assert get_stats(project) == {('new', None): 1}
+
+
+@pytest.mark.django_db
+def test_project_stats_bulk_create(admin_client):
+    project, _ = get_project()
+    body = [{'name': 'Task', 'project': project.id, 'status': status} for status in ('new', 'new', 'done')]
+    admin_client.post(reverse('task_bulk_create'), data=body, format='json')
+
+    assert get_stats(project) == {('new', None): 2, ('done', None): 1}
+
+
+@pytest.mark.django_db
+def test_get_project_stats_success(admin_client):
+    project, _ = get_project()
+    executor, _ = get_employee()
+    for status, task_executor in (('new', None), ('done', executor), ('done', executor), ('started', executor)):
+        Task.objects.create(name='Task', project=project, status=status, executor=task_executor)
+    resp = admin_client.get(reverse('project_stats', args=(project.id,)))
+
+    assert resp.status_code == 200
+    assert resp.data == {
+        'project': project.id, 'total': 4, 'statuses': {'new': 1, 'started': 1, 'done': 2},
+        'executors': [
+            {'executor': executor.id, 'total': 3, 'statuses': {'new': 0, 'started': 1, 'done': 2}},
+            {'executor': None, 'total': 1, 'statuses': {'new': 1, 'started': 0, 'done': 0}},
+        ]}
+
+
+@pytest.mark.django_db
+def test_get_project_stats_empty(admin_client):
+    project, _ = get_project()
+    resp = admin_client.get(reverse('project_stats', args=(project.id,)))
+
+    assert resp.status_code == 200
+    assert resp.data['total'] == 0
+    assert resp.data['executors'] == []
+
+
+@pytest.mark.django_db
+def test_get_project_stats_object_does_not_exist(admin_client):
+    resp = admin_client.get(reverse('project_stats', args=(10000,)))
+
+    assert resp.status_code == 404
+
+
+@pytest.mark.django_db
+def test_get_project_stats_unauthorized():
+    project, _ = get_project()
+    resp = APIClient().get(reverse('project_stats', args=(project.id,)))
+
+    assert resp.status_code == 403
+
+
+@pytest.mark.django_db
+def test_rebuild_project_stats_command():
+    project, _ = get_project()
+    Task.objects.create(name='Task', project=project, status='new')
+    call_command('rebuild_project_stats', '--check', stdout=StringIO(), stderr=StringIO())
+
+    Task.objects.filter(project=project).update(status='done')
+    with pytest.raises(CommandError):
+        call_command('rebuild_project_stats', '--check', stdout=StringIO(), stderr=StringIO())
+    out = StringIO()
+    call_command('rebuild_project_stats', stdout=out, stderr=StringIO())
+
+    assert 'status=done executor=None: counted 0, expected 1' in out.getvalue()
+    assert get_stats(project) == {('done', None): 1}
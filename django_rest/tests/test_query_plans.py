@@ -0,0 +1,121 @@
+import re
+import pytest
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django_rest.models import Employee, Project, ProjectStats, Task, count_project_stats, \
+    rebuild_project_stats, recompute_project_dates
+from tests.conftest import get_client, get_employee
+
+pytestmark = pytest.mark.skipif(connection.vendor != 'sqlite', reason='EXPLAIN QUERY PLAN is SQLite syntax')
+
+# A plan step reading a table: "SEARCH" looks up a range of an index, "SCAN" reads all of the
+# table or, "USING [COVERING] INDEX", all of an index, which is no better for a filter.
+FULL_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)')
+
+
+@pytest.fixture
+def seeded():
+    employees = [Employee.objects.create(user=User.objects.create(username='seed-{}'.format(number)),
+                                         birthdate='1988-12-12') for number in range(20)]
+    projects = [Project.objects.create(name='Project {}'.format(number)) for number in range(50)]
+    start = date(2020, 1, 1)
+    Task.objects.bulk_create(
+        (Task(name='Task {}'.format(number), project=projects[number % len(projects)],
+              executor=employees[number % len(employees)] if number % 7 else None,
+              status=('new', 'started', 'done')[number % 3],
+              start_date=start + timedelta(days=number % 300), end_date=start + timedelta(days=number % 300 + 30))
+         for number in range(5000)),
+        batch_size=500)
+    rebuild_project_stats()
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return {'executor': employees[1], 'project': projects[1], 'projects': projects}
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def assert_no_full_scan(func, *indexes):
+    """Run `func`, EXPLAIN every SELECT it made and fail unless each one reads tables through index searches."""
+    with CaptureQueriesContext(connection) as queries:
+        func()
+    plans = [query_plan(query['sql']) for query in queries if query['sql'].startswith('SELECT')]
+    steps = [step for plan in plans for step in plan]
+
+    assert plans
+    assert [step for step in steps if FULL_SCAN.match(step)] == []
+    for index in indexes:
+        assert [step for step in steps if index in step], '{} not used: {}'.format(index, steps)
+
+
+@pytest.mark.django_db
+def test_index_walk_is_a_full_scan(seeded):
+    # No index answers the LIKE, SQLite walks the whole ordering index and filters each row.
+    query = Task.objects.filter(name__startswith='Task 1').order_by('executor_id', 'status')[:10]
+
+    with pytest.raises(AssertionError, match='SCAN django_rest_task USING INDEX task_executor_status_idx'):
+        assert_no_full_scan(lambda: list(query))
+
+
+# ROLLUP_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_project_dates_rollup_plan(seeded):
+    project_ids = [project.id for project in seeded['projects'][:5]]
+
+    assert_no_full_scan(lambda: recompute_project_dates(project_ids), 'task_project_dates_idx')
+
+
+@pytest.mark.django_db
+def test_project_stats_count_plan(seeded):
+    assert_no_full_scan(lambda: count_project_stats([seeded['project'].id]))
+
+
+# TASK_LIST_TESTS #######################################
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('get_params, index', [
+    (lambda seeded: {'executor': seeded['executor'].id, 'status': 'done'}, 'task_executor_status_idx'),
+    (lambda seeded: {'status': 'started'}, 'task_status_id_idx'),
+    (lambda seeded: {'project': seeded['project'].id}, None),
+    (lambda seeded: {'executor': seeded['executor'].id}, None),
+], ids=['executor-status', 'status', 'project', 'executor'])
+def test_task_list_plan(seeded, get_params, index):
+    client = get_client(get_employee()[0])
+    params = get_params(seeded)
+    url = reverse('task_create')
+
+    assert_no_full_scan(lambda: client.get(url, params), *filter(None, (index,)))
+
+
+# PROJECT_STATS_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_project_stats_plan(seeded):
+    client = get_client(get_employee()[0])
+    url = reverse('project_stats', args=(seeded['project'].id,))
+
+    assert_no_full_scan(lambda: client.get(url))
+
+
+@pytest.mark.django_db
+def test_employee_stats_fold_plan(seeded):
+    assert_no_full_scan(lambda: ProjectStats.objects.filter(executor=seeded['executor']).exists())
+
+
+# DELETE_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_project_delete_plan(seeded):
+    assert_no_full_scan(seeded['project'].delete, 'task_project_dates_idx')
@@ -0,0 +1,68 @@
+import msgpack
+import pytest
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from io import BytesIO
+from uuid import uuid4
+
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from django_rest.parsers import ORJSONParser, MessagePackParser
+from django_rest.renderers import ORJSONRenderer
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+from tests.conftest import get_task
+
+PAYLOAD = ReturnDict([
+    ('id', 1), ('name', 'Roll cages   é'), ('start_date', date(2020, 4, 30)),
+    ('updated_at', datetime(2020, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)),
+    ('budget', Decimal('10.50')), ('uuid', uuid4()), ('label', gettext_lazy('Done')),
+    ('tags', ('a', 'b')), ('scores', {1: 2.5}), ('executor', None),
+], serializer=None)
+
+
+def test_orjson_renderer_matches_json_renderer():
+    assert ORJSONRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+
+
+def test_orjson_renderer_indent_matches_json_renderer():
+    media_type = 'application/json; indent=4'
+
+    assert ORJSONRenderer().render(PAYLOAD, media_type) == JSONRenderer().render(PAYLOAD, media_type)
+
+
+def test_orjson_parser_success():
+    assert ORJSONParser().parse(BytesIO(b'{"name": "Roll cages", "ids": [1, 2]}')) == \
+        {'name': 'Roll cages', 'ids': [1, 2]}
+
+
+@pytest.mark.parametrize('body', [b'{"name": ', b'{"value": NaN}'])
+def test_orjson_parser_not_valid(body):
+    with pytest.raises(ParseError):
+        ORJSONParser().parse(BytesIO(body))
+
+
+def test_msgpack_parser_not_valid():
+    with pytest.raises(ParseError):
+        MessagePackParser().parse(BytesIO(b'\xc1'))
+
+
+@pytest.mark.django_db
+def test_get_task_msgpack(admin_client):
+    task, _ = get_task()
+    url = reverse('task', args=(task.id,))
+    resp = admin_client.get(path=url, HTTP_ACCEPT='application/msgpack')
+
+    assert resp['Content-Type'] == 'application/msgpack'
+    assert msgpack.unpackb(resp.content, raw=False) == admin_client.get(path=url).json()
+
+
+@pytest.mark.django_db
+def test_create_task_msgpack(admin_client):
+    task, body = get_task()
+    resp = admin_client.post(reverse('task_create'), data=msgpack.packb(body),
+                             content_type='application/msgpack')
+
+    assert resp.status_code == 201
+    assert resp.data['name'] == body['name']
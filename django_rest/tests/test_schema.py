@@ -0,0 +1,81 @@
+import json
+import logging
+import pytest
+
+from django.core.management import call_command
+from django_rest.schema import SchemaFile, FINGERPRINT_KEY, source_fingerprint
+from rest_framework.test import APIClient
+from urls import schema_view
+
+
+@pytest.fixture
+def schema_file(tmp_path, monkeypatch):
+    schema_file = SchemaFile(str(tmp_path / 'openapi.json'), schema_view.generator_class, schema_view.schema_file.info)
+    monkeypatch.setattr(schema_view, 'schema_file', schema_file)
+    return schema_file
+
+
+def test_get_schema_success(schema_file):
+    resp = APIClient().get('/', {'format': 'openapi'})
+    spec = json.loads(resp.content)
+
+    assert resp.status_code == 200
+    assert resp['ETag']
+    assert 'max-age=86400' in resp['Cache-Control']
+    assert '/task/bulk/' in spec['paths']
+    assert spec[FINGERPRINT_KEY] == source_fingerprint()
+
+
+def test_get_schema_not_modified(schema_file):
+    etag = APIClient().get('/', {'format': 'openapi'})['ETag']
+    resp = APIClient().get('/', {'format': 'openapi'}, HTTP_IF_NONE_MATCH=etag)
+
+    assert resp.status_code == 304
+
+
+def test_get_schema_yaml(schema_file):
+    resp = APIClient().get('/', {'format': '.yaml'})
+
+    assert resp.status_code == 200
+    assert b'/task/bulk/' in resp.content
+
+
+def test_get_schema_ui(schema_file):
+    assert APIClient().get('/').status_code == 200
+    assert APIClient().get('/redoc/').status_code == 200
+
+
+def test_schema_generated_once(schema_file, monkeypatch):
+    schema_file.load()
+    monkeypatch.setattr(SchemaFile, 'generate', lambda *args: pytest.fail('regenerated'))
+    fresh = SchemaFile(schema_file.path, schema_file.generator_class, schema_file.info)
+
+    assert fresh.load()[1] == schema_file.load()[1]
+
+
+def test_schema_regenerated_when_sources_change(schema_file, monkeypatch):
+    schema_file.load()
+    monkeypatch.setattr('django_rest.schema.source_fingerprint', lambda: 'changed')
+    fresh = SchemaFile(schema_file.path, schema_file.generator_class, schema_file.info)
+    fresh.load()
+
+    with open(schema_file.path) as generated:
+        assert json.load(generated)[FINGERPRINT_KEY] == 'changed'
+
+
+def test_generate_schema_command(schema_file, capsys):
+    call_command('generate_schema')
+
+    with open(schema_file.path) as generated:
+        assert '/task/bulk/' in json.load(generated)['paths']
+
+
+def test_schema_views_inspected(schema_file, caplog):
+    with caplog.at_level(logging.WARNING, logger='drf_yasg'):
+        schema_file.generate()
+    with open(schema_file.path) as generated:
+        spec = json.load(generated)
+
+    assert not caplog.records
+    task = spec['definitions']['Task']['properties']
+    assert {'executor', 'project', 'name', 'status'} <= set(task)
@@ -0,0 +1,99 @@
+import pytest
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.db.models import Max, Min
+from django.urls import reverse
+from django_rest.models import Department, Employee, Project, ProjectStats, Task, count_project_stats
+from django_rest.seed import PASSWORD, seed
+from rest_framework.test import APIClient
+
+
+def get_task_indexes():
+    with connection.cursor() as cursor:
+        return {name: constraint['columns']
+                for name, constraint in connection.introspection.get_constraints(cursor, Task._meta.db_table).items()
+                if constraint['index']}
+
+
+@pytest.mark.django_db
+def test_seed_command():
+    indexes = get_task_indexes()
+    stdout = StringIO()
+    call_command('seed', '--departments', 3, '--employees', 40, '--projects', 7, '--tasks', 1000,
+                 '--chunk-size', 300, stdout=stdout, stderr=StringIO())
+
+    assert stdout.getvalue().splitlines() == ['department: 3', 'employee: 40', 'project: 7', 'task: 1000', 'user: 40']
+    assert (User.objects.count(), Employee.objects.count(), Department.objects.count(), Project.objects.count(),
+            Task.objects.count()) == (40, 40, 3, 7, 1000)
+    assert get_task_indexes() == indexes
+    assert {(stats.project_id, stats.status, stats.executor_id): stats.count
+            for stats in ProjectStats.objects.all()} == count_project_stats()
+    dates = {row['project']: (row['start'], row['end'])
+             for row in Task.objects.values('project').annotate(start=Min('start_date'), end=Max('end_date'))}
+    assert {project.id: (project.start_date, project.end_date) for project in Project.objects.all()} == dates
+    for department in Department.objects.all():
+        assert department.head_of_department.department_id == department.id
+    assert Task.objects.filter(start_date__gt='2021-01-01', status='new').exists()
+    assert not Task.objects.filter(start_date__gt='2021-01-01').exclude(status='new').exists()
+
+
+@pytest.mark.django_db
+def test_seed_users_not_staff():
+    call_command('seed', '--departments', 1, '--employees', 3, '--projects', 1, '--tasks', 10,
+                 stdout=StringIO(), stderr=StringIO())
+
+    assert User.objects.count() == 3
+    assert not User.objects.filter(is_staff=True).exists() and not User.objects.filter(is_superuser=True).exists()
+
+
+@pytest.mark.django_db
+def test_seed_users_log_in():
+    ids = seed(departments=1, employees=3, projects=1, tasks=10, superuser=True)
+    admin = User.objects.get(pk=ids['user'][0])
+    resp = APIClient().post(reverse('token_obtain_pair'), data={'username': admin.username, 'password': PASSWORD},
+                            format='json')
+
+    assert admin.is_superuser
+    assert not User.objects.filter(pk__in=ids['user'][1:], is_staff=True).exists()
+    assert resp.status_code == 200
+
+
+@pytest.mark.django_db
+def test_seed_again_is_reproducible():
+    first = seed(departments=2, employees=10, projects=3, tasks=200, random_seed=7)
+    second = seed(departments=2, employees=10, projects=3, tasks=200, random_seed=7)
+
+    def tasks(ids):
+        project_numbers = {project_id: number for number, project_id in enumerate(ids['project'])}
+        return [(name, project_numbers[project_id], status, start_date, end_date)
+                for name, project_id, status, start_date, end_date in Task.objects.filter(pk__in=ids['task'])
+                .order_by('pk').values_list('name', 'project_id', 'status', 'start_date', 'end_date')]
+
+    assert User.objects.filter(username__startswith='seed-employee-').count() == 20
+    assert Project.objects.filter(name__startswith='Seed project ').count() == 6
+    assert tasks(first) == tasks(second)
+
+
+@pytest.mark.django_db
+def test_seed_again_after_delete():
+    first = seed(departments=2, employees=3, projects=2, tasks=10)
+    User.objects.filter(pk=first['user'][0]).delete()
+    Department.objects.filter(pk=first['department'][0]).delete()
+    Project.objects.filter(pk=first['project'][0]).delete()
+    second = seed(departments=2, employees=3, projects=2, tasks=10)
+
+    assert list(User.objects.filter(pk__in=second['user']).values_list('username', flat=True)) == \
+        ['seed-employee-3', 'seed-employee-4', 'seed-employee-5']
+    assert list(Department.objects.filter(pk__in=second['department']).values_list('name', flat=True)) == \
+        ['Seed department 2', 'Seed department 3']
+    assert list(Project.objects.filter(pk__in=second['project']).values_list('name', flat=True)) == \
+        ['Seed project 2', 'Seed project 3']
+
+
+@pytest.mark.django_db
+def test_seed_tasks_need_projects():
+    with pytest.raises(CommandError):
+        call_command('seed', '--projects', 0, '--tasks', 10, stdout=StringIO(), stderr=StringIO())
@@ -1,9 +1,18 @@
+import json
 import pytest
+from base64 import urlsafe_b64encode
+from datetime import date
+from unittest import mock
 
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from django_rest.models import Task
+from django_rest.models import Project, Task
+from django_rest.response_cache import response_cache
+from django_rest.serializers import TaskSerializer
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
-from tests.conftest import get_task
+from tests.conftest import get_employee, get_task
 
 
 @pytest.mark.django_db
@@ -196,3 +205,589 @@ def test_delete_task_unauthorized():
     resp = client.delete(path=url)
 
     assert resp.status_code == 403
+
+
+# PROJECT_DATES_TESTS #######################################
+
+
+@pytest.mark.django_db(transaction=True)
+def test_create_task_updates_project_dates(admin_client):
+    task, body = get_task()
+    body.update({'start_date': '2020-03-01', 'end_date': '2020-09-30'})
+    resp = admin_client.post(reverse('task_create'), data=body, format='json')
+    project = Project.objects.get(pk=task.project_id)
+
+    assert resp.status_code == 201
+    assert str(project.start_date) == '2020-03-01'
+    assert str(project.end_date) == '2020-09-30'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_project_dates_recomputed_once_per_transaction():
+    task, _ = get_task()
+    with CaptureQueriesContext(connection) as queries:
+        with transaction.atomic():
+            for day in range(1, 21):
+                Task.objects.create(name='Task', project=task.project, status='new',
+                                    start_date=date(2020, 1, day), end_date=date(2020, 12, day))
+    project = Project.objects.get(pk=task.project_id)
+
+    rollup_queries = [query['sql'] for query in queries
+                      if 'MIN(' in query['sql'] or '"django_rest_project"' in query['sql']]
+
+    assert len(rollup_queries) == 3  # aggregate, current dates and a single update
+    assert project.start_date == date(2020, 1, 1)
+    assert project.end_date == date(2020, 12, 20)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_project_dates_not_recomputed_after_rollback():
+    task, _ = get_task()
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            Task.objects.create(name='Task', project=task.project, status='new',
+                                start_date=date(2019, 1, 1), end_date=date(2021, 1, 1))
+            raise RuntimeError
+    Task.objects.filter(pk=task.pk).update(start_date=date(2020, 5, 1))
+    with transaction.atomic():
+        Task.objects.get(pk=task.pk).save()
+    project = Project.objects.get(pk=task.project_id)
+
+    assert project.start_date == date(2020, 5, 1)
+    assert str(project.end_date) == '2020-05-31'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_delete_task_updates_project_dates(admin_client):
+    task, _ = get_task()
+    Task.objects.create(name='Task', project=task.project, status='new',
+                        start_date=date(2020, 1, 1), end_date=date(2020, 2, 1))
+    resp = admin_client.delete(path=reverse('task', args=(task.id,)))
+    project = Project.objects.get(pk=task.project_id)
+
+    assert resp.status_code == 204
+    assert project.start_date == date(2020, 1, 1)
+    assert project.end_date == date(2020, 2, 1)
+
+    Task.objects.filter(project=project).delete()
+    project.refresh_from_db()
+
+    assert project.start_date is None
+    assert project.end_date is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_move_task_updates_both_projects(admin_client):
+    task, _ = get_task()
+    old_project = task.project
+    new_project = Project.objects.create(name='Other project')
+    resp = admin_client.patch(reverse('task', args=(task.id,)), data={'project': new_project.id},
+                              format='json')
+    old_project.refresh_from_db()
+    new_project.refresh_from_db()
+
+    assert resp.status_code == 200
+    assert old_project.start_date is None
+    assert str(new_project.start_date) == '2020-04-30'
+    assert str(new_project.end_date) == '2020-05-31'
+
+
+# BULK_CREATE_TESTS #######################################
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bulk_create_tasks_success(admin_client):
+    url = reverse('task_bulk_create')
+    task, _ = get_task()
+    executor, _ = get_employee()
+    body = [{'name': f'Task {day}', 'project': task.project_id, 'executor': executor.id,
+             'start_date': f'2020-01-{day:02}', 'end_date': f'2020-12-{day:02}', 'status': 'new'}
+            for day in range(1, 31)]
+    with CaptureQueriesContext(connection) as queries:
+        resp = admin_client.post(url, data=body, format='json')
+    project = Project.objects.get(pk=task.project_id)
+    fk_queries = [query['sql'] for query in queries if ' IN (' in query['sql']]
+
+    assert resp.status_code == 201
+    assert resp.data == {'created': 30, 'errors': []}
+    assert Task.objects.filter(project=project).count() == 31
+    assert len(fk_queries) == 4  # executors, projects and the two date rollup reads
+    assert project.start_date == date(2020, 1, 1)
+    assert project.end_date == date(2020, 12, 30)
+
+
+@pytest.mark.django_db
+def test_bulk_create_tasks_partial_errors(admin_client):
+    url = reverse('task_bulk_create')
+    task, valid_item = get_task()
+    body = [valid_item, {'name': 'No project', 'status': 'new'},
+            dict(valid_item, project=999), dict(valid_item, executor='NOT_VALID_DATA')]
+    resp = admin_client.post(url, data=body, format='json')
+
+    assert resp.status_code == 201
+    assert resp.data['created'] == 1
+    assert [error['index'] for error in resp.data['errors']] == [1, 2, 3]
+    assert 'project' in resp.data['errors'][1]['errors']
+    assert Task.objects.filter(project=task.project).count() == 2
+
+
+@pytest.mark.django_db
+def test_bulk_create_tasks_non_integer_pks(admin_client):
+    url = reverse('task_bulk_create')
+    task, valid_item = get_task()
+    body = [dict(valid_item, project=project) for project in
+            (task.project_id + 0.5, True, '{} '.format(task.project_id), [task.project_id], str(task.project_id))]
+    resp = admin_client.post(url, data=body, format='json')
+
+    assert resp.data['created'] == 1
+    assert [error['index'] for error in resp.data['errors']] == [0, 1, 2, 3]
+    assert all(error['errors']['project'][0].code == 'incorrect_type' for error in resp.data['errors'])
+
+
+@pytest.mark.django_db
+def test_bulk_create_tasks_all_invalid(admin_client):
+    url = reverse('task_bulk_create')
+    resp = admin_client.post(url, data=[{'executor': 'NOT_VALID_DATA'}], format='json')
+
+    assert resp.status_code == 400
+    assert resp.data['created'] == 0
+
+
+@pytest.mark.django_db
+def test_bulk_create_tasks_not_a_list(admin_client):
+    url = reverse('task_bulk_create')
+    _, valid_item = get_task()
+    resp = admin_client.post(url, data=valid_item, format='json')
+
+    assert resp.status_code == 400
+
+
+@pytest.mark.django_db
+def test_bulk_create_tasks_unauthorized():
+    url = reverse('task_bulk_create')
+    client = APIClient()
+    resp = client.post(url, data=[{'name': 'Logistic changes'}], format='json')
+
+    assert resp.status_code == 403
+
+
+# LIST_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_list_tasks_pages(admin_client):
+    task, _ = get_task()
+    for number in range(24):
+        Task.objects.create(name=f'Task {number:02}', project=task.project, status='new')
+    url = reverse('task_create')
+    ids = []
+    with CaptureQueriesContext(connection) as queries:
+        resp = admin_client.get(url)
+        while True:
+            assert resp.status_code == 200
+            ids.extend(item['id'] for item in resp.data['results'])
+            if not resp.data['next']:
+                break
+            resp = admin_client.get(resp.data['next'])
+    previous = admin_client.get(resp.data['previous'])
+
+    assert ids == list(Task.objects.order_by('id').values_list('id', flat=True))
+    assert [item['id'] for item in previous.data['results']] == ids[10:20]
+    assert not [query for query in queries if 'COUNT(' in query['sql'] or 'OFFSET' in query['sql']]
+
+
+@pytest.mark.django_db
+def test_list_tasks_ordering_by_name(admin_client):
+    task, _ = get_task()
+    for name in ('b', 'a', 'c', 'a', 'b'):
+        Task.objects.create(name=name, project=task.project, status='new')
+    url = reverse('task_create')
+    first = admin_client.get(url, {'ordering': '-name', 'page_size': 3})
+    second = admin_client.get(first.data['next'])
+    names = [item['name'] for item in first.data['results'] + second.data['results']]
+
+    assert names == ['c', 'b', 'b', 'a', 'a', 'Do something special']
+    assert second.data['next'] is None
+
+
+@pytest.mark.django_db
+def test_list_tasks_filters(admin_client):
+    task, _ = get_task()
+    executor, _ = get_employee()
+    Task.objects.create(name='Assigned', project=task.project, executor=executor, status='done')
+    url = reverse('task_create')
+
+    resp = admin_client.get(url, {'project': task.project_id, 'status': 'done'})
+    assert [item['name'] for item in resp.data['results']] == ['Assigned']
+
+    resp = admin_client.get(url, {'executor': 'null'})
+    assert [item['id'] for item in resp.data['results']] == [task.id]
+
+
+@pytest.mark.django_db
+def test_list_tasks_not_valid(admin_client):
+    url = reverse('task_create')
+
+    assert admin_client.get(url, {'status': 'NOT_VALID_DATA'}).status_code == 400
+    assert admin_client.get(url, {'project': 'NOT_VALID_DATA'}).status_code == 400
+    assert admin_client.get(url, {'ordering': 'status'}).status_code == 400
+    assert admin_client.get(url, {'cursor': 'NOT_VALID_DATA'}).status_code == 404
+
+
+@pytest.mark.django_db
+def test_list_tasks_tampered_cursor(admin_client):
+    url = reverse('task_create')
+    get_task()
+
+    def get(position, ordering='id'):
+        cursor = urlsafe_b64encode(json.dumps({'p': position, 'r': 0}).encode()).decode()
+        return admin_client.get(url, {'cursor': cursor, 'ordering': ordering})
+
+    assert get([0]).status_code == 200
+    assert get(['0']).status_code == 200
+    assert [get(position).status_code for position in (['abc'], [[1]], [None], [{}])] == [404] * 4
+    assert get(['a', 1], ordering='name').status_code == 200
+    assert get(['a', 'b'], ordering='name').status_code == 404
+
+
+@pytest.mark.django_db
+def test_list_tasks_unauthorized():
+    client = APIClient()
+    resp = client.get(reverse('task_create'))
+
+    assert resp.status_code == 403
+
+
+# CONDITIONAL_GET_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_get_task_not_modified(admin_client):
+    task, _ = get_task()
+    url = reverse('task', args=(task.id,))
+    resp = admin_client.get(path=url)
+    with CaptureQueriesContext(connection) as queries:
+        not_modified = admin_client.get(path=url, HTTP_IF_NONE_MATCH=resp['ETag'])
+
+    assert resp['ETag'] and resp['Last-Modified']
+    assert not_modified.status_code == 304
+    assert not_modified['ETag'] == resp['ETag']
+    assert len(queries) == 0
+
+
+@pytest.mark.django_db
+def test_get_task_modified_after_update(admin_client):
+    task, _ = get_task()
+    url = reverse('task', args=(task.id,))
+    etag = admin_client.get(path=url)['ETag']
+    admin_client.patch(url, data={'name': 'IT Task'}, format='json')
+    resp = admin_client.get(path=url, HTTP_IF_NONE_MATCH=etag)
+
+    assert resp.status_code == 200
+    assert resp['ETag'] != etag
+    assert resp.data['name'] == 'IT Task'
+
+
+@pytest.mark.django_db
+def test_get_task_if_modified_since(admin_client):
+    task, _ = get_task()
+    url = reverse('task', args=(task.id,))
+    last_modified = admin_client.get(path=url)['Last-Modified']
+    resp = admin_client.get(path=url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+    assert resp.status_code == 304
+
+
+@pytest.mark.django_db
+def test_get_task_modified_after_executor_deleted(admin_client):
+    task, _ = get_task()
+    executor, _ = get_employee()
+    task.executor = executor
+    task.save()
+    url = reverse('task', args=(task.id,))
+    etag = admin_client.get(path=url)['ETag']
+    executor.delete()
+    resp = admin_client.get(path=url, HTTP_IF_NONE_MATCH=etag)
+
+    assert resp.status_code == 200
+    assert resp.data['executor'] is None
+
+
+@pytest.mark.django_db
+def test_get_task_not_modified_unauthorized():
+    task, _ = get_task()
+    client = APIClient()
+    url = reverse('task', args=(task.id,))
+    resp = client.get(path=url, HTTP_IF_NONE_MATCH='*')
+
+    assert resp.status_code == 403
+
+
+# RESPONSE_CACHE_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_get_task_cached(admin_client):
+    task, _ = get_task()
+    url = reverse('task', args=(task.id,))
+    miss = admin_client.get(path=url)
+    with CaptureQueriesContext(connection) as queries:
+        hit = admin_client.get(path=url)
+
+    assert (miss['X-Cache'], hit['X-Cache']) == ('MISS', 'HIT')
+    assert hit.data == miss.data
+    assert hit['ETag'] == miss['ETag']
+    assert len(queries) == 0
+
+
+@pytest.mark.django_db
+def test_get_task_cache_invalidated(admin_client):
+    task, _ = get_task()
+    url = reverse('task', args=(task.id,))
+    admin_client.get(path=url)
+    admin_client.patch(url, data={'name': 'IT Task'}, format='json')
+    resp = admin_client.get(path=url)
+
+    assert resp['X-Cache'] == 'MISS'
+    assert resp.data['name'] == 'IT Task'
+
+    admin_client.delete(path=url)
+    assert admin_client.get(path=url).status_code == 404
+
+
+@pytest.mark.django_db(transaction=True)
+def test_get_project_cache_invalidated_by_task_rollup(admin_client):
+    task, _ = get_task()
+    url = reverse('project', args=(task.project_id,))
+    admin_client.get(path=url)
+    task.start_date = date(2019, 1, 1)
+    task.save()
+    resp = admin_client.get(path=url)
+
+    assert resp['X-Cache'] == 'MISS'
+    assert resp.data['start_date'] == '2019-01-01'
+
+
+@pytest.mark.django_db
+def test_get_task_cache_late_reader(admin_client):
+    task, _ = get_task()
+    executor, _ = get_employee()
+    other = Task.objects.create(name='Task', project=task.project, executor=executor, status='done')
+
+    # Rows loaded by slow readers, stored only after the changes.
+    deleted, touched = Task.objects.get(pk=task.pk), Task.objects.get(pk=other.pk)
+    admin_client.delete(reverse('task', args=(task.id,)))
+    executor.delete()
+    for stale in (deleted, touched):
+        response_cache.set(Task, stale.pk, stale.version, stale.updated_at, {'id': stale.pk})
+
+    assert response_cache.get(Task, task.pk) is None
+    assert response_cache.get(Task, other.pk) is None
+    assert admin_client.get(reverse('task', args=(task.id,))).status_code == 404
+    assert admin_client.get(reverse('task', args=(other.id,))).data['executor'] is None
+
+
+@pytest.mark.django_db
+def test_get_task_not_cached_per_process(admin_client, monkeypatch):
+    # Other workers' changes would never invalidate a per-process cache.
+    monkeypatch.setattr(response_cache, 'allow_local', False)
+    task, _ = get_task()
+    url = reverse('task', args=(task.id,))
+
+    assert [admin_client.get(path=url)['X-Cache'] for _ in range(2)] == ['MISS', 'MISS']
+    monkeypatch.setattr(response_cache, 'allow_local', True)
+    assert [admin_client.get(path=url)['X-Cache'] for _ in range(2)] == ['MISS', 'HIT']
+
+
+@pytest.mark.django_db
+def test_response_cache_stats(admin_client):
+    task, _ = get_task()
+    url = reverse('task', args=(task.id,))
+    before = admin_client.get(reverse('response_cache_stats')).data
+    admin_client.get(path=url)
+    admin_client.get(path=url)
+    after = admin_client.get(reverse('response_cache_stats')).data
+
+    assert after['hits'] == before['hits'] + 1
+    assert after['misses'] == before['misses'] + 1
+
+
+@pytest.mark.django_db
+def test_response_cache_stats_no_permissions(client):
+    resp = client.get(reverse('response_cache_stats'))
+
+    assert resp.status_code == 403
+
+
+# FAST_READ_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_get_task_fast_read_matches_serializer(admin_client):
+    task, _ = get_task()
+    executor, _ = get_employee()
+    with_executor = Task.objects.create(name='Task', project=task.project, executor=executor, status='done')
+    renderer = JSONRenderer()
+
+    for instance in (task, with_executor):
+        instance.refresh_from_db()
+        resp = admin_client.get(path=reverse('task', args=(instance.id,)), HTTP_ACCEPT='application/json')
+
+        assert resp['X-Cache'] == 'MISS'
+        assert resp.content == renderer.render(TaskSerializer(instance).data)
+
+
+@pytest.mark.django_db
+def test_get_task_fast_read_skips_model_instances(admin_client):
+    task, _ = get_task()
+    url = reverse('task', args=(task.id,))
+    with mock.patch.object(TaskSerializer, 'to_representation') as to_representation:
+        resp = admin_client.get(path=url)
+
+    assert resp.status_code == 200
+    assert not to_representation.called
+    assert TaskSerializer.get_values_reader().columns == (
+        'id', 'executor_id', 'name', 'project_id', 'start_date', 'end_date', 'status')
+
+
+# SPARSE_FIELDS_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_get_task_sparse_fields(admin_client):
+    task, _ = get_task()
+    url = reverse('task', args=(task.id,))
+    with CaptureQueriesContext(connection) as queries:
+        resp = admin_client.get(path=url, data={'fields': 'id,name,status'})
+    task_queries = [query['sql'] for query in queries if 'django_rest_task' in query['sql']]
+
+    assert resp.status_code == 200
+    assert resp.data == {'id': task.id, 'name': task.name, 'status': task.status}
+    assert resp['X-Cache'] == 'MISS'
+    assert len(task_queries) == 1
+    assert '"start_date"' not in task_queries[0] and '"executor_id"' not in task_queries[0]
+    assert TaskSerializer.get_values_reader(('id', 'name', 'status')).columns == ('id', 'name', 'status')
+
+
+@pytest.mark.django_db
+def test_get_task_sparse_fields_from_cache(admin_client):
+    task, _ = get_task()
+    url = reverse('task', args=(task.id,))
+    full = admin_client.get(path=url)
+    sparse = admin_client.get(path=url, data={'exclude': 'executor,project'})
+
+    assert sparse['X-Cache'] == 'HIT'
+    assert sparse['ETag'] == full['ETag']
+    assert sparse.data == {name: value for name, value in full.data.items() if name not in ('executor', 'project')}
+
+
+@pytest.mark.django_db
+def test_get_task_unknown_fields(admin_client):
+    task, _ = get_task()
+    resp = admin_client.get(path=reverse('task', args=(task.id,)), data={'fields': 'id,secret', 'exclude': 'nope'})
+
+    assert resp.status_code == 400
+    assert resp.data['fields'] == ['Unknown field(s): secret. Choose from: id, executor, name, project, start_date, '
+                                   'end_date, status.']
+    assert 'exclude' in resp.data
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('data, param', [({'fields': ''}, 'fields'), ({'fields': ' , '}, 'fields'),
+                                         ({'fields': 'id', 'exclude': 'id'}, 'exclude')])
+def test_get_task_no_fields(admin_client, data, param):
+    task, _ = get_task()
+    resp = admin_client.get(path=reverse('task', args=(task.id,)), data=data)
+
+    assert resp.status_code == 400
+    assert resp.data[param] == ['No field selected. Choose from: id, executor, name, project, start_date, '
+                                'end_date, status.']
+
+
+@pytest.mark.django_db
+def test_list_tasks_sparse_fields(admin_client):
+    task, _ = get_task()
+    with CaptureQueriesContext(connection) as queries:
+        resp = admin_client.get(path=reverse('task_create'), data={'fields': 'name', 'ordering': 'name'})
+    task_queries = [query['sql'] for query in queries if 'django_rest_task' in query['sql']]
+
+    assert resp.status_code == 200
+    assert resp.data['results'] == [{'name': task.name}]
+    assert len(task_queries) == 1
+    assert '"status"' not in task_queries[0]
+
+
+@pytest.mark.django_db
+def test_patch_task_sparse_response(admin_client):
+    task, _ = get_task()
+    resp = admin_client.patch(path=reverse('task', args=(task.id,)) + '?fields=status', data={'status': 'done'},
+                              format='json')
+    task.refresh_from_db()
+
+    assert resp.status_code == 200
+    assert resp.data == {'status': 'done'}
+    assert task.status == 'done'
+
+
+# EXPAND_TESTS #######################################
+
+
+@pytest.mark.django_db
+def test_get_task_expanded(admin_client):
+    task, _ = get_task()
+    task.executor = task.project.project_manager
+    task.save()
+    url = reverse('task', args=(task.id,))
+    admin_client.get(path=url)
+    with CaptureQueriesContext(connection) as queries:
+        resp = admin_client.get(path=url, data={'expand': 'executor,project.project_manager'})
+    manager = task.project.project_manager
+
+    assert resp.status_code == 200
+    assert resp.data['executor'] == {'id': manager.id, 'username': manager.user.username, 'first_name': 'test_name',
+                                     'last_name': 'test_name', 'birthdate': '1988-12-12', 'department': None}
+    assert resp.data['project']['name'] == task.project.name
+    assert resp.data['project']['project_manager'] == resp.data['executor']
+    assert not resp.has_header('ETag')
+    assert len(queries) == 1
+
+
+@pytest.mark.django_db
+def test_list_tasks_expanded_query_count_is_fixed(admin_client):
+    task, _ = get_task()
+    url = reverse('task_create')
+    params = {'expand': 'executor,project.project_manager', 'fields': 'id,executor,project'}
+    admin_client.get(path=url, data=params)
+    with CaptureQueriesContext(connection) as few:
+        admin_client.get(path=url, data=params)
+    for number in range(5):
+        executor, _ = get_employee()
+        project = Project.objects.create(name='Project {}'.format(number), project_manager=executor)
+        Task.objects.create(name='Task', project=project, executor=executor, status='new')
+    with CaptureQueriesContext(connection) as many:
+        resp = admin_client.get(path=url, data=params)
+
+    assert len(few) == len(many) == 1
+    assert all(set(item) == {'id', 'executor', 'project'} for item in resp.data['results'])
+    assert {item['project']['project_manager']['first_name'] for item in resp.data['results']} == {'test_name'}
+    assert sum(item['executor'] is not None for item in resp.data['results']) == 5
+
+
+@pytest.mark.django_db
+def test_get_task_unknown_expansion(admin_client):
+    task, _ = get_task()
+    resp = admin_client.get(path=reverse('task', args=(task.id,)), data={'expand': 'project.owner,status'})
+
+    assert resp.status_code == 400
+    assert resp.data['expand'] == ['Unknown expansion(s): project.owner, status. Choose from: executor, project.']
+
+
+@pytest.mark.django_db
+def test_patch_task_ignores_expand(admin_client):
+    task, _ = get_task()
+    other = Project.objects.create(name='Other project')
+    resp = admin_client.patch(path=reverse('task', args=(task.id,)) + '?expand=project',
+                              data={'project': other.id}, format='json')
+
+    assert resp.status_code == 200
+    assert resp.data['project'] == other.id
@@ -0,0 +1,111 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+from django_rest.throttling import BucketStore
+from rest_framework.test import APIClient
+from tests.conftest import get_client, get_employee
+
+RATES = dict(settings.THROTTLE['RATES'], auth_ip=(4, 1), auth_username=(2, 1), data_ip=(100, 1), data_user=(2, 1))
+
+
+WORKER = '''
+from django_rest.throttling import BucketStore
+store = BucketStore({path!r}, slots=64)
+print(sum(store.take('shared', 50, 0.001) == 0 for _ in range(30)))
+'''
+
+
+# STORE_TESTS #######################################
+
+
+def test_bucket_refills(tmp_path):
+    store = BucketStore(str(tmp_path / 'buckets'), slots=64)
+
+    assert [store.take('a', 3, 2, now=100) for _ in range(4)] == [0, 0, 0, 0.5]
+    assert store.take('b', 3, 2, now=100) == 0
+    assert store.take('a', 3, 2, now=100.25) == 0.25
+    assert store.take('a', 3, 2, now=100.5) == 0
+    assert store.take('a', 3, 2, now=100.5) == 0.5
+
+
+def test_take_all_or_nothing(tmp_path):
+    store = BucketStore(str(tmp_path / 'buckets'), slots=64)
+    store.take('b', 1, 1, now=100)
+
+    assert store.take_all([('a', 2, 1), ('b', 1, 1)], now=100) == [0, 1]
+    # Nothing was taken from "a".
+    assert store.take_all([('a', 2, 1), ('a', 2, 1)], now=100) == [0, 0]
+    assert store.take('a', 2, 1, now=100) == 1
+
+
+def test_stale_slots_reused(tmp_path):
+    store = BucketStore(str(tmp_path / 'buckets'), slots=BucketStore.PROBES)
+    for number in range(BucketStore.PROBES):
+        store.take('old {}'.format(number), 2, 1, now=100)
+
+    # The old buckets are full again by 102, any of their slots takes the new key.
+    assert [store.take('new', 1, 1, now=102) for _ in range(2)] == [0, 1]
+    assert store.take('old 0', 1, 1, now=102) == 0
+
+
+def test_buckets_shared_by_processes(tmp_path):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='settings')
+    code = 'import django; django.setup()\n' + WORKER.format(path=str(tmp_path / 'buckets'))
+    processes = [subprocess.Popen([sys.executable, '-c', code], env=env, stdout=subprocess.PIPE,
+                                  cwd=os.path.dirname(os.path.dirname(__file__))) for _ in range(3)]
+
+    assert sum(int(process.communicate()[0]) for process in processes) == 50
+
+
+# THROTTLE_TESTS #######################################
+
+
+@pytest.mark.django_db
+@override_settings(THROTTLE=dict(settings.THROTTLE, RATES=RATES))
+def test_login_throttled_per_username():
+    employee, data = get_employee()
+    api_client = APIClient()
+
+    def login(username, password='wrong'):
+        return api_client.post(reverse('token_obtain_pair'), data={'username': username, 'password': password},
+                               format='json')
+
+    assert [login(data['username']).status_code for _ in range(3)] == [401, 401, 429]
+    # The refused login took nothing from the IP: two tokens left, for other usernames.
+    assert [login('someone else').status_code for _ in range(2)] == [401, 401]
+    resp = login('someone else')
+
+    assert resp.status_code == 429
+    assert int(resp['Retry-After']) >= 1
+
+
+@pytest.mark.django_db
+@override_settings(THROTTLE=dict(settings.THROTTLE, RATES=RATES))
+def test_login_throttled_per_ip_despite_forwarded_for():
+    api_client = APIClient()
+    statuses = [api_client.post(reverse('token_obtain_pair'), data={'username': 'user {}'.format(number),
+                                                                    'password': 'wrong'}, format='json',
+                                HTTP_X_FORWARDED_FOR='10.0.0.{}'.format(number)).status_code
+                for number in range(6)]
+
+    assert statuses == [401] * 4 + [429] * 2
+
+
+@pytest.mark.django_db
+def test_data_throttled_per_user():
+    first, _ = get_employee()
+    second, _ = get_employee()
+    first_client, second_client = get_client(first), get_client(second)
+
+    with override_settings(THROTTLE=dict(settings.THROTTLE, RATES=RATES)):
+        statuses = [first_client.get(reverse('employee', args=(first.pk,))).status_code for _ in range(3)]
+        other = second_client.get(reverse('employee', args=(second.pk,)))
+
+    assert statuses == [200, 200, 429]
+    assert other.status_code == 200
@@ -0,0 +1,66 @@
+import logging
+import pytest
+
+from django.test import override_settings
+from django.urls import reverse
+from tests.conftest import get_task
+
+SAMPLED = {'SAMPLE_RATE': 1.0, 'LOGGER': 'django_rest.timing'}
+
+
+def parse_server_timing(header):
+    metrics = {}
+    for metric in header.split(', '):
+        name, *params = metric.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+@pytest.mark.django_db
+@override_settings(SERVER_TIMING=SAMPLED)
+def test_server_timing_header(admin_client):
+    task, _ = get_task()
+    admin_client.get(reverse('project', args=(task.project_id,)))  # caches the user
+    resp = admin_client.get(reverse('task', args=(task.id,)))
+    metrics = parse_server_timing(resp['Server-Timing'])
+
+    assert resp.status_code == 200
+    assert {'auth', 'view', 'serialize', 'render', 'db', 'total'} <= set(metrics)
+    assert metrics['db']['desc'] == '"1 queries"'
+    assert float(metrics['total']['dur']) >= float(metrics['view']['dur']) >= float(metrics['serialize']['dur'])
+
+
+@pytest.mark.django_db
+@override_settings(SERVER_TIMING=SAMPLED)
+def test_server_timing_rollup_and_log(admin_client, caplog):
+    task, _ = get_task()
+    with caplog.at_level(logging.INFO, logger='django_rest.timing'):
+        resp = admin_client.patch(reverse('task', args=(task.id,)), data={'status': 'done'}, format='json')
+    record, = caplog.records
+
+    assert 'rollup' in parse_server_timing(resp['Server-Timing'])
+    assert (record.method, record.path, record.status) == ('PATCH', reverse('task', args=(task.id,)), 200)
+    assert record.db_queries > 0
+    assert record.total_ms >= record.view_ms >= record.rollup_ms
+
+
+@pytest.mark.django_db
+@override_settings(SERVER_TIMING=SAMPLED)
+def test_server_timing_not_modified(admin_client):
+    task, _ = get_task()
+    url = reverse('task', args=(task.id,))
+    resp = admin_client.get(url, HTTP_IF_NONE_MATCH=admin_client.get(url)['ETag'])
+
+    assert resp.status_code == 304
+    assert 'view' in parse_server_timing(resp['Server-Timing'])
+
+
+@pytest.mark.django_db
+@override_settings(SERVER_TIMING={'SAMPLE_RATE': 0.0})
+def test_server_timing_not_sampled(admin_client, caplog):
+    task, _ = get_task()
+    with caplog.at_level(logging.INFO, logger='django_rest.timing'):
+        resp = admin_client.get(reverse('task', args=(task.id,)))
+
+    assert 'Server-Timing' not in resp
+    assert not caplog.records
@@ -13,19 +13,16 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-    TokenVerifyView,
-)
 from django_rest import views
-from drf_yasg.views import get_schema_view
+from django_rest.metrics import metrics_view
+from django_rest.schema import get_precomputed_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
 
-schema_view = get_schema_view(
+schema_view = get_precomputed_schema_view(
    openapi.Info(
       title="Django REST API",
       default_version='v1',
@@ -34,7 +31,8 @@ schema_view = get_schema_view(
       contact=openapi.Contact(email="contact@snippets.local"),
       license=openapi.License(name="BSD License"),
    ),
-   public=True,
+   path=settings.OPENAPI_SCHEMA_FILE,
+   max_age=settings.OPENAPI_SCHEMA_MAX_AGE,
    permission_classes=(permissions.AllowAny,),
 )
 
@@ -44,28 +42,41 @@ urlpatterns = [
     path('api-auth/', include('rest_framework.urls')),
 
     # JWT
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    path('api/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
+    path('api/token/', views.TokenObtainPairAPIView.as_view(), name='token_obtain_pair'),
+    path('api/token/refresh/', views.TokenRefreshAPIView.as_view(), name='token_refresh'),
+    path('api/token/verify/', views.TokenVerifyAPIView.as_view(), name='token_verify'),
+    path('api/token/revoke/', views.TokenRevokeAPIView.as_view(), name='token_revoke'),
 
     # Swagger
     path(r'', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path(r'redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 
     # Employees
-    path('employee/', views.EmployeesCreateAPIView.as_view(), name='employee_create'),
+    path('employee/', views.EmployeesListCreateAPIView.as_view(), name='employee_create'),
     path('employee/<int:pk>/', views.EmployeeAPIView.as_view(), name='employee'),
+    path('employee/import/', views.EmployeesImportAPIView.as_view(), name='employee_import'),
 
     # Departments
-    path('department/', views.DepartmentCreateAPIView.as_view(), name='department_create'),
+    path('department/', views.DepartmentListCreateAPIView.as_view(), name='department_create'),
     path('department/<int:pk>/', views.DepartmentAPIView.as_view(), name='department'),
 
     # Projects
-    path('project/', views.ProjectCreateAPIView.as_view(), name='project_create'),
+    path('project/', views.ProjectListCreateAPIView.as_view(), name='project_create'),
     path('project/<int:pk>/', views.ProjectAPIView.as_view(), name='project'),
+    path('project/<int:pk>/stats/', views.ProjectStatsAPIView.as_view(), name='project_stats'),
 
     # Tasks
-    path('task/', views.TaskCreateAPIView.as_view(), name='task_create'),
+    path('task/', views.TaskListCreateAPIView.as_view(), name='task_create'),
     path('task/<int:pk>/', views.TaskAPIView.as_view(), name='task'),
+    path('task/bulk/', views.TaskBulkCreateAPIView.as_view(), name='task_bulk_create'),
+
+    # Background jobs
+    path('job/<int:pk>/', views.JobAPIView.as_view(), name='job'),
+
+    # Response cache
+    path('cache/stats/', views.ResponseCacheStatsAPIView.as_view(), name='response_cache_stats'),
+
+    # Prometheus
+    path('metrics/', metrics_view, name='metrics'),
 
 ]